@@ -0,0 +1,165 @@
+"""
+Admission Control Module
+Keeps the summed peak memory of in-flight conversions under an RSS budget.
+Each file's peak is estimated from its size and format, then the estimates
+are corrected from the RSS actually observed in the worker processes.
+"""
+
+import os
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Dict
+
+from converter import MarkdownConverter
+from scheduler import ScheduledJob
+from worker_pool import read_rss
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+MB = 1024 * 1024
+
+# RSS of an idle worker (interpreter + markitdown & friends) before any observation
+DEFAULT_WORKER_BASE_BYTES = 200 * MB
+
+# Fraction of physical memory used as budget when none is configured
+DEFAULT_BUDGET_FRACTION = 0.7
+
+# Weight of the newest observation when lowering an estimate
+LEARNING_RATE = 0.3
+
+
+def total_memory() -> Optional[int]:
+    """Physical memory of the machine in bytes, or None if unknown."""
+    if HAS_PSUTIL:
+        return psutil.virtual_memory().total
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_budget() -> Optional[int]:
+    """Default RSS budget: a fraction of physical memory (None = unlimited)."""
+    total = total_memory()
+    return int(total * DEFAULT_BUDGET_FRACTION) if total else None
+
+
+@dataclass
+class _Tracked:
+    """An admitted job and the memory observed for it so far."""
+    job: ScheduledJob
+    estimate: float
+    # Baseline RSS of each worker running the job (several for split documents)
+    baselines: Dict[int, int] = field(default_factory=dict)
+    peak: int = 0
+
+    @property
+    def workers(self) -> int:
+        """Worker processes the job occupies (at least one)."""
+        return max(1, len(self.baselines))
+
+    @property
+    def committed(self) -> float:
+        """Memory charged against the budget: the estimate, or more if already observed."""
+        return max(self.estimate, self.peak)
+
+
+class MemoryAdmission:
+    """
+    Memory-aware admission controller for the batch engine.
+    A job is admitted while the committed memory of all in-flight jobs plus
+    its own estimate stays under the budget; an empty engine always admits one.
+    """
+
+    def __init__(self, budget_bytes: Optional[int]):
+        """
+        Initialize the controller.
+
+        Args:
+            budget_bytes: RSS budget for all workers together (None = unlimited)
+        """
+        self._budget = budget_bytes
+        self._worker_base = float(DEFAULT_WORKER_BASE_BYTES)
+        self._factors: Dict[str, float] = {}
+        self._tracked: Dict[int, _Tracked] = {}
+
+    def factor(self, format_name: str) -> float:
+        """Current peak-memory bytes per source byte for a format."""
+        if format_name in self._factors:
+            return self._factors[format_name]
+        return MarkdownConverter.FORMAT_MEMORY_FACTORS.get(format_name, 1.0)
+
+    def estimate(self, job: ScheduledJob) -> float:
+        """Estimated document memory (excluding the worker's own baseline)."""
+        return job.size * self.factor(job.format_name)
+
+    def admits(self, job: ScheduledJob) -> bool:
+        """Whether the job fits under the budget right now."""
+        if self._budget is None or not self._tracked:
+            return True
+        committed = sum(t.committed for t in self._tracked.values())
+        workers = sum(t.workers for t in self._tracked.values()) + 1
+        return committed + self.estimate(job) + workers * self._worker_base <= self._budget
+
+    def acquire(self, job: ScheduledJob):
+        """Record an admitted job (its workers are attached once they start it)."""
+        self._tracked[job.index] = _Tracked(job=job, estimate=self.estimate(job))
+
+    def attach(self, job: ScheduledJob, workers: Dict[int, Optional[int]]):
+        """
+        Record the workers currently running a job and their baseline RSS.
+        Split documents run their parts on changing workers, so this is called
+        on every dispatch round; workers no longer running the job are dropped.
+
+        Args:
+            job: The admitted job
+            workers: {pid: RSS of the worker while idle before the job} (WorkerPool.idle_rss_for);
+                None for a fresh worker, whose baseline is the learned idle worker RSS
+        """
+        tracked = self._tracked.get(job.index)
+        if tracked is None:
+            return
+        for pid in list(tracked.baselines):
+            if pid not in workers:
+                del tracked.baselines[pid]
+        for pid, idle_rss in workers.items():
+            if pid in tracked.baselines:
+                continue
+            # Sampled before the job was dispatched: the job's own memory is not in it
+            if idle_rss:
+                self._worker_base = (1 - LEARNING_RATE) * self._worker_base + LEARNING_RATE * idle_rss
+                tracked.baselines[pid] = idle_rss
+            else:
+                tracked.baselines[pid] = int(self._worker_base)
+
+    def sample(self):
+        """Read the current RSS of every busy worker and update observed peaks."""
+        for tracked in self._tracked.values():
+            if not tracked.baselines:
+                continue
+            observed = 0
+            for pid, baseline in tracked.baselines.items():
+                rss = read_rss(pid)
+                if rss is not None:
+                    observed += max(0, rss - baseline)
+            tracked.peak = max(tracked.peak, observed)
+
+    def release(self, job: ScheduledJob):
+        """Forget a finished job and learn its format's memory factor."""
+        tracked = self._tracked.pop(job.index, None)
+        if tracked is None or job.size <= 0 or tracked.peak <= 0:
+            return
+
+        observed = tracked.peak / job.size
+        current = self.factor(job.format_name)
+        # Raise immediately on underestimates, lower slowly on overestimates
+        self._factors[job.format_name] = max(
+            observed,
+            (1 - LEARNING_RATE) * current + LEARNING_RATE * observed
+        )
@@ -0,0 +1,545 @@
+"""
+Batch Engine Module
+Runs many conversions in parallel on a pool of worker processes.
+Used by both MarkdownConverter.convert_folder and the GUI conversion loop.
+"""
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import List, Optional, Dict, Callable
+
+from converter import MarkdownConverter, ConversionResult
+from scheduler import CostScheduler, FifoScheduler, ScheduledJob
+from pipeline import ConversionPipeline, PipelineOptions
+from worker_pool import WorkerTimeout, TaskCancelled
+from warm_pool import (
+    get_warm_pool,
+    convert_task,
+    DEFAULT_MAX_TASKS_PER_WORKER,
+    DEFAULT_MAX_RSS_GROWTH_MB
+)
+from admission import MemoryAdmission, default_budget, MB
+from manifest import Manifest, options_fingerprint, chunking_fingerprint
+from cache import ConversionCache
+from dedup import find_duplicates, materialize
+from journal import JobJournal, new_job_id
+from results_store import ResultsStore
+from chunk_delta import RunDeltaLog
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int, ConversionResult], None]
+
+@dataclass
+class LaneLimits:
+    """Concurrency and memory limits for one format lane (a SUPPORTED_FORMATS category)."""
+    # Fraction of the pool's workers the lane may occupy at once (at least one worker)
+    worker_share: float = 1.0
+    # Upper bound on the summed memory estimate of the lane's in-flight files (None = unlimited)
+    memory_budget_mb: Optional[int] = None
+    # Per-file timeout in seconds for this format (None = use BatchOptions.file_timeout)
+    timeout: Optional[float] = None
+
+
+def _default_lane_limits() -> Dict[str, LaneLimits]:
+    # Heavy formats share at most half of the pool so small files keep flowing
+    return {
+        'PDF': LaneLimits(worker_share=0.5, memory_budget_mb=4096, timeout=1800),
+        'PowerPoint': LaneLimits(worker_share=0.5, memory_budget_mb=4096, timeout=1800),
+        'Excel': LaneLimits(worker_share=0.5, memory_budget_mb=4096, timeout=1800),
+    }
+
+
+@dataclass
+class BatchOptions:
+    """Options for parallel batch conversion."""
+    # Number of worker processes (None = one per CPU core, 1 = run in-process without timeouts)
+    max_workers: Optional[int] = None
+    # Wall-clock limit per file in seconds; the worker is killed and replaced (None = unlimited)
+    file_timeout: Optional[float] = 600.0
+    # RSS budget for all workers together in MB (None = 70% of physical memory, 0 = unlimited)
+    memory_budget_mb: Optional[int] = None
+    # Warm workers are reused across batches and recycled after N files or X MB of RSS growth
+    max_tasks_per_worker: Optional[int] = DEFAULT_MAX_TASKS_PER_WORKER
+    max_rss_growth_mb: Optional[int] = DEFAULT_MAX_RSS_GROWTH_MB
+    # True: deliver results in input order. False: deliver as soon as each file finishes.
+    ordered: bool = False
+    # Start the most expensive files first (estimated from size, page count and format)
+    longest_first: bool = True
+    # Per-format lane limits; formats without an entry may use every worker
+    lane_limits: Dict[str, LaneLimits] = field(default_factory=_default_lane_limits)
+    # Run files through the staged pipeline instead of whole-file workers (None = off)
+    pipeline: Optional[PipelineOptions] = None
+    # Keep a manifest in the output root: skip unchanged sources, reconvert changed ones
+    # (also the root of the chunk delta logs)
+    incremental: bool = False
+    # With incremental: delete recorded outputs whose source file no longer exists
+    # (folder conversions only, for sources under the scanned folder)
+    remove_orphans: bool = False
+    # Convert byte-identical sources once and copy the outputs to the other paths
+    dedup: bool = False
+    # With dedup: hardlink the copied outputs instead of copying them
+    dedup_hardlink: bool = False
+    # Keep a crash-safe job journal (~/.markdown-converter/jobs) so the batch can be resumed
+    journal: bool = False
+    # Store every result in the results database (~/.markdown-converter/results.db)
+    results_store: bool = False
+    # Keep folder scan indexes on disk between runs (~/.markdown-converter/scan-index)
+    scan_index: bool = False
+
+
+class _ResultEmitter:
+    """Delivers results to the progress callback, optionally in input order."""
+
+    def __init__(self, total: int, ordered: bool, callback: Optional[ProgressCallback]):
+        self._total = total
+        self._ordered = ordered
+        self._callback = callback
+        self._buffer: Dict[int, ConversionResult] = {}
+        self._next_index = 0
+        self.results: List[ConversionResult] = []
+
+    def add(self, index: int, result: ConversionResult):
+        if not self._ordered:
+            self._emit(result)
+            return
+
+        self._buffer[index] = result
+        while self._next_index in self._buffer:
+            self._emit(self._buffer.pop(self._next_index))
+            self._next_index += 1
+
+    def flush(self):
+        """Emit buffered results that are still waiting for an earlier file (e.g. after stop)."""
+        for index in sorted(self._buffer):
+            self._emit(self._buffer[index])
+        self._buffer.clear()
+
+    def _emit(self, result: ConversionResult):
+        self.results.append(result)
+        if self._callback:
+            self._callback(len(self.results), self._total, result)
+
+
+class _LaneTracker:
+    """Tracks in-flight work per format lane and enforces LaneLimits."""
+
+    def __init__(
+        self,
+        limits: Dict[str, LaneLimits],
+        workers: int,
+        estimate: Callable[[ScheduledJob], float]
+    ):
+        self._limits = limits
+        self._workers = workers
+        self._estimate = estimate
+        self._running: Dict[str, int] = {}
+        self._memory: Dict[str, float] = {}
+
+    def _max_workers(self, lane: str) -> int:
+        limits = self._limits.get(lane)
+        if limits is None:
+            return self._workers
+        return max(1, int(self._workers * limits.worker_share))
+
+    def admits(self, job: ScheduledJob) -> bool:
+        """Whether the job's lane has room for it right now."""
+        lane = job.format_name
+        running = self._running.get(lane, 0)
+        if running >= self._max_workers(lane):
+            return False
+
+        limits = self._limits.get(lane)
+        if limits is None or limits.memory_budget_mb is None or running == 0:
+            # An idle lane always admits one file so oversized files still run
+            return True
+        budget = limits.memory_budget_mb * 1024 * 1024
+        return self._memory.get(lane, 0.0) + self._estimate(job) <= budget
+
+    def acquire(self, job: ScheduledJob) -> float:
+        """Count the job against its lane. Returns the memory charged, for release."""
+        lane = job.format_name
+        charged = self._estimate(job)
+        self._running[lane] = self._running.get(lane, 0) + 1
+        self._memory[lane] = self._memory.get(lane, 0.0) + charged
+        return charged
+
+    def release(self, job: ScheduledJob, charged: float):
+        lane = job.format_name
+        self._running[lane] -= 1
+        self._memory[lane] -= charged
+
+    def timeout(self, job: ScheduledJob, default: Optional[float]) -> Optional[float]:
+        """Timeout for a job: its lane's timeout, else the batch default."""
+        limits = self._limits.get(job.format_name)
+        if limits is not None and limits.timeout is not None:
+            return limits.timeout
+        return default
+
+
+class BatchEngine:
+    """
+    Parallel batch conversion engine.
+    CPU-bound parsing (markitdown, pdfminer, openpyxl) runs in warm worker processes
+    that are shared across batches; each task carries the caller's AIOptions.
+    """
+
+    def __init__(self, converter: MarkdownConverter, options: Optional[BatchOptions] = None):
+        """
+        Initialize the engine.
+
+        Args:
+            converter: Converter providing AI options, the stop flag and the in-process fallback
+            options: Batch options (worker count, ordering, lane limits)
+        """
+        self._converter = converter
+        self._options = options or BatchOptions()
+        self._pipeline: Optional[ConversionPipeline] = None
+
+    def _pool_size(self) -> int:
+        """Size of the warm pool (kept across batches, independent of batch size)."""
+        return max(1, self._options.max_workers or os.cpu_count() or 1)
+
+    def _resolve_workers(self, total: int) -> int:
+        """Number of files kept in flight for a batch of `total` files."""
+        return max(1, min(self._pool_size(), total))
+
+    def run(
+        self,
+        files: List[str],
+        output_dir: Optional[str] = None,
+        overwrite: bool = False,
+        progress_callback: Optional[ProgressCallback] = None,
+        journal: Optional[JobJournal] = None,
+        retry_of: Optional[str] = None,
+        source_root: Optional[str] = None
+    ) -> List[ConversionResult]:
+        """
+        Convert a list of files.
+
+        Args:
+            files: Source file paths
+            output_dir: Optional output directory
+            overwrite: If True, reconvert everything. If False, skip existing .md files
+                that are up to date (reconverting those whose source changed when incremental).
+            progress_callback: Optional callback(current, total, result) for progress updates
+            journal: Journal of a resumed job (None = start a new one when BatchOptions.journal)
+            retry_of: Run whose failures this batch re-runs (recorded in the results store)
+            source_root: Folder the files were scanned from (anchors the manifest when
+                outputs go next to the sources; required for orphan removal)
+
+        Returns:
+            List of ConversionResult, in delivery order
+        """
+        if not files:
+            return []
+
+        emitter = _ResultEmitter(len(files), self._options.ordered, progress_callback)
+        manifest = Manifest.for_batch(files, output_dir, source_root) if self._options.incremental else None
+        fingerprint = options_fingerprint(self._converter.ai_options)
+        chunking = chunking_fingerprint(self._converter.ai_options)
+        owns_journal = journal is None and self._options.journal
+        if owns_journal:
+            journal = self._create_journal(files, output_dir, overwrite, source_root)
+        # A journaled job and its resumes share one run in the results store
+        run_id = journal.job_id if journal is not None else new_job_id()
+        store = self._open_store(run_id, files, output_dir, overwrite, retry_of, source_root)
+        deltas = RunDeltaLog(str(manifest.root), run_id) if manifest is not None else None
+
+        try:
+            if manifest is not None and self._options.remove_orphans and source_root:
+                manifest.remove_orphans(
+                    source_root,
+                    lambda source, output: deltas.add_removed(source, output.with_suffix('.jsonl'))
+                )
+
+            def emit(index: int, result: ConversionResult):
+                if manifest is not None and result.success and not result.skipped:
+                    manifest.record(result.source_path, result.output_path, fingerprint, chunking)
+                if journal is not None:
+                    journal.completed(result)
+                if store is not None:
+                    store.record(run_id, result)
+                if deltas is not None and result.chunk_delta is not None:
+                    deltas.add(result.source_path, str(Path(result.output_path).with_suffix('.jsonl')),
+                               result.chunk_delta)
+                emitter.add(index, result)
+
+            pending, refresh = self._plan(files, output_dir, overwrite, manifest, (fingerprint, chunking), emit)
+
+            def overwrite_for(file_path: str) -> bool:
+                # Consulted when a file is dispatched: from here on it is in flight
+                if journal is not None:
+                    journal.started(file_path)
+                return overwrite or file_path in refresh
+
+            self._run_deduplicated(pending, output_dir, overwrite_for, emit)
+        finally:
+            if manifest is not None:
+                manifest.save()
+            if deltas is not None:
+                deltas.close()
+            if owns_journal and journal is not None:
+                journal.close()
+            if store is not None:
+                store.finish_run(run_id)
+                store.close()
+            cache = ConversionCache.from_options(self._converter.ai_options)
+            if cache is not None:
+                cache.evict()
+
+        emitter.flush()
+        return emitter.results
+
+    def _create_journal(self, files, output_dir, overwrite, source_root) -> Optional[JobJournal]:
+        try:
+            return JobJournal.create(files, output_dir, overwrite, self._converter.ai_options, source_root)
+        except OSError as e:
+            logger.warning(f"Could not create job journal, continuing without: {e}")
+            return None
+
+    def _open_store(self, run_id, files, output_dir, overwrite, retry_of, source_root) -> Optional[ResultsStore]:
+        if not self._options.results_store:
+            return None
+        try:
+            store = ResultsStore()
+            store.start_run(run_id, files, output_dir, overwrite, self._converter.ai_options, retry_of, source_root)
+            return store
+        except Exception as e:
+            logger.warning(f"Could not open results store, continuing without: {e}")
+            return None
+
+    def _run_deduplicated(self, pending, output_dir, overwrite_for, emit):
+        """
+        Convert pending (index, path) pairs, each distinct content once.
+        Duplicates with the primary's file name get copies of its outputs; those
+        with another name (the markdown embeds the name) are converted after
+        their primary, which makes them cache hits when the cache is on.
+        """
+        groups = find_duplicates([path for _, path in pending]) if self._options.dedup else {}
+        primary_of = {dup: primary for primary, dups in groups.items() for dup in dups}
+        index_of = {path: index for index, path in pending}
+
+        first = [(index, path) for index, path in pending if path not in primary_of]
+        later = []
+
+        def on_result(index: int, result: ConversionResult):
+            emit(index, result)
+            for dup in groups.get(result.source_path, []):
+                if result.cancelled:
+                    continue
+                if not result.success:
+                    emit(index_of[dup], replace(result, source_path=dup, duplicate_of=result.source_path))
+                elif result.skipped or Path(dup).name != Path(result.source_path).name:
+                    later.append((index_of[dup], dup))
+                elif not overwrite_for(dup) and self._converter.output_path_for(dup, output_dir).exists():
+                    later.append((index_of[dup], dup))
+                else:
+                    emit(index_of[dup], materialize(
+                        result, dup,
+                        self._converter.output_path_for(dup, output_dir),
+                        link=self._options.dedup_hardlink
+                    ))
+
+        self._run_batch(first, output_dir, overwrite_for, on_result)
+
+        if later and not self._converter.stop_requested:
+            def on_later(index: int, result: ConversionResult):
+                if result.success and not result.skipped:
+                    result.duplicate_of = primary_of[result.source_path]
+                emit(index, result)
+            self._run_batch(later, output_dir, overwrite_for, on_later)
+
+    def _run_batch(self, batch, output_dir, overwrite_for, emit):
+        """Run (index, path) pairs on the configured mode, emitting with the original index."""
+        if not batch:
+            return
+        files = [path for _, path in batch]
+        self._run(files, output_dir, overwrite_for, lambda local, result: emit(batch[local][0], result))
+
+    def _run(self, files, output_dir, overwrite_for, deliver):
+        if self._options.max_workers == 1:
+            self._run_serial(files, output_dir, overwrite_for, deliver)
+        elif self._options.pipeline:
+            self._run_pipeline(files, output_dir, overwrite_for, deliver)
+        else:
+            self._run_parallel(files, output_dir, overwrite_for, deliver, self._resolve_workers(len(files)))
+
+    def _plan(self, files, output_dir, overwrite, manifest, fingerprints, emit):
+        """
+        Decide which files need converting. Unchanged files are reported as skipped
+        right away; files whose source changed since their recorded conversion are
+        returned in `refresh` so they overwrite their stale output.
+
+        Returns:
+            (pending [(index, path)], refresh set of paths)
+        """
+        pending, refresh = [], set()
+        for index, file_path in enumerate(files):
+            if manifest is not None and not overwrite:
+                output_path = str(self._converter.output_path_for(file_path, output_dir))
+                if manifest.is_current(file_path, output_path, *fingerprints):
+                    emit(index, ConversionResult(
+                        source_path=file_path,
+                        output_path=output_path,
+                        success=True,
+                        skipped=True,
+                        error_message="Không có thay đổi, bỏ qua"
+                    ))
+                    continue
+                if manifest.has_entry(output_path):
+                    refresh.add(file_path)
+            pending.append((index, file_path))
+        return pending, refresh
+
+    def stage_queue_depths(self) -> Dict[str, int]:
+        """Per-stage queue depths of the running pipeline (empty when not pipelined)."""
+        if self._pipeline is None:
+            return {}
+        return self._pipeline.queue_depths()
+
+    def _warm_pool(self):
+        """The shared warm pool, sized and limited by the batch options."""
+        return get_warm_pool(
+            self._pool_size(),
+            max_tasks_per_worker=self._options.max_tasks_per_worker,
+            max_rss_growth_mb=self._options.max_rss_growth_mb
+        )
+
+    def _make_admission(self) -> MemoryAdmission:
+        budget_mb = self._options.memory_budget_mb
+        if budget_mb is None:
+            return MemoryAdmission(default_budget())
+        return MemoryAdmission(budget_mb * MB if budget_mb > 0 else None)
+
+    def _make_scheduler(self, files: List[str]):
+        scheduler_cls = CostScheduler if self._options.longest_first else FifoScheduler
+        return scheduler_cls(files)
+
+    def _run_pipeline(self, files, output_dir, overwrite_for, deliver):
+        """Convert files on the staged pipeline (parse -> images -> text -> AI -> write)."""
+        admission = self._make_admission()
+        lanes = _LaneTracker(self._options.lane_limits, self._resolve_workers(len(files)), admission.estimate)
+        self._pipeline = ConversionPipeline(self._converter, self._options.pipeline)
+        try:
+            self._pipeline.run(
+                self._make_scheduler(files), output_dir, overwrite_for, deliver,
+                pool=self._warm_pool(), lanes=lanes, admission=admission
+            )
+        finally:
+            self._pipeline = None
+
+    def _run_serial(self, files, output_dir, overwrite_for, deliver):
+        """Convert files one by one in the calling process."""
+        for index, file_path in enumerate(files):
+            if self._converter.stop_requested:
+                break
+            result = self._converter.convert_file(file_path, output_dir, overwrite=overwrite_for(file_path))
+            deliver(index, result)
+
+    def _run_parallel(self, files, output_dir, overwrite_for, deliver, workers: int):
+        """Convert files on the shared warm pool, keeping at most `workers` files in flight."""
+        scheduler = self._make_scheduler(files)
+        admission = self._make_admission()
+        lanes = _LaneTracker(self._options.lane_limits, workers, admission.estimate)
+        in_flight = {}
+
+        def admits(job: ScheduledJob) -> bool:
+            return lanes.admits(job) and admission.admits(job)
+
+        logger.info(f"Batch conversion: {len(files)} files on {workers} workers")
+
+        pool = self._warm_pool()
+        ai_options = self._converter.ai_options
+        # Split documents (large PDFs, workbooks) are coordinated from this process so their parts can fan out to the pool
+        coordinator = ThreadPoolExecutor(max_workers=2, thread_name_prefix="split-doc")
+
+        try:
+            self._dispatch_loop(scheduler, admission, lanes, admits, pool, coordinator,
+                                ai_options, output_dir, overwrite_for, deliver, workers, in_flight)
+        finally:
+            coordinator.shutdown(wait=True)
+
+    def _dispatch_loop(self, scheduler, admission, lanes, admits, pool, coordinator,
+                       ai_options, output_dir, overwrite_for, deliver, workers, in_flight):
+        """Keep the pool busy until the scheduler is drained (or a stop is requested)."""
+        while len(scheduler) or in_flight:
+            # Submit lazily so a stop request leaves the rest of the queue untouched,
+            # and so each pick sees the throughput learned from finished files
+            while len(in_flight) < workers and not self._converter.stop_requested:
+                job = scheduler.pop(admits)
+                if job is None:
+                    break
+                charged = lanes.acquire(job)
+                timeout = lanes.timeout(job, self._options.file_timeout)
+                # Page/sheet counts from the scheduler spare reopening the file
+                units = job.units or None
+                if self._converter.should_split(job.path, units):
+                    # Parts run on the pool tagged with the path; the timeout becomes their deadline
+                    future = coordinator.submit(
+                        self._converter.convert_file, job.path, output_dir, overwrite_for(job.path),
+                        units, timeout
+                    )
+                else:
+                    future = pool.submit(
+                        convert_task, job.path, output_dir, overwrite_for(job.path), ai_options, units,
+                        timeout=timeout,
+                        on_progress=self._converter.forward_page_progress,
+                        tag=job.path
+                    )
+                admission.acquire(job)
+                in_flight[future] = (job, charged)
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+            # Charge every worker running a file, including the parts of split documents
+            for job, _ in in_flight.values():
+                admission.attach(job, pool.idle_rss_for(job.path))
+            admission.sample()
+
+            if self._converter.stop_requested:
+                # Hard cancellation: kill the workers still converting. Split documents
+                # running on the coordinator stop at their own checkpoints.
+                for future in in_flight:
+                    pool.cancel(future)
+
+            for future in done:
+                job, charged = in_flight.pop(future)
+                lanes.release(job, charged)
+                admission.release(job)
+                result = self._collect(future, job.path, output_dir)
+                scheduler.record(result)
+                deliver(job.index, result)
+
+    def _collect(self, future, file_path: str, output_dir: Optional[str]) -> ConversionResult:
+        """
+        Turn a finished future into a ConversionResult. Killed, timed out and
+        crashed workers become failures and their partial output is removed.
+        """
+        try:
+            return future.result()
+        except Exception as e:
+            error = e
+
+        self._converter.discard_partial_output(file_path, output_dir)
+        result = ConversionResult(
+            source_path=file_path,
+            output_path=None,
+            success=False,
+            error_message=str(error)
+        )
+        if isinstance(error, TaskCancelled):
+            result.error_message = "Đã hủy"
+            result.cancelled = True
+        elif isinstance(error, WorkerTimeout):
+            logger.error(f"Conversion timed out for {file_path}: {error}")
+            result.error_message = f"Quá thời gian chuyển đổi ({error})"
+            result.timed_out = True
+        else:
+            logger.error(f"Worker failed for {file_path}: {error}")
+        return result
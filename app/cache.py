@@ -0,0 +1,183 @@
+"""
+Conversion Cache Module
+Local content-addressed cache of finished conversions. Entries are keyed by
+the source's content hash, the output-relevant options and the tool version,
+so a copy of an already converted document turns into a file copy.
+Size-bounded, least recently used entries are evicted first.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable
+
+from manifest import file_hash, options_fingerprint, tool_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".markdown-converter" / "cache"
+DEFAULT_MAX_SIZE_MB = 2048
+
+ENTRY_FILE = "entry.json"
+MARKDOWN_FILE = "markdown.md"
+IMAGES_SUBDIR = "images"
+
+# Stands in for the per-document "./{name}_images/" link prefix in cached markdown
+IMAGES_PLACEHOLDER = "\x00images\x00"
+
+# Options applied only when a result is written out, so one entry serves both settings
+_WRITE_ONLY_OPTIONS = {'deterministic_output'}
+
+
+class ConversionCache:
+    """
+    On-disk cache of converted documents, safe to share between worker processes.
+    Layout: {root}/{key[:2]}/{key}/entry.json, markdown.md and the entry's images.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_size_mb: int = DEFAULT_MAX_SIZE_MB):
+        """
+        Initialize the cache.
+
+        Args:
+            root: Cache folder (default: ~/.markdown-converter/cache)
+            max_size_mb: Size bound enforced by evict()
+        """
+        self.root = Path(root) if root else DEFAULT_CACHE_DIR
+        self.max_size = max_size_mb * 1024 * 1024
+
+    @classmethod
+    def from_options(cls, ai_options) -> Optional['ConversionCache']:
+        """Cache configured by AIOptions, or None if caching is off."""
+        if not ai_options.cache_enabled:
+            return None
+        return cls(ai_options.cache_dir, ai_options.cache_max_mb)
+
+    def key_for(self, source_path: str, ai_options) -> str:
+        """Cache key of a source file converted with the given options."""
+        fingerprint = options_fingerprint(ai_options, exclude=_WRITE_ONLY_OPTIONS)
+        parts = f"{file_hash(source_path)}:{fingerprint}:{tool_version()}"
+        return hashlib.sha256(parts.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Returns:
+            Entry dict (markdown_path, ai_frontmatter, images, images_extracted,
+            images_described, images_path), or None on a miss.
+        """
+        entry_dir = self._entry_dir(key)
+        entry_file = entry_dir / ENTRY_FILE
+        try:
+            with open(entry_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(entry_file)
+        except (OSError, ValueError):
+            return None
+        entry['images_path'] = str(entry_dir / IMAGES_SUBDIR)
+        entry['markdown_path'] = str(entry_dir / MARKDOWN_FILE)
+        return entry
+
+    def put(
+        self,
+        key: str,
+        markdown: Iterable[str],
+        ai_frontmatter: str,
+        images_dir: Optional[Path],
+        images_extracted: int,
+        images_described: int
+    ):
+        """
+        Store a finished conversion. The entry is assembled in a temporary folder
+        and renamed into place, so concurrent workers never see half an entry.
+
+        Args:
+            key: Cache key from key_for()
+            markdown: Post-processed markdown with IMAGES_PLACEHOLDER links, in pieces
+            ai_frontmatter: AI summary frontmatter lines
+            images_dir: Folder holding the extracted images (None = no images)
+            images_extracted: Number of extracted images
+            images_described: Number of images described by AI
+        """
+        entry_dir = self._entry_dir(key)
+        if entry_dir.exists():
+            return
+
+        try:
+            entry_dir.parent.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(prefix=f".{key[:8]}-", dir=entry_dir.parent))
+            images: List[str] = []
+            if images_dir is not None and images_dir.is_dir():
+                shutil.copytree(images_dir, staging / IMAGES_SUBDIR)
+                images = sorted(os.listdir(staging / IMAGES_SUBDIR))
+
+            with open(staging / MARKDOWN_FILE, 'w', encoding='utf-8') as f:
+                f.writelines(markdown)
+
+            with open(staging / ENTRY_FILE, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'ai_frontmatter': ai_frontmatter,
+                    'images': images,
+                    'images_extracted': images_extracted,
+                    'images_described': images_described,
+                    'created': time.time(),
+                }, f, ensure_ascii=False)
+
+            try:
+                os.rename(staging, entry_dir)
+            except OSError:
+                # Another worker stored the same document first
+                shutil.rmtree(staging, ignore_errors=True)
+        except OSError as e:
+            logger.warning(f"Could not store cache entry {key[:12]}: {e}")
+
+    @staticmethod
+    def _size(entry_dir: Path) -> int:
+        size = 0
+        for dirpath, _, filenames in os.walk(entry_dir):
+            for name in filenames:
+                try:
+                    size += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return size
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits its size bound.
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.root.is_dir():
+            return 0
+
+        entries = []
+        for entry_file in self.root.glob(f"*/*/{ENTRY_FILE}"):
+            try:
+                last_used = entry_file.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((last_used, entry_file.parent, self._size(entry_file.parent)))
+
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for _, entry_dir, size in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"Cache eviction: removed {removed} entries")
+        return removed
@@ -0,0 +1,105 @@
+"""
+Chunk Delta Module
+Which RAG chunks a conversion added, removed or left unchanged, per file and
+per run, so downstream ingestion only embeds chunks that actually changed.
+Chunks are compared by their stable ids (chunker.ChunkIds).
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Dict, List
+
+from chunker import ChunkIds
+
+logger = logging.getLogger(__name__)
+
+DELTA_DIR_NAME = ".markdown-converter-deltas"
+
+
+def read_chunk_ids(jsonl_path: Path) -> List[str]:
+    """
+    Ids of the chunks in an existing .jsonl file, streamed line by line.
+    Files written before chunks had ids get the ids they would have now.
+
+    Returns:
+        Chunk ids in file order ([] if there is no such file)
+    """
+    ids = []
+    legacy = ChunkIds()
+    try:
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    continue
+                ids.append(chunk['id'] if 'id' in chunk else legacy.next(chunk))
+    except FileNotFoundError:
+        return []
+    except OSError as e:
+        logger.warning(f"Could not read previous chunks {jsonl_path}: {e}")
+    return ids
+
+
+def diff_chunk_ids(old_ids: List[str], new_ids: List[str]) -> Dict[str, List[str]]:
+    """Delta between a file's previous and new chunk ids (in document order)."""
+    old, new = set(old_ids), set(new_ids)
+    return {
+        'added': [i for i in new_ids if i not in old],
+        'removed': [i for i in old_ids if i not in new],
+        'unchanged': [i for i in new_ids if i in old],
+    }
+
+
+class RunDeltaLog:
+    """
+    Chunk delta of one run: {root}/.markdown-converter-deltas/{run_id}.jsonl with
+    one "file" record per converted or removed document and a closing "summary"
+    record. Nothing is written when the run touched no chunks.
+    """
+
+    def __init__(self, root: str, run_id: str):
+        """
+        Args:
+            root: Output root of the run (the manifest folder)
+            run_id: Run id (shared with the journal and the results store)
+        """
+        self.path = Path(root) / DELTA_DIR_NAME / f"{run_id}.jsonl"
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._file = None
+        self._totals = {'files': 0, 'added': 0, 'removed': 0, 'unchanged': 0}
+
+    def add(self, source_path: str, chunks_path: Optional[str], delta: Dict[str, List[str]]):
+        """Record the delta of one document."""
+        record = {'type': 'file', 'source': source_path, 'chunks': chunks_path, **delta}
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._totals['files'] += 1
+            for key in ('added', 'removed', 'unchanged'):
+                self._totals[key] += len(delta.get(key, []))
+
+    def add_removed(self, source_path: str, chunks_path: Path):
+        """Record a deleted document: every chunk of its .jsonl is removed."""
+        ids = read_chunk_ids(chunks_path)
+        if ids:
+            self.add(source_path, str(chunks_path), {'added': [], 'removed': ids, 'unchanged': []})
+
+    def close(self):
+        """Write the summary record."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps({'type': 'summary', 'run_id': self.run_id, **self._totals}) + "\n")
+            self._file.close()
+            self._file = None
+        logger.info(
+            f"Chunk delta {self.path}: {self._totals['added']} added, "
+            f"{self._totals['removed']} removed, {self._totals['unchanged']} unchanged"
+        )
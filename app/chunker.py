@@ -5,7 +5,41 @@ Optimized for RAG (Retrieval-Augmented Generation) ingestion.
 """
 
 import re
-from typing import List, Dict, Any
+import hashlib
+from typing import List, Dict, Any, Iterable, Iterator
+
+# Frontmatter line that changes on every run without the content changing
+_VOLATILE_FRONTMATTER = re.compile(r'^converted_at: .*\n?', re.MULTILINE)
+
+
+def _stable_content(content: str) -> str:
+    """Chunk content without the run timestamp of a leading frontmatter block."""
+    if not content.startswith('---\n'):
+        return content
+    end = content.find('\n---', 3)
+    if end < 0:
+        return content
+    return _VOLATILE_FRONTMATTER.sub('', content[:end]) + content[end:]
+
+
+class ChunkIds:
+    """
+    Stable, content-derived chunk ids for one file: a hash of the chunk's source,
+    header and content, suffixed with an occurrence number when identical chunks
+    repeat. Unchanged chunks keep their id when the document is reconverted.
+    """
+
+    def __init__(self):
+        self._seen: Dict[str, int] = {}
+
+    def next(self, chunk: Dict[str, Any]) -> str:
+        """Id of the next chunk of the file (call in document order)."""
+        text = f"{chunk.get('source', '')}\n{chunk.get('header', '')}\n{_stable_content(chunk.get('content', ''))}"
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        count = self._seen.get(digest, 0)
+        self._seen[digest] = count + 1
+        return digest if count == 0 else f"{digest}-{count}"
+
 
 class MarkdownChunker:
     """
@@ -32,10 +66,38 @@ class MarkdownChunker:
             source_file: Name of the source file (for metadata)
 
         Returns:
-            List of chunks (dicts with header, content, metadata)
+            List of chunks (dicts with id, header, content, metadata)
         """
-        lines = text.split('\n')
-        chunks = []
+        return list(self.iter_chunks(text.split('\n'), source_file))
+
+    def iter_chunks(self, lines: Iterable[str], source_file: str = "") -> Iterator[Dict[str, Any]]:
+        """
+        Chunk markdown given line by line, yielding each chunk as soon as the
+        next header closes it. Only the current chunk is held in memory, so a
+        document can be chunked while it is being written or read.
+
+        Args:
+            lines: Markdown lines without line breaks
+            source_file: Name of the source file (for metadata)
+
+        Yields:
+            Chunks (dicts with id, header, content, metadata) in document order
+        """
+        ids = ChunkIds()
+        first = True
+
+        def finish(chunk):
+            nonlocal first
+            # Join content and add
+            chunk["content"] = "\n".join(chunk["content"]).strip()
+            if not chunk["content"]:  # Only add if not empty
+                return None
+            # If first chunk has no header (preamble), label it
+            if first and not chunk["header"]:
+                chunk["header"] = "Preamble / Introduction"
+            first = False
+            return {"id": ids.next(chunk), **chunk}
+
         current_chunk = {
             "source": source_file,
             "header": "",
@@ -57,12 +119,11 @@ class MarkdownChunker:
                 # For now, simple logic: if level <= chunk_level, start new chunk
 
                 if level <= self.chunk_level:
-                    # Save current chunk if it has content
+                    # Emit current chunk if it has content
                     if current_chunk["content"]:
-                        # Join content and add
-                        current_chunk["content"] = "\n".join(current_chunk["content"]).strip()
-                        if current_chunk["content"]: # Only add if not empty
-                            chunks.append(current_chunk)
+                        chunk = finish(current_chunk)
+                        if chunk:
+                            yield chunk
 
                     # Start new chunk
                     current_chunk = {
@@ -78,14 +139,8 @@ class MarkdownChunker:
                 # Regular line
                 current_chunk["content"].append(line)
 
-        # Add last chunk
+        # Emit last chunk
         if current_chunk["content"]:
-            current_chunk["content"] = "\n".join(current_chunk["content"]).strip()
-            if current_chunk["content"]:
-                chunks.append(current_chunk)
-
-        # Post-processing: If first chunk has no header (preamble), label it
-        if chunks and not chunks[0]["header"]:
-            chunks[0]["header"] = "Preamble / Introduction"
-
-        return chunks
+            chunk = finish(current_chunk)
+            if chunk:
+                yield chunk
@@ -0,0 +1,275 @@
+"""
+Markdown Converter - Command Line
+Headless commands sharing the GUI's saved settings (~/.markdown-converter/config.json).
+
+    python cli.py watch <thư mục> [-o <thư mục output>]
+    python cli.py resume [<job id>]
+    python cli.py runs
+    python cli.py retry <run id>
+    python cli.py rechunk <thư mục output> [--chunk-level N]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+
+# Add app directory to path for imports BEFORE importing local modules
+app_dir = os.path.dirname(os.path.abspath(__file__))
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+from converter import MarkdownConverter, ConversionResult, AIOptions
+from batch_engine import BatchOptions
+from warm_pool import shutdown_warm_pool
+from config_manager import ConfigManager, AppConfig
+
+logger = logging.getLogger(__name__)
+
+
+def build_converter(config: AppConfig, workers: int = 0) -> MarkdownConverter:
+    """Converter configured like the GUI from the saved settings."""
+    converter = MarkdownConverter()
+    converter.set_ai_options(AIOptions(
+        extract_images=config.extract_images,
+        describe_images=config.describe_images,
+        chunk_enabled=config.chunk_enabled,
+        chunk_level=config.chunk_level,
+        excel_clean_enabled=config.excel_clean_enabled,
+        summary_enabled=config.summary_enabled,
+        ai_provider=config.ai_provider,
+        api_key=config.openai_key if config.ai_provider == "openai" else config.gemini_key,
+        ai_model=config.ai_model,
+        cache_enabled=config.cache_enabled,
+        cache_max_mb=config.cache_max_mb,
+        deterministic_output=config.deterministic_output
+    ))
+    converter.set_batch_options(BatchOptions(
+        max_workers=workers or config.max_workers or None,
+        incremental=True,
+        dedup=True,
+        journal=True,
+        results_store=True,
+        scan_index=True,
+        remove_orphans=config.remove_orphans
+    ))
+    return converter
+
+
+def print_result(current: int, total: int, result: ConversionResult):
+    """Progress callback printing one line per file."""
+    if result.skipped:
+        status = "BỎ QUA"
+    elif result.cancelled:
+        status = "ĐÃ HỦY"
+    elif result.success:
+        status = "OK"
+    else:
+        status = "LỖI"
+    line = f"[{current}/{total}] {status} {result.source_path}"
+    if result.error_message and not result.success:
+        line += f" - {result.error_message}"
+    print(line, flush=True)
+
+
+def cmd_watch(args, config: AppConfig) -> int:
+    from watcher import FolderWatcher, WatchOptions
+
+    if not os.path.isdir(args.folder):
+        print(f"Không tìm thấy thư mục: {args.folder}", file=sys.stderr)
+        return 2
+
+    watcher = FolderWatcher(
+        build_converter(config, args.workers),
+        args.folder,
+        output_dir=args.output,
+        options=WatchOptions(
+            recursive=not args.no_recursive,
+            max_depth=args.max_depth,
+            allowed_formats=args.formats,
+            debounce=args.debounce,
+            poll_interval=args.poll_interval,
+            use_polling=args.poll
+        ),
+        progress_callback=print_result
+    )
+    print(f"Đang theo dõi {args.folder} ({watcher.backend}), nhấn Ctrl+C để dừng", flush=True)
+    watcher.run_forever()
+    return 0
+
+
+def cmd_resume(args, config: AppConfig) -> int:
+    from journal import JobJournal
+
+    if not args.job_id:
+        jobs = JobJournal.list_jobs()
+        if not jobs:
+            print("Không có tác vụ nào đang dở")
+            return 0
+        for job in jobs:
+            created = time.strftime('%Y-%m-%d %H:%M', time.localtime(job.created))
+            print(f"{job.job_id}  {created}  {len(job.completed)}/{len(job.planned)} tệp xong, "
+                  f"{len(job.in_flight)} đang xử lý dở  -> {job.output_dir or '(cạnh tệp nguồn)'}")
+        return 0
+
+    if args.discard:
+        try:
+            JobJournal.open(args.job_id).discard()
+        except FileNotFoundError:
+            print(f"Không tìm thấy tác vụ: {args.job_id}", file=sys.stderr)
+            return 2
+        print(f"Đã xoá nhật ký tác vụ {args.job_id}")
+        return 0
+
+    converter = build_converter(config, args.workers)
+    try:
+        results = converter.resume_job(args.job_id, progress_callback=print_result)
+    except FileNotFoundError:
+        print(f"Không tìm thấy tác vụ: {args.job_id}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        converter.request_stop()
+        return 130
+    failed = sum(1 for r in results if not r.success)
+    print(f"Hoàn tất: {len(results) - failed} thành công, {failed} lỗi")
+    return 1 if failed else 0
+
+
+def cmd_runs(args, config: AppConfig) -> int:
+    from results_store import ResultsStore
+
+    store = ResultsStore()
+    try:
+        runs = store.list_runs(args.limit)
+    finally:
+        store.close()
+    if not runs:
+        print("Chưa có lần chạy nào")
+        return 0
+    for run in runs:
+        started = time.strftime('%Y-%m-%d %H:%M', time.localtime(run.started))
+        counts = ", ".join(f"{status}: {count}" for status, count in sorted(run.counts.items()))
+        retry = f"  (chạy lại {run.retry_of})" if run.retry_of else ""
+        print(f"{run.run_id}  {started}  {run.total} tệp  [{counts}]{retry}")
+    return 0
+
+
+def cmd_retry(args, config: AppConfig) -> int:
+    converter = build_converter(config, args.workers)
+    try:
+        results = converter.retry_failed(
+            args.run_id,
+            include_timeouts=not args.no_timeouts,
+            progress_callback=print_result
+        )
+    except KeyError:
+        print(f"Không tìm thấy lần chạy: {args.run_id}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        converter.request_stop()
+        return 130
+    if not results:
+        print("Không có tệp lỗi để chạy lại")
+        return 0
+    failed = sum(1 for r in results if not r.success)
+    print(f"Hoàn tất: {len(results) - failed} thành công, {failed} lỗi")
+    return 1 if failed else 0
+
+
+def cmd_rechunk(args, config: AppConfig) -> int:
+    from rechunk import rechunk_folder
+
+    if not os.path.isdir(args.folder):
+        print(f"Không tìm thấy thư mục: {args.folder}", file=sys.stderr)
+        return 2
+
+    converter = build_converter(config, args.workers)
+    ai_options = converter.ai_options
+    ai_options.chunk_enabled = True
+    if args.chunk_level:
+        ai_options.chunk_level = args.chunk_level
+
+    def report(current, total, result):
+        if result.skipped:
+            return
+        status = f"OK ({result.chunks} chunk)" if result.success else f"LỖI - {result.error_message}"
+        print(f"[{current}/{total}] {status} {result.markdown_path}", flush=True)
+
+    results = rechunk_folder(
+        args.folder,
+        ai_options,
+        recursive=not args.no_recursive,
+        workers=args.workers or config.max_workers or None,
+        progress_callback=report
+    )
+    done = sum(1 for r in results if r.success and not r.skipped)
+    failed = sum(1 for r in results if not r.success)
+    print(f"Hoàn tất: {done} tệp chia lại chunk, {failed} lỗi")
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="markdown-converter", description="Markdown Converter (dòng lệnh)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Ghi log chi tiết")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    watch = commands.add_parser("watch", help="Theo dõi thư mục và tự động chuyển đổi tệp mới hoặc đã sửa")
+    watch.add_argument("folder", help="Thư mục nguồn")
+    watch.add_argument("-o", "--output", help="Thư mục output (mặc định: cạnh tệp nguồn)")
+    watch.add_argument("--formats", nargs="+", metavar="FORMAT",
+                       help="Nhóm định dạng: " + ", ".join(MarkdownConverter.SUPPORTED_FORMATS))
+    watch.add_argument("--no-recursive", action="store_true", help="Không theo dõi thư mục con")
+    watch.add_argument("--max-depth", type=int, help="Độ sâu tối đa của thư mục con")
+    watch.add_argument("--debounce", type=float, default=2.0, help="Số giây chờ tệp ổn định trước khi chuyển đổi")
+    watch.add_argument("--poll", action="store_true", help="Quét định kỳ thay vì sự kiện hệ thống (ổ mạng)")
+    watch.add_argument("--poll-interval", type=float, default=2.0, help="Chu kỳ quét định kỳ (giây)")
+    watch.add_argument("--workers", type=int, default=0, help="Số tiến trình chuyển đổi (0 = theo cài đặt)")
+    watch.set_defaults(handler=cmd_watch)
+
+    resume = commands.add_parser("resume", help="Tiếp tục tác vụ bị gián đoạn (không có id: liệt kê tác vụ dở)")
+    resume.add_argument("job_id", nargs="?", help="Id tác vụ")
+    resume.add_argument("--discard", action="store_true", help="Xoá nhật ký tác vụ thay vì tiếp tục")
+    resume.add_argument("--workers", type=int, default=0, help="Số tiến trình chuyển đổi (0 = theo cài đặt)")
+    resume.set_defaults(handler=cmd_resume)
+
+    runs = commands.add_parser("runs", help="Liệt kê các lần chạy đã lưu và số tệp theo kết quả")
+    runs.add_argument("--limit", type=int, default=20, help="Số lần chạy gần nhất hiển thị")
+    runs.set_defaults(handler=cmd_runs)
+
+    retry = commands.add_parser("retry", help="Chỉ chạy lại các tệp bị lỗi/quá thời gian của một lần chạy")
+    retry.add_argument("run_id", help="Id lần chạy (xem lệnh runs)")
+    retry.add_argument("--no-timeouts", action="store_true", help="Không chạy lại tệp bị quá thời gian")
+    retry.add_argument("--workers", type=int, default=0, help="Số tiến trình chuyển đổi (0 = theo cài đặt)")
+    retry.set_defaults(handler=cmd_retry)
+
+    rechunk = commands.add_parser("rechunk", help="Tạo lại tệp chunk RAG (.jsonl) từ các tệp .md đã chuyển đổi")
+    rechunk.add_argument("folder", help="Thư mục chứa tệp .md đã chuyển đổi")
+    rechunk.add_argument("--chunk-level", type=int, choices=(1, 2, 3, 4, 5, 6),
+                         help="Chia chunk theo tiêu đề đến cấp này (mặc định: theo cài đặt)")
+    rechunk.add_argument("--no-recursive", action="store_true", help="Không xử lý thư mục con")
+    rechunk.add_argument("--workers", type=int, default=0, help="Số tiến trình (0 = theo cài đặt, 1 = không song song)")
+    rechunk.set_defaults(handler=cmd_rechunk)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    # Required for worker processes in PyInstaller builds
+    multiprocessing.freeze_support()
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    config = ConfigManager().load()
+    try:
+        return args.handler(args, config)
+    finally:
+        shutdown_warm_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
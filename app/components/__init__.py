@@ -8,6 +8,7 @@ from .progress_panel import ProgressPanel
 from .ai_options import AIOptions
 from .file_preview import FilePreview
 from .collapsible_frame import CollapsibleFrame
+from .run_history import RunHistory
 
 __all__ = [
     'FileSelector',
@@ -18,4 +19,5 @@ __all__ = [
     'AIOptions',
     'FilePreview',
     'CollapsibleFrame',
+    'RunHistory',
 ]
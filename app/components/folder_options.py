@@ -1,6 +1,6 @@
 """
 Folder Options Component
-Options for recursive folder processing.
+Options for recursive folder processing and cleanup of outputs of deleted sources.
 """
 
 import customtkinter as ctk
@@ -12,7 +12,7 @@ from locales import LABELS
 class FolderOptions(ctk.CTkFrame):
     """
     Component for folder conversion options.
-    Includes recursive checkbox and depth selection.
+    Includes recursive checkbox, depth selection and orphaned output removal.
     """
 
     def __init__(
@@ -76,6 +76,15 @@ class FolderOptions(ctk.CTkFrame):
         )
         self._depth_menu.pack(side="left")
 
+        # Remove outputs whose source was deleted (off by default: it deletes files)
+        self._remove_orphans_var = ctk.BooleanVar(value=False)
+        self._remove_orphans_cb = ctk.CTkCheckBox(
+            self,
+            text=LABELS['remove_orphans'],
+            variable=self._remove_orphans_var
+        )
+        self._remove_orphans_cb.pack(anchor="w", padx=10, pady=(0, 10))
+
     def _on_recursive_change(self):
         """Handle recursive checkbox change."""
         is_recursive = self._recursive_var.get()
@@ -110,10 +119,20 @@ class FolderOptions(ctk.CTkFrame):
             return 1
         return None  # All levels
 
+    @property
+    def remove_orphans(self) -> bool:
+        """Get whether outputs of deleted sources are removed."""
+        return self._remove_orphans_var.get()
+
+    def set_remove_orphans(self, value: bool):
+        """Set orphaned output removal checkbox state."""
+        self._remove_orphans_var.set(value)
+
     def set_enabled(self, enabled: bool):
         """Enable or disable the component."""
         state = "normal" if enabled else "disabled"
         self._recursive_cb.configure(state=state)
+        self._remove_orphans_cb.configure(state=state)
         if enabled and self._recursive_var.get():
             self._depth_menu.configure(state="normal")
         else:
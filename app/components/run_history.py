@@ -0,0 +1,202 @@
+"""
+Run History Component
+Lists unfinished batch jobs to resume and recent runs whose failed files can be retried.
+"""
+
+import time
+import customtkinter as ctk
+from typing import Callable, List, Optional
+
+from locales import LABELS
+
+
+class RunHistory(ctk.CTkFrame):
+    """
+    Component for the journaled jobs and the results store.
+    Shows unfinished jobs (resume/discard) and recent runs (retry failed files).
+    """
+
+    def __init__(
+        self,
+        master,
+        on_resume: Optional[Callable[[str], None]] = None,
+        on_discard: Optional[Callable[[str], None]] = None,
+        on_retry: Optional[Callable[[str], None]] = None,
+        on_refresh: Optional[Callable[[], None]] = None,
+        **kwargs
+    ):
+        """
+        Initialize RunHistory.
+
+        Args:
+            master: Parent widget
+            on_resume: Callback(job_id) to continue an unfinished job
+            on_discard: Callback(job_id) to delete an unfinished job's journal
+            on_retry: Callback(run_id) to re-run the failed files of a run
+            on_refresh: Callback to reload the lists
+        """
+        super().__init__(master, **kwargs)
+
+        self._on_resume = on_resume
+        self._on_discard = on_discard
+        self._on_retry = on_retry
+        self._on_refresh = on_refresh
+        self._job_widgets: list = []
+        self._run_widgets: list = []
+        self._buttons: list = []
+        self._enabled = True
+
+        self._create_widgets()
+
+    def _create_widgets(self):
+        """Create and layout widgets."""
+        # Header with refresh button
+        header_frame = ctk.CTkFrame(self, fg_color="transparent")
+        header_frame.pack(fill="x", padx=10, pady=(10, 5))
+
+        ctk.CTkLabel(
+            header_frame,
+            text=f"⏸ {LABELS['unfinished_jobs']}",
+            font=ctk.CTkFont(size=12, weight="bold")
+        ).pack(side="left")
+
+        ctk.CTkButton(
+            header_frame,
+            text=LABELS['refresh'],
+            command=self._refresh,
+            width=80,
+            height=24,
+            font=ctk.CTkFont(size=11),
+            fg_color="transparent",
+            border_width=1,
+            text_color=("gray10", "gray90")
+        ).pack(side="right")
+
+        self._job_list = ctk.CTkFrame(self, fg_color=("gray95", "gray17"))
+        self._job_list.pack(fill="x", padx=10, pady=(5, 10))
+        self._job_placeholder = ctk.CTkLabel(
+            self._job_list,
+            text=LABELS['no_unfinished_jobs'],
+            text_color="gray"
+        )
+        self._job_placeholder.pack(pady=10)
+
+        ctk.CTkLabel(
+            self,
+            text=f"🕘 {LABELS['recent_runs']}",
+            font=ctk.CTkFont(size=12, weight="bold")
+        ).pack(anchor="w", padx=10, pady=(5, 5))
+
+        self._run_list = ctk.CTkScrollableFrame(
+            self,
+            height=150,
+            fg_color=("gray95", "gray17")
+        )
+        self._run_list.pack(fill="both", expand=True, padx=10, pady=(5, 10))
+        self._run_placeholder = ctk.CTkLabel(
+            self._run_list,
+            text=LABELS['no_runs'],
+            text_color="gray"
+        )
+        self._run_placeholder.pack(pady=10)
+
+    def set_jobs(self, jobs: List):
+        """
+        Show the unfinished jobs.
+
+        Args:
+            jobs: JobState list from JobJournal.list_jobs()
+        """
+        for widget in self._job_widgets:
+            widget.destroy()
+        self._job_widgets.clear()
+        self._buttons = [button for button in self._buttons if button.winfo_exists()]
+
+        if not jobs:
+            self._job_placeholder.pack(pady=10)
+            return
+        self._job_placeholder.pack_forget()
+
+        for job in reversed(jobs):  # newest first
+            text = LABELS['job_summary'].format(
+                created=time.strftime('%Y-%m-%d %H:%M', time.localtime(job.created)),
+                completed=len(job.completed),
+                planned=len(job.planned)
+            )
+            frame = self._add_row(self._job_list, text, job.output_dir)
+            self._add_button(frame, LABELS['discard'], lambda job_id=job.job_id: self._on_discard and self._on_discard(job_id))
+            self._add_button(frame, LABELS['resume'], lambda job_id=job.job_id: self._on_resume and self._on_resume(job_id))
+            self._job_widgets.append(frame)
+
+    def set_runs(self, runs: List):
+        """
+        Show the recent runs.
+
+        Args:
+            runs: RunSummary list from ResultsStore.list_runs()
+        """
+        for widget in self._run_widgets:
+            widget.destroy()
+        self._run_widgets.clear()
+        self._buttons = [button for button in self._buttons if button.winfo_exists()]
+
+        if not runs:
+            self._run_placeholder.pack(pady=10)
+            return
+        self._run_placeholder.pack_forget()
+
+        for run in runs:
+            failed = run.counts.get('failed', 0) + run.counts.get('timeout', 0)
+            text = LABELS['run_summary'].format(
+                started=time.strftime('%Y-%m-%d %H:%M', time.localtime(run.started)),
+                total=run.total,
+                success=run.counts.get('success', 0),
+                failed=failed
+            )
+            frame = self._add_row(self._run_list, text, run.source_root or run.output_dir)
+            if failed:
+                self._add_button(frame, LABELS['retry_failed'], lambda run_id=run.run_id: self._on_retry and self._on_retry(run_id))
+            self._run_widgets.append(frame)
+
+    def set_enabled(self, enabled: bool):
+        """Enable/disable the resume, discard and retry buttons (e.g. while converting)."""
+        self._enabled = enabled
+        for button in self._buttons:
+            button.configure(state="normal" if enabled else "disabled")
+
+    def _add_row(self, master, text: str, detail: Optional[str]) -> ctk.CTkFrame:
+        """Add a row with a summary line and an optional grey detail line."""
+        frame = ctk.CTkFrame(master, fg_color="transparent")
+        frame.pack(fill="x", padx=5, pady=2)
+
+        labels = ctk.CTkFrame(frame, fg_color="transparent")
+        labels.pack(side="left", fill="x", expand=True)
+        ctk.CTkLabel(labels, text=text, font=ctk.CTkFont(size=11), anchor="w").pack(fill="x")
+        if detail:
+            ctk.CTkLabel(
+                labels,
+                text=detail,
+                font=ctk.CTkFont(size=10),
+                text_color="gray",
+                anchor="w"
+            ).pack(fill="x")
+        return frame
+
+    def _add_button(self, frame: ctk.CTkFrame, text: str, command: Callable[[], None]):
+        """Add a small action button at the right of a row."""
+        button = ctk.CTkButton(
+            frame,
+            text=text,
+            command=command,
+            width=90,
+            height=24,
+            font=ctk.CTkFont(size=11),
+            state="normal" if self._enabled else "disabled"
+        )
+        button.pack(side="right", padx=(5, 0))
+        self._buttons.append(button)
+
+    def _refresh(self):
+        """Handle refresh button."""
+        if self._on_refresh:
+            self._on_refresh()
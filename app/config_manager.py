@@ -25,9 +25,22 @@ class AppConfig:
     use_custom_output: bool = False
     custom_output_path: str = ""
     overwrite_existing: bool = False
+    # Folder conversions: delete outputs whose source file was deleted
+    remove_orphans: bool = False
+
+    # Parallel conversion (0 = one worker per CPU core)
+    max_workers: int = 0
+
+    # Cache of finished conversions (~/.markdown-converter/cache)
+    cache_enabled: bool = True
+    cache_max_mb: int = 2048
+
+    # Byte-identical output for unchanged sources (no converted_at in the frontmatter)
+    deterministic_output: bool = False
 
     # RAG & AI Options
     chunk_enabled: bool = False
+    chunk_level: int = 2
     excel_clean_enabled: bool = False
     extract_images: bool = False
     describe_images: bool = False
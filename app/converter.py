@@ -5,10 +5,14 @@ Supports image extraction and AI description.
 """
 
 import os
+import time
+import shutil
+import filecmp
+import itertools
 import logging
 from pathlib import Path
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Set, Callable
+from dataclasses import dataclass, field, fields
+from typing import List, Optional, Dict, Set, Callable, Union, Iterator
 from markitdown import MarkItDown
 from datetime import datetime
 import json
@@ -16,11 +20,23 @@ import text_processor
 import ai_helper
 import chunker
 import excel_cleaner
+import pdf_pages
+import excel_sheets
+from worker_pool import can_fan_out, TaskCancelled, WorkerTimeout
+from cache import ConversionCache, IMAGES_PLACEHOLDER
+from manifest import MANIFEST_NAME
+from scan_index import ScanIndex
+from chunk_delta import read_chunk_ids, diff_chunk_ids
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pages between progress log lines of a page-by-page PDF conversion
+PAGE_LOG_INTERVAL = 100
+
+# Start and end of a long document given to the AI summary (as kept by AIService.summarize_text)
+SUMMARY_HEAD_CHARS = 8000
+SUMMARY_TAIL_CHARS = 2000
+
 
 @dataclass
 class AIOptions:
@@ -30,6 +46,8 @@ class AIOptions:
 
     # RAG & Summarization
     chunk_enabled: bool = False
+    # Split chunks at headers up to this level (1 = H1 only, 2 = H1 and H2)
+    chunk_level: int = 2
     excel_clean_enabled: bool = False
     summary_enabled: bool = False
 
@@ -38,6 +56,27 @@ class AIOptions:
     ai_model: Optional[str] = None
     images_subdir: str = "images"
 
+    # Large PDFs: convert page ranges in parallel (0 = always serial)
+    pdf_split_min_pages: int = 200
+    pdf_pages_per_range: int = 50
+    # Very large PDFs: convert page by page into a spool file in bounded memory,
+    # instead of holding the whole text (takes precedence over splitting; 0 = off)
+    pdf_stream_min_pages: int = 2000
+
+    # Large workbooks: convert sheets in parallel (0 = always serial)
+    excel_split_min_sheets: int = 4
+    excel_split_min_size_mb: float = 2.0
+
+    # Content-addressed cache of finished conversions (None = ~/.markdown-converter/cache).
+    # Off for library use; the app and the CLI turn it on from the saved settings.
+    cache_enabled: bool = False
+    cache_dir: Optional[str] = None
+    cache_max_mb: int = 2048
+
+    # Leave run metadata (converted_at) out of the output so an unchanged source always
+    # produces the same bytes, and keep identical files untouched; the time goes to the manifest
+    deterministic_output: bool = False
+
 
 @dataclass
 class ConversionResult:
@@ -49,6 +88,89 @@ class ConversionResult:
     skipped: bool = False
     images_extracted: int = 0
     images_described: int = 0
+    duration: float = 0.0  # Wall-clock seconds spent in convert_file
+    timed_out: bool = False  # Killed by the batch engine's per-file timeout
+    cancelled: bool = False  # Interrupted by a stop request
+    duplicate_of: Optional[str] = None  # Identical source whose conversion was reused
+    # RAG chunk ids added / removed / unchanged versus the previous .jsonl (None = not chunked)
+    chunk_delta: Optional[Dict[str, List[str]]] = None
+
+    @property
+    def status(self) -> str:
+        """One word outcome: success, skipped, failed, timeout or cancelled."""
+        if self.cancelled:
+            return 'cancelled'
+        if self.timed_out:
+            return 'timeout'
+        if self.skipped:
+            return 'skipped'
+        return 'success' if self.success else 'failed'
+
+
+def partial_path(path: Path) -> Path:
+    """Temporary sibling an output is written to before it is moved into place."""
+    return path.with_name(path.name + ".part")
+
+
+def spool_path(output_path: Path, stage: str) -> Path:
+    """Temporary file a stage spools a document body to (removed with the partial output)."""
+    return partial_path(output_path.with_suffix(f'.{stage}'))
+
+
+def replace_if_changed(staged: Path, target: Path) -> bool:
+    """
+    Move a staged file into place unless the target already holds the same bytes,
+    in which case the target (and its mtime) is left alone.
+
+    Returns:
+        True if the target was replaced
+    """
+    if target.is_file() and filecmp.cmp(staged, target, shallow=False):
+        staged.unlink()
+        return False
+    os.replace(staged, target)
+    return True
+
+
+def sync_dir(staged: Path, target: Path):
+    """Move a staged folder's files into target, keeping identical files and dropping stale ones."""
+    target.mkdir(parents=True, exist_ok=True)
+    staged_names = set(os.listdir(staged))
+    for name in staged_names:
+        replace_if_changed(staged / name, target / name)
+    for name in os.listdir(target):
+        if name not in staged_names and (target / name).is_file():
+            (target / name).unlink()
+    shutil.rmtree(staged, ignore_errors=True)
+
+
+@dataclass
+class ConversionJob:
+    """State of one file while it moves through the conversion stages."""
+    source_path: str
+    output_base: Path
+    output_path: Path
+    started: float = 0.0
+    # Parsed document as one string (what the parse stage produces)
+    markdown: str = ""
+    # Image section, written after the body
+    images_md: str = ""
+    # Body after the text stage: cleaned blocks ending on line breaks (None = not cleaned)
+    segments: Optional[List[str]] = None
+    # Body spooled to disk instead (page-by-page PDFs); replaces markdown and segments
+    body_path: Optional[str] = None
+    ai_frontmatter: str = ""
+    images_extracted: int = 0
+    images_described: int = 0
+    cache_key: Optional[str] = None
+    from_cache: bool = False
+    # A stage fell back after an error; the result is written but not cached
+    degraded: bool = False
+    chunk_delta: Optional[Dict[str, List[str]]] = None
+    # Page (PDF) or sheet (xlsx) count when already known, so the source is not reopened
+    units: Optional[int] = None
+    # time.monotonic() limit for the parts of a split document (None = unlimited)
+    deadline: Optional[float] = None
 
 
 class MarkdownConverter:
@@ -67,19 +189,77 @@ class MarkdownConverter:
         'Text': ['.csv', '.json', '.xml', '.txt'],
     }
 
+    # Relative conversion cost per byte for each format category (used by the batch scheduler)
+    FORMAT_COST_FACTORS: Dict[str, float] = {
+        'PDF': 4.0,
+        'Word': 1.5,
+        'PowerPoint': 2.0,
+        'Excel': 3.0,
+        'Images': 0.2,
+        'Text': 0.5,
+    }
+
+    # Initial peak memory per source byte for each format category (refined by batch admission control)
+    FORMAT_MEMORY_FACTORS: Dict[str, float] = {
+        'PDF': 6.0,
+        'Word': 4.0,
+        'PowerPoint': 4.0,
+        'Excel': 10.0,
+        'Images': 2.0,
+        'Text': 3.0,
+    }
+
     # Formats that support image extraction
     IMAGE_EXTRACTABLE_FORMATS = {'.pdf', '.docx', '.doc', '.pptx', '.ppt'}
 
+    # Conversion stages in order: parse -> images -> text cleanup -> AI summary -> write
+    STAGES = ('parse', 'images', 'text', 'ai', 'write')
+
     def __init__(self):
         """Initialize the converter with markitdown instance."""
         self._md = MarkItDown(enable_plugins=False)
         self._stop_requested = False
         self._ai_options = AIOptions()
+        self._batch_options = None
+        self._page_callback: Optional[Callable[[str, int, int], None]] = None
+        self._scan_indexes: Dict[str, ScanIndex] = {}
 
     def set_ai_options(self, options: AIOptions):
         """Set AI handling options."""
         self._ai_options = options
 
+    def set_batch_options(self, options):
+        """Set parallel batch options (batch_engine.BatchOptions)."""
+        self._batch_options = options
+
+    def set_page_callback(self, callback: Optional[Callable[[str, int, int], None]]):
+        """
+        Set a callback(source_path, pages_done, page_count) for page-by-page PDF
+        conversions. Conversions in warm workers report their pages back through
+        the pool (see forward_page_progress).
+        """
+        self._page_callback = callback
+
+    def forward_page_progress(self, source_path: str, pages_done: int, page_count: int):
+        """Page progress reported by a worker process: passed on to the page callback."""
+        if self._page_callback:
+            self._page_callback(source_path, pages_done, page_count)
+
+    @property
+    def ai_options(self) -> AIOptions:
+        """Current AI handling options."""
+        return self._ai_options
+
+    @property
+    def batch_options(self):
+        """Current batch options (None = batch_engine defaults)."""
+        return self._batch_options
+
+    @property
+    def stop_requested(self) -> bool:
+        """Whether a stop of the ongoing batch has been requested."""
+        return self._stop_requested
+
     @classmethod
     def get_all_extensions(cls) -> Set[str]:
         """Get all supported file extensions."""
@@ -97,6 +277,77 @@ class MarkdownConverter:
                 extensions.update(cls.SUPPORTED_FORMATS[name])
         return extensions
 
+    @classmethod
+    def get_format_for_extension(cls, extension: str) -> Optional[str]:
+        """Get the format category name for a file extension (e.g. '.pdf' -> 'PDF')."""
+        extension = extension.lower()
+        for name, ext_list in cls.SUPPORTED_FORMATS.items():
+            if extension in ext_list:
+                return name
+        return None
+
+    def should_split(self, source_path: str, units: Optional[int] = None) -> bool:
+        """
+        Whether a document is converted in parallel parts (PDF page ranges,
+        Excel sheets) fanned out from this process to the warm pool.
+
+        Args:
+            source_path: Path to the document
+            units: Page or sheet count if already known (counted from the file otherwise)
+        """
+        if not can_fan_out():
+            return False
+        ext = Path(source_path).suffix.lower()
+        if ext == '.pdf':
+            if not pdf_pages.can_split():
+                return False
+            if units is None:
+                units = pdf_pages.count_pages(source_path)
+            if self.should_stream(source_path, units):
+                return False
+            threshold = self._ai_options.pdf_split_min_pages
+            return threshold > 0 and units >= threshold
+        if ext == '.xlsx':
+            threshold = self._ai_options.excel_split_min_sheets
+            if threshold <= 0:
+                return False
+            try:
+                size = os.path.getsize(source_path)
+            except OSError:
+                return False
+            if size < self._ai_options.excel_split_min_size_mb * 1024 * 1024:
+                return False
+            if units is None:
+                units = len(excel_sheets.sheet_names(source_path))
+            return units >= threshold
+        return False
+
+    def should_stream(self, source_path: str, units: Optional[int] = None) -> bool:
+        """Whether a PDF is converted page by page into a spool file (bounded memory)."""
+        threshold = self._ai_options.pdf_stream_min_pages
+        if threshold <= 0 or Path(source_path).suffix.lower() != '.pdf' or not pdf_pages.can_split():
+            return False
+        if units is None:
+            units = pdf_pages.count_pages(source_path)
+        return units >= threshold
+
+    def _pdf_page_ranges(self, job: ConversionJob):
+        """Page ranges of a job's PDF."""
+        return pdf_pages.page_ranges(self._job_units(job), self._ai_options.pdf_pages_per_range)
+
+    @staticmethod
+    def _job_units(job: ConversionJob) -> Optional[int]:
+        """Page count of a job's PDF, counted on first use and kept on the job (None for other formats)."""
+        if job.units is None and Path(job.source_path).suffix.lower() == '.pdf':
+            job.units = pdf_pages.count_pages(job.source_path)
+        return job.units
+
+    @staticmethod
+    def _fan_out_pool():
+        """The warm pool that parts of split documents run on."""
+        from warm_pool import running_warm_pool
+        return running_warm_pool(os.cpu_count() or 1)
+
     def request_stop(self):
         """Request to stop ongoing batch conversion."""
         self._stop_requested = True
@@ -105,14 +356,63 @@ class MarkdownConverter:
         """Reset stop flag for new conversion."""
         self._stop_requested = False
 
+    def _check_stop(self):
+        """Cancellation checkpoint between stages."""
+        if self._stop_requested:
+            raise TaskCancelled("Task cancelled")
+
+    @staticmethod
+    def _check_deadline(job: ConversionJob):
+        """Timeout checkpoint between stages (the parts of split documents also stop at the deadline)."""
+        if job.deadline is not None and time.monotonic() > job.deadline:
+            raise WorkerTimeout("Deadline passed")
+
+    @staticmethod
+    def output_path_for(source_path: str, output_dir: Optional[str] = None) -> Path:
+        """Markdown path a source file converts to."""
+        source = Path(source_path)
+        output_base = Path(output_dir) if output_dir else source.parent
+        return output_base / f"{source.name}.md"
+
+    @staticmethod
+    def _images_dir(output_base: Path, source_name: str) -> Path:
+        return output_base / f"{source_name}_images"
+
+    def discard_partial_output(self, source_path: str, output_dir: Optional[str] = None):
+        """
+        Remove what an interrupted conversion left behind (.part files, staged
+        images, the cleaned Excel copy). Finished outputs are never touched.
+        """
+        source = Path(source_path)
+        output_path = self.output_path_for(source_path, output_dir)
+        leftovers = [
+            partial_path(output_path),
+            partial_path(output_path.with_suffix('.jsonl')),
+            spool_path(output_path, 'body'),
+            spool_path(output_path, 'text'),
+            source.parent / f"cleaned_{source.name}",
+        ]
+        for path in leftovers:
+            try:
+                if path.is_file():
+                    path.unlink()
+            except OSError as e:
+                logger.debug(f"Could not remove {path}: {e}")
+
+        staged_images = partial_path(self._images_dir(output_path.parent, source.name))
+        if staged_images.is_dir():
+            shutil.rmtree(staged_images, ignore_errors=True)
+
     def _process_images(
         self,
         source_path: str,
         output_dir: Path,
-        base_name: str
+        base_name: str,
+        job: ConversionJob
     ) -> tuple:
         """
         Extract and optionally describe images from a document.
+        `job` carries the known page count and the deadline of split PDFs.
 
         Returns:
             Tuple of (markdown_text, images_extracted, images_described)
@@ -127,18 +427,28 @@ class MarkdownConverter:
         if ext not in self.IMAGE_EXTRACTABLE_FORMATS:
             return "", 0, 0
 
-        # Extract images
-        images = ImageExtractor.extract_images(source_path)
+        should_stop = lambda: self._stop_requested
+
+        # Extract images straight to the per-file folder {base_name}_images/
+        # (staged next to it until the markdown is written); only metadata stays in memory.
+        # Large PDFs: on the same page ranges as the text, in parallel
+        images_dir = self._images_dir(output_dir, base_name)
+        staged_images = str(partial_path(images_dir))
+        if ext == '.pdf' and self.should_split(source_path, self._job_units(job)):
+            images = pdf_pages.extract_images_parallel(
+                source_path, self._pdf_page_ranges(job), self._fan_out_pool(),
+                staged_images, should_stop, job.deadline
+            )
+        else:
+            images = ImageExtractor.spill_images(
+                ImageExtractor.extract_images(source_path, should_stop), staged_images
+            )
         if not images:
             return "", 0, 0
 
         images_extracted = len(images)
         images_described = 0
 
-        # Save images to per-file folder: {base_name}_images/
-        images_dir = output_dir / f"{base_name}_images"
-        ImageExtractor.save_images(images, str(images_dir), base_name)
-
         # Describe images with AI if enabled
         if self._ai_options.describe_images and self._ai_options.api_key:
             try:
@@ -162,7 +472,7 @@ class MarkdownConverter:
                     api_key=self._ai_options.api_key,
                     model=self._ai_options.ai_model
                 )
-                images = describer.describe_images(images)
+                images = describer.describe_images(images, should_stop=should_stop)
                 images_described = sum(1 for img in images if img.description)
             except Exception as e:
                 logger.error(f"Failed to describe images: {e}")
@@ -181,7 +491,9 @@ class MarkdownConverter:
         self,
         source_path: str,
         output_dir: Optional[str] = None,
-        overwrite: bool = False
+        overwrite: bool = False,
+        units: Optional[int] = None,
+        timeout: Optional[float] = None
     ) -> ConversionResult:
         """
         Convert a single file to Markdown.
@@ -190,10 +502,42 @@ class MarkdownConverter:
             source_path: Path to the source file
             output_dir: Optional output directory. If None, outputs to same directory as source.
             overwrite: If True, overwrite existing .md files. If False, skip.
+            units: Page or sheet count if already known (e.g. by the batch scheduler)
+            timeout: Optional wall-clock limit in seconds, checked between stages
+                and enforced on the parts of split documents
 
         Returns:
             ConversionResult with success status and output path
         """
+        job = self.prepare_job(source_path, output_dir, overwrite)
+        if isinstance(job, ConversionResult):
+            return job
+        job.units = units
+        if timeout:
+            job.deadline = job.started + timeout
+
+        try:
+            for stage in self.STAGES:
+                self._check_stop()
+                self._check_deadline(job)
+                self.run_stage(stage, job)
+            return self.finish_job(job)
+        except Exception as e:
+            return self.fail_job(job, e)
+
+    def prepare_job(
+        self,
+        source_path: str,
+        output_dir: Optional[str] = None,
+        overwrite: bool = False
+    ) -> Union[ConversionJob, ConversionResult]:
+        """
+        Validate a source file and resolve its output path.
+
+        Returns:
+            ConversionJob ready for the stages, or a ConversionResult if the
+            file is missing, invalid or skipped
+        """
         source = Path(source_path)
 
         # Validate source file
@@ -214,12 +558,7 @@ class MarkdownConverter:
             )
 
         # Determine output path
-        if output_dir:
-            output_base = Path(output_dir)
-        else:
-            output_base = source.parent
-
-        output_path = output_base / f"{source.name}.md"
+        output_path = self.output_path_for(source_path, output_dir)
 
         # Check if file exists and skip if not overwriting
         if output_path.exists() and not overwrite:
@@ -231,134 +570,368 @@ class MarkdownConverter:
                 error_message="File đã tồn tại, bỏ qua"
             )
 
-        try:
-            # Ensure output directory exists
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+        return ConversionJob(
+            source_path=source_path,
+            output_base=output_path.parent,
+            output_path=output_path,
+            started=time.monotonic()
+        )
 
-            # Excel Cleaning (Option A)
-            actual_source = source
-            temp_cleaned_file = None
-            if self._ai_options.excel_clean_enabled and source.suffix.lower() in ['.xlsx', '.xls']:
-                try:
-                    cleaned = excel_cleaner.clean_excel_file(str(source))
-                    if cleaned:
-                        temp_cleaned_file = cleaned
-                        actual_source = Path(cleaned)
-                except Exception as e:
-                    logger.warning(f"Excel cleaning failed, using original: {e}")
+    def run_stage(self, stage: str, job: ConversionJob):
+        """Run one of STAGES on a job. Failures that should fail the file are raised."""
+        getattr(self, f"_stage_{stage}")(job)
+
+    def finish_job(self, job: ConversionJob) -> ConversionResult:
+        """Build the success result for a job that went through every stage."""
+        logger.info(f"Converted: {job.source_path} -> {job.output_path}")
+        return ConversionResult(
+            source_path=job.source_path,
+            output_path=str(job.output_path),
+            success=True,
+            images_extracted=job.images_extracted,
+            images_described=job.images_described,
+            duration=time.monotonic() - job.started,
+            chunk_delta=job.chunk_delta
+        )
+
+    def fail_job(self, job: ConversionJob, error: Exception) -> ConversionResult:
+        """Build the failure result for a job whose stage raised, removing its partial output."""
+        self.discard_partial_output(job.source_path, str(job.output_base))
+
+        if isinstance(error, TaskCancelled):
+            message = "Đã hủy"
+        elif isinstance(error, PermissionError):
+            message = "Không có quyền truy cập"
+        elif isinstance(error, TimeoutError):
+            message = f"Quá thời gian chuyển đổi ({error})"
+        else:
+            logger.error(f"Conversion failed for {job.source_path}: {error}")
+            message = str(error)
+
+        return ConversionResult(
+            source_path=job.source_path,
+            output_path=None,
+            success=False,
+            error_message=message,
+            duration=time.monotonic() - job.started,
+            timed_out=isinstance(error, TimeoutError),
+            cancelled=isinstance(error, TaskCancelled)
+        )
 
+    def _stage_parse(self, job: ConversionJob):
+        """Parse the source document to markdown (CPU-bound)."""
+        source = Path(job.source_path)
+
+        # Ensure output directory exists
+        job.output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        cache = ConversionCache.from_options(self._ai_options)
+        if cache is not None:
             try:
+                job.cache_key = cache.key_for(job.source_path, self._ai_options)
+            except OSError as e:
+                logger.debug(f"Could not hash {job.source_path} for the cache: {e}")
+            if job.cache_key and self._restore_from_cache(cache, job):
+                return
+
+        if source.suffix.lower() == '.xlsx' and self.should_split(str(source), job.units):
+            # Large workbook: sheets cleaned and rendered in parallel, assembled in sheet order
+            job.markdown = excel_sheets.convert_excel_parallel(
+                str(source),
+                excel_sheets.sheet_names(str(source)),
+                self._ai_options.excel_clean_enabled,
+                self._fan_out_pool(),
+                should_stop=lambda: self._stop_requested,
+                deadline=job.deadline
+            )
+            return
+
+        # Excel Cleaning (Option A)
+        actual_source = source
+        temp_cleaned_file = None
+        if self._ai_options.excel_clean_enabled and source.suffix.lower() in ['.xlsx', '.xls']:
+            try:
+                cleaned = excel_cleaner.clean_excel_file(
+                    str(source), should_stop=lambda: self._stop_requested
+                )
+                if cleaned:
+                    temp_cleaned_file = cleaned
+                    actual_source = Path(cleaned)
+            except Exception as e:
+                logger.warning(f"Excel cleaning failed, using original: {e}")
+
+        try:
+            # Cleaning returns None when cancelled: do not go on with the raw workbook
+            self._check_stop()
+            if self.should_stream(str(actual_source), self._job_units(job)):
+                # Huge PDF: pages go to a spool file one at a time
+                job.body_path = str(spool_path(job.output_path, 'body'))
+                pdf_pages.convert_pdf_streaming(
+                    str(actual_source),
+                    job.body_path,
+                    on_page=lambda done, total: self._report_pages(job.source_path, done, total),
+                    should_stop=lambda: self._stop_requested
+                )
+            elif actual_source.suffix.lower() == '.pdf' and self.should_split(str(actual_source), job.units):
+                # Large PDF: page ranges in parallel, stitched in page order
+                job.markdown = pdf_pages.convert_pdf_parallel(
+                    str(actual_source),
+                    self._pdf_page_ranges(job),
+                    self._fan_out_pool(),
+                    should_stop=lambda: self._stop_requested,
+                    deadline=job.deadline
+                )
+            else:
                 # Convert using markitdown
                 result = self._md.convert(str(actual_source))
-                markdown_content = result.text_content
-            finally:
-                # Cleanup temp file
-                if temp_cleaned_file and os.path.exists(temp_cleaned_file):
-                    try:
-                        os.remove(temp_cleaned_file)
-                    except OSError:
-                        pass
-
-            # Process images if enabled
-            images_extracted = 0
-            images_described = 0
-
-            # Process images if enabled
-            images_extracted = 0
-            images_described = 0
-
-            if self._ai_options.extract_images:
+                job.markdown = result.text_content
+        finally:
+            # Cleanup temp file
+            if temp_cleaned_file and os.path.exists(temp_cleaned_file):
                 try:
-                    images_md, images_extracted, images_described = self._process_images(
-                        str(source),
-                        output_base,
-                        source.name
-                    )
-                    if images_md:
-                        markdown_content += images_md
-                except Exception as e:
-                    logger.warning(f"Image processing failed: {e}")
-
-            # Optimize for Japanese RAG
-            try:
-                # Clean text (remove spaces between JP chars)
-                markdown_content = text_processor.clean_japanese_text(markdown_content)
-                markdown_content = text_processor.normalize_width(markdown_content)
-
-                # AI Enrichment (Summary & Keywords)
-                ai_frontmatter = ""
-                if self._ai_options.summary_enabled and self._ai_options.api_key:
-                    try:
-                        ai_service = ai_helper.AIService(
-                            provider=self._ai_options.ai_provider,
-                            api_key=self._ai_options.api_key,
-                            model=self._ai_options.ai_model
-                        )
-                        summary_yaml = ai_service.summarize_text(markdown_content)
-                        if summary_yaml:
-                            ai_frontmatter = summary_yaml + "\n"
-                    except Exception as e:
-                        logger.warning(f"AI Summary failed: {e}")
-
-                # Add RAG Metadata (Frontmatter)
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                frontmatter = f"---\nsource_file: {source.name}\nconverted_at: {timestamp}\n{ai_frontmatter}---\n\n"
-                markdown_content = frontmatter + markdown_content
-
-                # RAG Chunking
-                if self._ai_options.chunk_enabled:
-                    try:
-                        rag_chunker = chunker.MarkdownChunker()
-                        chunks = rag_chunker.chunk_text(markdown_content, source.name)
-
-                        # Save .jsonl
-                        jsonl_path = output_path.with_suffix('.jsonl')
-                        with open(jsonl_path, 'w', encoding='utf-8') as f:
-                            for chunk in chunks:
-                                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
-                        logger.info(f"Created RAG chunks: {jsonl_path}")
-                    except Exception as e:
-                        logger.warning(f"Chunking failed: {e}")
-
-            except Exception as e:
-                logger.warning(f"Text optimization failed: {e}")
+                    os.remove(temp_cleaned_file)
+                except OSError:
+                    pass
+
+    def _report_pages(self, source_path: str, pages_done: int, page_count: int):
+        """Progress of a page-by-page conversion."""
+        if pages_done % PAGE_LOG_INTERVAL == 0 or pages_done == page_count:
+            logger.info(f"{Path(source_path).name}: page {pages_done}/{page_count}")
+        if self._page_callback:
+            self._page_callback(source_path, pages_done, page_count)
+
+    def _restore_from_cache(self, cache: ConversionCache, job: ConversionJob) -> bool:
+        """Fill a job from a cache hit (markdown, AI frontmatter, staged images)."""
+        entry = cache.get(job.cache_key)
+        if entry is None:
+            return False
+
+        source_name = Path(job.source_path).name
+        if entry['images']:
+            staged_images = partial_path(self._images_dir(job.output_base, source_name))
+            if staged_images.exists():
+                shutil.rmtree(staged_images)
+            shutil.copytree(entry['images_path'], staged_images)
+
+        link_prefix = self._images_link_prefix(source_name)
+        blocks = text_processor.file_line_blocks(entry['markdown_path'])
+        # The placeholder holds no line break, so it never straddles two blocks
+        job.segments = [block.replace(IMAGES_PLACEHOLDER, link_prefix) for block in blocks]
+        job.ai_frontmatter = entry['ai_frontmatter']
+        job.images_extracted = entry['images_extracted']
+        job.images_described = entry['images_described']
+        job.from_cache = True
+        logger.info(f"Cache hit: {job.source_path}")
+        return True
+
+    def _store_in_cache(self, job: ConversionJob):
+        """Store a freshly converted job (before its staged images are moved into place)."""
+        cache = ConversionCache.from_options(self._ai_options)
+        if cache is None or not job.cache_key or job.from_cache or job.degraded:
+            return
+
+        source_name = Path(job.source_path).name
+        link_prefix = self._images_link_prefix(source_name)
+        staged_images = partial_path(self._images_dir(job.output_base, source_name))
+        cache.put(
+            job.cache_key,
+            (segment.replace(link_prefix, IMAGES_PLACEHOLDER) for segment in self._body_segments(job)),
+            job.ai_frontmatter,
+            staged_images if staged_images.is_dir() else None,
+            job.images_extracted,
+            job.images_described
+        )
 
-            # Write output
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
+    def _images_link_prefix(self, source_name: str) -> str:
+        """Image link prefix ("./{name}_images/") as it reads after the text stage."""
+        return text_processor.clean_text(f"./{source_name}_images/")
 
-            logger.info(f"Converted: {source_path} -> {output_path}")
+    def _stage_images(self, job: ConversionJob):
+        """Extract, save and optionally describe images (disk and network bound)."""
+        if not self._ai_options.extract_images or job.from_cache:
+            return
 
-            return ConversionResult(
-                source_path=source_path,
-                output_path=str(output_path),
-                success=True,
-                images_extracted=images_extracted,
-                images_described=images_described
+        source = Path(job.source_path)
+        try:
+            images_md, job.images_extracted, job.images_described = self._process_images(
+                str(source),
+                job.output_base,
+                source.name,
+                job
             )
+            job.images_md = images_md or ""
+            if (self._ai_options.describe_images and self._ai_options.api_key
+                    and job.images_described < job.images_extracted):
+                job.degraded = True
+        except Exception as e:
+            logger.warning(f"Image processing failed: {e}")
+            job.degraded = True
 
-        except PermissionError:
-            return ConversionResult(
-                source_path=source_path,
-                output_path=None,
-                success=False,
-                error_message="Không có quyền truy cập"
-            )
+    def _stage_text(self, job: ConversionJob):
+        """Optimize text for Japanese RAG."""
+        if job.from_cache:
+            return
+        try:
+            if job.body_path:
+                # Spooled body: cleaned from file to file
+                cleaned = spool_path(job.output_path, 'text')
+                with open(cleaned, 'w', encoding='utf-8') as f:
+                    f.writelines(text_processor.clean_text_stream(
+                        text_processor.file_line_blocks(job.body_path)
+                    ))
+                os.remove(job.body_path)
+                job.body_path = str(cleaned)
+            elif len(job.markdown) > text_processor.BLOCK_SIZE:
+                # More than one block: cleaned blocks stream to a spool file the writer and
+                # chunker read back, so the document is never held twice in memory
+                cleaned = spool_path(job.output_path, 'text')
+                with open(cleaned, 'w', encoding='utf-8') as f:
+                    f.writelines(text_processor.clean_text_stream([job.markdown]))
+                job.markdown = ""
+                job.body_path = str(cleaned)
+            else:
+                job.segments = list(text_processor.clean_text_stream([job.markdown]))
+                job.markdown = ""
+            job.images_md = text_processor.clean_text(job.images_md)
         except Exception as e:
-            logger.error(f"Conversion failed for {source_path}: {e}")
-            return ConversionResult(
-                source_path=source_path,
-                output_path=None,
-                success=False,
-                error_message=str(e)
+            logger.warning(f"Text optimization failed: {e}")
+            job.degraded = True
+
+    def _stage_ai(self, job: ConversionJob):
+        """AI Enrichment (Summary & Keywords), network bound."""
+        if not (self._ai_options.summary_enabled and self._ai_options.api_key) or job.from_cache:
+            return
+
+        try:
+            ai_service = ai_helper.AIService(
+                provider=self._ai_options.ai_provider,
+                api_key=self._ai_options.api_key,
+                model=self._ai_options.ai_model
             )
+            summary_yaml = ai_service.summarize_text(self._summary_text(job))
+            if summary_yaml:
+                job.ai_frontmatter = summary_yaml + "\n"
+            else:
+                job.degraded = True
+        except Exception as e:
+            logger.warning(f"AI Summary failed: {e}")
+            job.degraded = True
+
+    @staticmethod
+    def _body_segments(job: ConversionJob) -> Iterator[str]:
+        """Markdown body in pieces, in file order: the document, then the image section."""
+        if job.body_path:
+            yield from text_processor.file_line_blocks(job.body_path)
+        elif job.segments is not None:
+            yield from job.segments
+        else:
+            yield job.markdown
+        if job.images_md:
+            yield job.images_md
+
+    def _summary_text(self, job: ConversionJob) -> str:
+        """
+        Text for the AI summary without joining the whole body: the body itself
+        when short, else its start and end (what AIService.summarize_text keeps).
+        """
+        limit = SUMMARY_HEAD_CHARS + SUMMARY_TAIL_CHARS
+        head = ""
+        for segment in self._body_segments(job):
+            head += segment[:limit + 1 - len(head)]
+            if len(head) > limit:
+                break
+        if len(head) <= limit:
+            return head
+
+        if job.body_path:
+            segments = [self._spool_tail(job.body_path, SUMMARY_TAIL_CHARS), job.images_md]
+        else:
+            segments = list(self._body_segments(job))
+        tail = ""
+        for segment in reversed(segments):
+            tail = segment[-(SUMMARY_TAIL_CHARS - len(tail)):] + tail
+            if len(tail) >= SUMMARY_TAIL_CHARS:
+                break
+        return head[:SUMMARY_HEAD_CHARS] + "\n...\n" + tail
+
+    @staticmethod
+    def _spool_tail(path: str, chars: int) -> str:
+        """Last characters of a spooled body, read from its end."""
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            # At most 4 bytes per character in UTF-8
+            f.seek(max(0, f.tell() - chars * 4))
+            text = f.read().decode('utf-8', errors='ignore').replace('\r\n', '\n')
+        return text[-chars:]
+
+    def _stage_write(self, job: ConversionJob):
+        """Add frontmatter, write RAG chunks and the markdown file."""
+        source_name = Path(job.source_path).name
+
+        deterministic = self._ai_options.deterministic_output
+        # Put staged files in place; deterministic output keeps byte-identical files untouched
+        place = replace_if_changed if deterministic else os.replace
+
+        # Add RAG Metadata (Frontmatter)
+        if deterministic:
+            frontmatter = f"---\nsource_file: {source_name}\n{job.ai_frontmatter}---\n\n"
+        else:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            frontmatter = f"---\nsource_file: {source_name}\nconverted_at: {timestamp}\n{job.ai_frontmatter}---\n\n"
+        # RAG Chunking
+        if self._ai_options.chunk_enabled:
+            try:
+                rag_chunker = chunker.MarkdownChunker(self._ai_options.chunk_level)
+                chunks = rag_chunker.iter_chunks(
+                    text_processor.iter_lines(itertools.chain([frontmatter], self._body_segments(job))),
+                    source_name
+                )
+
+                # Save .jsonl, one record as soon as each chunk is closed
+                jsonl_path = job.output_path.with_suffix('.jsonl')
+                previous_ids = read_chunk_ids(jsonl_path)
+                chunk_ids = []
+                with open(partial_path(jsonl_path), 'w', encoding='utf-8') as f:
+                    for chunk in chunks:
+                        f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+                        chunk_ids.append(chunk['id'])
+                place(partial_path(jsonl_path), jsonl_path)
+                job.chunk_delta = diff_chunk_ids(previous_ids, chunk_ids)
+                logger.info(f"Created RAG chunks: {jsonl_path}")
+            except Exception as e:
+                logger.warning(f"Chunking failed: {e}")
+
+        self._store_in_cache(job)
+
+        # Move staged images into place
+        images_dir = self._images_dir(job.output_base, source_name)
+        if partial_path(images_dir).is_dir():
+            if deterministic:
+                sync_dir(partial_path(images_dir), images_dir)
+            else:
+                if images_dir.exists():
+                    shutil.rmtree(images_dir)
+                os.replace(partial_path(images_dir), images_dir)
+
+        # Write output atomically: an interrupted run never leaves a truncated .md.
+        # The pieces are streamed to the file; the document is never assembled in memory.
+        with open(partial_path(job.output_path), 'w', encoding='utf-8') as f:
+            f.write(frontmatter)
+            f.writelines(self._body_segments(job))
+        place(partial_path(job.output_path), job.output_path)
+
+        # Release the document (the job lives on until its result is delivered)
+        for stage in ('body', 'text'):
+            spool_path(job.output_path, stage).unlink(missing_ok=True)
+        job.markdown, job.images_md, job.segments, job.body_path = "", "", None, None
 
     def scan_folder(
         self,
         folder_path: str,
         recursive: bool = False,
         max_depth: Optional[int] = None,
-        allowed_extensions: Optional[Set[str]] = None
+        allowed_extensions: Optional[Set[str]] = None,
+        refresh: bool = True
     ) -> List[str]:
         """
         Scan folder for convertible files.
@@ -368,9 +941,11 @@ class MarkdownConverter:
             recursive: Whether to scan subfolders
             max_depth: Maximum depth for recursive scan (None = unlimited)
             allowed_extensions: Set of allowed extensions (None = all supported)
+            refresh: Check the disk for changes; False answers from the in-memory
+                index when it already covers the requested depth (filter changes)
 
         Returns:
-            List of file paths
+            Sorted list of file paths below folder_path as given (not resolved)
         """
         folder = Path(folder_path)
         if not folder.exists() or not folder.is_dir():
@@ -379,28 +954,25 @@ class MarkdownConverter:
         if allowed_extensions is None:
             allowed_extensions = self.get_all_extensions()
 
-        files = []
-
-        def scan_dir(dir_path: Path, current_depth: int = 0):
-            if self._stop_requested:
-                return
-
-            try:
-                for item in dir_path.iterdir():
-                    if self._stop_requested:
-                        return
-
-                    if item.is_file():
-                        if item.suffix.lower() in allowed_extensions:
-                            files.append(str(item))
-                    elif item.is_dir() and recursive:
-                        if max_depth is None or current_depth < max_depth:
-                            scan_dir(item, current_depth + 1)
-            except PermissionError:
-                logger.warning(f"Permission denied: {dir_path}")
-
-        scan_dir(folder)
-        return sorted(files)
+        index = self._scan_index(folder)
+        depth = max_depth if recursive else 0
+        if refresh or not index.covers(depth):
+            if not index.refresh(depth, should_stop=lambda: self._stop_requested):
+                return []
+            if self._batch_options is not None and self._batch_options.scan_index:
+                index.save()
+
+        # The index works on the resolved folder; answer in terms of the folder given
+        root = str(index.root)
+        return [str(folder / os.path.relpath(path, root))
+                for path in index.files(depth, allowed_extensions, exclude={MANIFEST_NAME})]
+
+    def _scan_index(self, folder: Path) -> ScanIndex:
+        """Scan index of a folder, kept in memory between scans (on disk with BatchOptions.scan_index)."""
+        key = str(folder.resolve())
+        if key not in self._scan_indexes:
+            self._scan_indexes[key] = ScanIndex(key)
+        return self._scan_indexes[key]
 
     def convert_folder(
         self,
@@ -446,17 +1018,159 @@ class MarkdownConverter:
         if not files:
             return []
 
-        results = []
-        total = len(files)
+        return self.convert_files(
+            files,
+            output_dir=output_dir,
+            overwrite=overwrite,
+            progress_callback=progress_callback,
+            source_root=folder_path
+        )
 
-        for i, file_path in enumerate(files):
-            if self._stop_requested:
-                break
+    def convert_files(
+        self,
+        files: List[str],
+        output_dir: Optional[str] = None,
+        overwrite: bool = False,
+        progress_callback: Optional[Callable[[int, int, ConversionResult], None]] = None,
+        source_root: Optional[str] = None
+    ) -> List[ConversionResult]:
+        """
+        Convert a list of files on the parallel batch engine.
+
+        Args:
+            files: Source file paths
+            output_dir: Optional output directory
+            overwrite: If True, overwrite existing .md files. If False, skip.
+            progress_callback: Optional callback(current, total, result) for progress updates
+            source_root: Folder the files were scanned from (None = a plain file list)
+
+        Returns:
+            List of ConversionResult for each converted file
+        """
+        from batch_engine import BatchEngine
+
+        engine = BatchEngine(self, self._batch_options)
+        return engine.run(
+            files,
+            output_dir=output_dir,
+            overwrite=overwrite,
+            progress_callback=progress_callback,
+            source_root=source_root
+        )
 
-            result = self.convert_file(file_path, output_dir, overwrite=overwrite)
-            results.append(result)
+    def retry_failed(
+        self,
+        run_id: str,
+        include_timeouts: bool = True,
+        progress_callback: Optional[Callable[[int, int, ConversionResult], None]] = None
+    ) -> List[ConversionResult]:
+        """
+        Re-run only the files that failed (or timed out) in a stored run, with that
+        run's output folder and AI options. Results are stored as a new run.
+
+        Args:
+            run_id: Run from the results store
+            include_timeouts: Also retry files killed by the per-file timeout
+            progress_callback: Optional callback(current, total, result) for progress updates
+
+        Returns:
+            List of ConversionResult for the retried files
 
-            if progress_callback:
-                progress_callback(i + 1, total, result)
+        Raises:
+            KeyError: Unknown run id
+        """
+        from batch_engine import BatchEngine
+        from results_store import ResultsStore
 
+        store = ResultsStore()
+        try:
+            run = store.get_run(run_id)
+            if run is None:
+                raise KeyError(run_id)
+            files = store.failed_files(run_id, include_timeouts)
+        finally:
+            store.close()
+
+        logger.info(f"Retrying {len(files)} failed files of run {run_id}")
+        if not files:
+            return []
+
+        self._restore_ai_options(run.ai_options)
+        self.reset_stop()
+        engine = BatchEngine(self, self._batch_options)
+        return engine.run(
+            files,
+            output_dir=run.output_dir,
+            overwrite=True,
+            progress_callback=progress_callback,
+            retry_of=run_id,
+            source_root=run.source_root
+        )
+
+    def _restore_ai_options(self, recorded: Dict):
+        """Switch to AI options recorded by a past job, keeping the current API key."""
+        known = {f.name for f in fields(AIOptions)}
+        options = {k: v for k, v in recorded.items() if k in known}
+        self.set_ai_options(AIOptions(**{**options, 'api_key': self._ai_options.api_key}))
+
+    def resume_job(
+        self,
+        job_id: str,
+        progress_callback: Optional[Callable[[int, int, ConversionResult], None]] = None
+    ) -> List[ConversionResult]:
+        """
+        Continue a journaled batch job where it stopped (e.g. after a crash).
+        Files that were in flight are cleaned up and converted again with overwrite,
+        whatever output they left; files never dispatched run with the job's settings.
+        The job's recorded AI options are restored (the API key is taken from the current options).
+
+        Args:
+            job_id: Id of the job (journal file name)
+            progress_callback: Optional callback(current, total, result) for progress updates
+
+        Returns:
+            List of ConversionResult for the remaining files
+
+        Raises:
+            FileNotFoundError: No journal with this id
+        """
+        from batch_engine import BatchEngine
+        from journal import JobJournal
+
+        journal = JobJournal.open(job_id)
+        state = journal.state
+        self._restore_ai_options(state.ai_options)
+
+        in_flight, not_started = state.in_flight, state.not_started
+        total = len(in_flight) + len(not_started)
+        logger.info(f"Resuming job {job_id}: {len(in_flight)} in flight, {len(not_started)} not started")
+
+        self.reset_stop()
+        engine = BatchEngine(self, self._batch_options)
+        results: List[ConversionResult] = []
+        try:
+            # In-flight outputs are never trusted: drop leftovers and overwrite
+            for file_path in in_flight:
+                self.discard_partial_output(file_path, state.output_dir)
+
+            for files, overwrite in ((in_flight, True), (not_started, state.overwrite)):
+                if self._stop_requested or not files:
+                    continue
+
+                offset = len(results)
+
+                def report(current: int, _total: int, result: ConversionResult):
+                    if progress_callback:
+                        progress_callback(offset + current, total, result)
+
+                results += engine.run(
+                    files,
+                    output_dir=state.output_dir,
+                    overwrite=overwrite,
+                    progress_callback=report,
+                    journal=journal,
+                    source_root=state.source_root
+                )
+        finally:
+            journal.close()
         return results
@@ -0,0 +1,170 @@
+"""
+Deduplication Module
+Finds byte-identical source files in a batch so each distinct document is
+converted once. Sizes are compared first and only files sharing a size are
+hashed; the outputs of a converted file are then copied (or hardlinked) for
+its duplicates.
+"""
+
+import os
+import shutil
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from converter import ConversionResult, partial_path
+from manifest import file_hash
+from chunk_delta import read_chunk_ids, diff_chunk_ids
+
+logger = logging.getLogger(__name__)
+
+
+def find_duplicates(files: List[str]) -> Dict[str, List[str]]:
+    """
+    Group byte-identical files.
+
+    Args:
+        files: Source file paths
+
+    Returns:
+        {primary: [duplicates]} for every group of two or more identical files,
+        the primary being the first of the group in `files`
+    """
+    by_size: Dict[int, List[str]] = defaultdict(list)
+    for file_path in files:
+        try:
+            by_size[os.path.getsize(file_path)].append(file_path)
+        except OSError:
+            continue
+
+    groups = {}
+    for paths in by_size.values():
+        if len(paths) < 2:
+            continue
+        by_hash: Dict[str, List[str]] = defaultdict(list)
+        for file_path in paths:
+            try:
+                by_hash[file_hash(file_path)].append(file_path)
+            except OSError:
+                continue
+        for same in by_hash.values():
+            if len(same) > 1:
+                groups[same[0]] = same[1:]
+
+    if groups:
+        duplicates = sum(len(d) for d in groups.values())
+        logger.info(f"Found {duplicates} duplicate files in {len(groups)} groups")
+    return groups
+
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        # Different volume or no hardlink support
+        shutil.copy2(source, target)
+
+
+def _place(source: Path, target: Path, link: bool):
+    """Copy or hardlink a file to a .part sibling of target, then move it into place."""
+    staged = partial_path(target)
+    if staged.exists():
+        staged.unlink()
+    (_link_or_copy if link else shutil.copy2)(source, staged)
+    os.replace(staged, target)
+
+
+def materialize(
+    primary: ConversionResult,
+    duplicate_path: str,
+    output_path: Path,
+    link: bool = False
+) -> ConversionResult:
+    """
+    Give a duplicate the outputs of its converted primary (same file name only:
+    the markdown embeds the source name and its image folder).
+
+    Args:
+        primary: Successful result of the primary file
+        duplicate_path: Source path of the duplicate
+        output_path: Markdown path of the duplicate
+        link: Hardlink instead of copying
+
+    Returns:
+        ConversionResult of the duplicate (duplicate_of set)
+    """
+    primary_md = Path(primary.output_path)
+    source_name = Path(duplicate_path).name
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if output_path.resolve() == primary_md.resolve():
+            # Flat output folder: both copies map to the same markdown file
+            return ConversionResult(
+                source_path=duplicate_path,
+                output_path=str(output_path),
+                success=True,
+                images_extracted=primary.images_extracted,
+                images_described=primary.images_described,
+                duplicate_of=primary.source_path
+            )
+
+        images_dir = primary_md.with_name(f"{source_name}_images")
+        if images_dir.is_dir():
+            target_images = output_path.with_name(f"{source_name}_images")
+            staged = partial_path(target_images)
+            if staged.exists():
+                shutil.rmtree(staged)
+            shutil.copytree(
+                images_dir, staged,
+                copy_function=_link_or_copy if link else shutil.copy2
+            )
+            if target_images.exists():
+                shutil.rmtree(target_images)
+            os.replace(staged, target_images)
+
+        chunks = primary_md.with_suffix('.jsonl')
+        chunk_delta = None
+        if chunks.is_file():
+            target_chunks = output_path.with_suffix('.jsonl')
+            previous_ids = read_chunk_ids(target_chunks)
+            _place(chunks, target_chunks, link)
+            chunk_delta = diff_chunk_ids(previous_ids, read_chunk_ids(target_chunks))
+        _place(primary_md, output_path, link)
+    except OSError as e:
+        logger.error(f"Could not copy outputs for duplicate {duplicate_path}: {e}")
+        return ConversionResult(
+            source_path=duplicate_path,
+            output_path=None,
+            success=False,
+            error_message=str(e),
+            duplicate_of=primary.source_path
+        )
+
+    return ConversionResult(
+        source_path=duplicate_path,
+        output_path=str(output_path),
+        success=True,
+        images_extracted=primary.images_extracted,
+        images_described=primary.images_described,
+        duplicate_of=primary.source_path,
+        chunk_delta=chunk_delta
+    )
+
+
+def duplicate_savings(results: List[ConversionResult]) -> Tuple[int, int]:
+    """
+    Duplicates served from another file's conversion.
+
+    Returns:
+        (number of duplicates, total bytes of their sources)
+    """
+    count, size = 0, 0
+    for result in results:
+        if result.duplicate_of and result.success:
+            count += 1
+            try:
+                size += os.path.getsize(result.source_path)
+            except OSError:
+                pass
+    return count, size
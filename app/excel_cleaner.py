@@ -8,49 +8,97 @@ import logging
 import os
 import shutil
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Callable
 import openpyxl
 from openpyxl.utils import range_boundaries
 
 logger = logging.getLogger(__name__)
 
-def clean_excel_file(file_path: str) -> Optional[str]:
+def fill_merged_cells(sheet) -> bool:
+    """
+    Unmerge every merged range of a worksheet and fill it with its top-left value.
+
+    Returns:
+        True if the sheet had merged cells
+    """
+    # List of merged ranges (copy to avoid modification during iteration)
+    merged_ranges = list(sheet.merged_cells.ranges)
+
+    for merged_range in merged_ranges:
+        # Get boundaries
+        min_col, min_row, max_col, max_row = range_boundaries(str(merged_range))
+
+        # Get value of top-left cell
+        top_left_value = sheet.cell(row=min_row, column=min_col).value
+
+        # Unmerge
+        sheet.unmerge_cells(str(merged_range))
+
+        # Fill all cells in range with the value
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                cell = sheet.cell(row=row, column=col)
+                cell.value = top_left_value
+
+    return bool(merged_ranges)
+
+def fill_merged_rows(rows: List[list], merged_ranges: List[str]) -> List[list]:
+    """
+    Forward-fill merged ranges in a sheet read as rows of values
+    ("" for empty cells, first row = row 1), for sheets converted on their own.
+
+    Args:
+        rows: Cell values by row
+        merged_ranges: Merged ranges such as "A1:C2"
+
+    Returns:
+        Filled rows, trimmed and padded to a rectangle like pandas reads them
+    """
+    rows = [list(row) for row in rows]
+
+    for merged_range in merged_ranges:
+        min_col, min_row, max_col, max_row = range_boundaries(merged_range)
+
+        while len(rows) < max_row:
+            rows.append([])
+        top_left_row = rows[min_row - 1]
+        top_left_value = top_left_row[min_col - 1] if min_col <= len(top_left_row) else ""
+
+        for row in rows[min_row - 1:max_row]:
+            if len(row) < max_col:
+                row.extend([""] * (max_col - len(row)))
+            row[min_col - 1:max_col] = [top_left_value] * (max_col - min_col + 1)
+
+    # Drop trailing empty cells and rows, then pad to the widest row
+    for row in rows:
+        while row and row[-1] == "":
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    width = max((len(row) for row in rows), default=0)
+    return [row + [""] * (width - len(row)) for row in rows]
+
+def clean_excel_file(file_path: str, should_stop: Optional[Callable[[], bool]] = None) -> Optional[str]:
     """
     Clean Excel file by unmerging cells and filling values (Forward Fill).
 
     Args:
         file_path: Path to source .xlsx file
+        should_stop: Optional cancellation check, polled before each sheet
 
     Returns:
-        Path to temporary cleaned file, or None if failed.
+        Path to temporary cleaned file, or None if failed or cancelled.
     """
     try:
         wb = openpyxl.load_workbook(file_path)
         modified = False
 
         for sheet in wb.worksheets:
-            # List of merged ranges (copy to avoid modification during iteration)
-            merged_ranges = list(sheet.merged_cells.ranges)
-
-            if not merged_ranges:
-                continue
-
-            modified = True
-            for merged_range in merged_ranges:
-                # Get boundaries
-                min_col, min_row, max_col, max_row = range_boundaries(str(merged_range))
-
-                # Get value of top-left cell
-                top_left_value = sheet.cell(row=min_row, column=min_col).value
-
-                # Unmerge
-                sheet.unmerge_cells(str(merged_range))
-
-                # Fill all cells in range with the value
-                for row in range(min_row, max_row + 1):
-                    for col in range(min_col, max_col + 1):
-                        cell = sheet.cell(row=row, column=col)
-                        cell.value = top_left_value
+            if should_stop and should_stop():
+                wb.close()
+                return None
+            if fill_merged_cells(sheet):
+                modified = True
 
         if modified:
             # Save to temp file
@@ -0,0 +1,158 @@
+"""
+Excel Sheets Module
+Per-sheet conversion of large .xlsx workbooks: every sheet is read, cleaned
+(merged cells filled) and rendered on its own worker, then the markdown is
+assembled in workbook order exactly as markitdown's XLSX converter does.
+"""
+
+import zipfile
+import logging
+import posixpath
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Callable
+
+import text_processor
+import excel_cleaner
+
+logger = logging.getLogger(__name__)
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+def sheet_paths(file_path: str) -> Dict[str, str]:
+    """
+    Sheet names of a workbook in workbook order, mapped to their XML part.
+    Reads only workbook.xml and its relationships.
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels}
+    paths = {}
+    for sheet in workbook.iter(f'{_NS_MAIN}sheet'):
+        target = targets.get(sheet.get(f'{_NS_REL}id'))
+        if not target:
+            continue
+        if target.startswith('/'):
+            paths[sheet.get('name')] = target.lstrip('/')
+        else:
+            paths[sheet.get('name')] = posixpath.normpath(posixpath.join('xl', target))
+    return paths
+
+
+def sheet_names(file_path: str) -> List[str]:
+    """Sheet names of a workbook in workbook order ([] if it cannot be read)."""
+    try:
+        return list(sheet_paths(file_path))
+    except Exception as e:
+        logger.debug(f"Could not list sheets of {file_path}: {e}")
+        return []
+
+
+def merged_ranges(file_path: str, sheet_name: str) -> List[str]:
+    """Merged cell ranges ("A1:C2") of one sheet, streamed from its XML part."""
+    part = sheet_paths(file_path).get(sheet_name)
+    if part is None:
+        return []
+
+    ranges = []
+    with zipfile.ZipFile(file_path) as zf, zf.open(part) as f:
+        for _, element in ET.iterparse(f):
+            if element.tag == f'{_NS_MAIN}mergeCell':
+                ranges.append(element.get('ref'))
+            elif element.tag == f'{_NS_MAIN}row':
+                # Cell data is not needed here; keep memory flat on huge sheets
+                element.clear()
+    return ranges
+
+
+def _convert_cell(cell):
+    """Cell value as pandas' openpyxl reader converts it."""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return float('nan')
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+def _read_cleaned_frame(file_path: str, sheet_name: str, ranges: List[str]):
+    """
+    Read one sheet with its merged ranges filled, as pandas.read_excel would
+    read the cleaned workbook.
+    """
+    import openpyxl
+    from pandas.io.parsers import TextParser
+
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = wb[sheet_name]
+        sheet.reset_dimensions()
+        rows = [[_convert_cell(cell) for cell in row] for row in sheet.rows]
+    finally:
+        wb.close()
+
+    rows = excel_cleaner.fill_merged_rows(rows, ranges)
+    if not rows:
+        import pandas as pd
+        return pd.DataFrame()
+    return TextParser(rows, header=0, skip_blank_lines=False).read()
+
+
+def convert_sheet(file_path: str, sheet_name: str, clean: bool) -> str:
+    """
+    Convert one sheet to markdown (runs in a worker).
+
+    Args:
+        file_path: Path to the .xlsx workbook
+        sheet_name: Sheet to convert
+        clean: Fill merged cells first (excel_clean_enabled)
+
+    Returns:
+        The sheet's section: "## <name>" heading and table
+    """
+    import pandas as pd
+    from markitdown.converters import HtmlConverter
+
+    ranges = merged_ranges(file_path, sheet_name) if clean else []
+    if ranges:
+        frame = _read_cleaned_frame(file_path, sheet_name, ranges)
+    else:
+        frame = pd.read_excel(file_path, sheet_name=sheet_name, engine="openpyxl")
+
+    html = frame.to_html(index=False)
+    table = HtmlConverter().convert_string(html).markdown.strip()
+    return f"## {sheet_name}\n{table}\n\n"
+
+
+def convert_excel_parallel(
+    file_path: str,
+    names: List[str],
+    clean: bool,
+    pool,
+    should_stop: Optional[Callable[[], bool]] = None,
+    deadline: Optional[float] = None
+) -> str:
+    """
+    Convert a workbook sheet by sheet on a worker pool.
+
+    Args:
+        file_path: Path to the .xlsx workbook
+        names: Sheet names in workbook order
+        clean: Fill merged cells first (excel_clean_enabled)
+        pool: WorkerPool running the sheet tasks
+        should_stop: Optional cancellation check; pending sheets are cancelled when it turns true
+        deadline: Optional time.monotonic() limit (WorkerTimeout once passed)
+
+    Returns:
+        Markdown assembled in sheet order
+    """
+    futures = [pool.submit(convert_sheet, file_path, name, clean, tag=file_path) for name in names]
+    markdown = "".join(pool.gather(futures, should_stop, deadline))
+    return text_processor.normalize_markdown(markdown.strip())
@@ -7,10 +7,11 @@ import os
 import io
 import re
 import base64
+import hashlib
 import logging
 from pathlib import Path
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Callable, Iterable, Iterator
 from PIL import Image
 
 logger = logging.getLogger(__name__)
@@ -18,31 +19,68 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class ExtractedImage:
-    """Represents an extracted image."""
+    """
+    Represents an extracted image. Extractors yield it with its bytes
+    (image_data); once spilled to disk only the metadata (path, size, sha256)
+    is kept and the bytes are read back from the file when needed.
+    """
     index: int
-    image_data: bytes
+    image_data: Optional[bytes]
     format: str  # 'png', 'jpeg', etc.
     source_page: Optional[int] = None
     description: Optional[str] = None
     ocr_text: Optional[str] = None
+    path: Optional[str] = None
+    size: int = 0
+    sha256: Optional[str] = None
+
+    @property
+    def filename(self) -> str:
+        """Simple numbered file name: image_001.png, image_002.png, etc."""
+        return f"image_{self.index:03d}.{self.format}"
+
+    def spill(self, output_dir: str, filename: Optional[str] = None):
+        """
+        Write the image to disk and drop its bytes from memory.
+
+        Args:
+            output_dir: Directory to save the image in (created if needed)
+            filename: File name (default: self.filename)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, filename or self.filename)
+        with open(self.path, 'wb') as f:
+            f.write(self.image_data)
+        self.size = len(self.image_data)
+        self.sha256 = hashlib.sha256(self.image_data).hexdigest()
+        self.image_data = None
+
+    def read(self) -> bytes:
+        """Image bytes, from memory or from the spilled file."""
+        if self.image_data is not None:
+            return self.image_data
+        with open(self.path, 'rb') as f:
+            return f.read()
 
 
 class ImageExtractor:
     """
     Extracts images from various document formats.
+    Extractors are generators: each image is yielded as soon as it is decoded,
+    so it can be written to disk before the next one is read.
     """
 
     @staticmethod
-    def extract_from_docx(file_path: str) -> List[ExtractedImage]:
+    def extract_from_docx(file_path: str) -> Iterator[ExtractedImage]:
         """Extract images from Word document."""
         try:
             from docx import Document
             from docx.opc.constants import RELATIONSHIP_TYPE as RT
         except ImportError:
             logger.warning("python-docx not installed, skipping DOCX image extraction")
-            return []
+            return
 
-        images = []
+        count = 0
         try:
             doc = Document(file_path)
 
@@ -52,30 +90,30 @@ class ImageExtractor:
                     try:
                         image_data = rel.target_part.blob
                         ext = Path(rel.target_ref).suffix.lower().replace('.', '')
-                        if ext in ('png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'):
-                            images.append(ExtractedImage(
-                                index=len(images) + 1,
-                                image_data=image_data,
-                                format=ext if ext != 'jpg' else 'jpeg'
-                            ))
                     except Exception as e:
                         logger.debug(f"Failed to extract image: {e}")
+                        continue
+                    if ext in ('png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'):
+                        count += 1
+                        yield ExtractedImage(
+                            index=count,
+                            image_data=image_data,
+                            format=ext if ext != 'jpg' else 'jpeg'
+                        )
         except Exception as e:
             logger.error(f"Failed to extract images from DOCX: {e}")
 
-        return images
-
     @staticmethod
-    def extract_from_pptx(file_path: str) -> List[ExtractedImage]:
+    def extract_from_pptx(file_path: str) -> Iterator[ExtractedImage]:
         """Extract images from PowerPoint presentation."""
         try:
             from pptx import Presentation
             from pptx.util import Inches
         except ImportError:
             logger.warning("python-pptx not installed, skipping PPTX image extraction")
-            return []
+            return
 
-        images = []
+        count = 0
         try:
             prs = Presentation(file_path)
 
@@ -85,70 +123,89 @@ class ImageExtractor:
                         try:
                             image = shape.image
                             ext = image.ext.lower()
-                            if ext in ('png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'):
-                                images.append(ExtractedImage(
-                                    index=len(images) + 1,
-                                    image_data=image.blob,
-                                    format=ext if ext != 'jpg' else 'jpeg',
-                                    source_page=slide_num
-                                ))
+                            image_data = image.blob
                         except Exception as e:
                             logger.debug(f"Failed to extract image from slide {slide_num}: {e}")
+                            continue
+                        if ext in ('png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'):
+                            count += 1
+                            yield ExtractedImage(
+                                index=count,
+                                image_data=image_data,
+                                format=ext if ext != 'jpg' else 'jpeg',
+                                source_page=slide_num
+                            )
         except Exception as e:
             logger.error(f"Failed to extract images from PPTX: {e}")
 
-        return images
-
     @staticmethod
-    def extract_from_pdf(file_path: str) -> List[ExtractedImage]:
-        """Extract images from PDF document."""
+    def extract_from_pdf(
+        file_path: str,
+        pages: Optional[range] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> Iterator[ExtractedImage]:
+        """
+        Extract images from PDF document.
+
+        Args:
+            file_path: Path to the PDF
+            pages: Optional 0-based page range (None = all pages)
+            should_stop: Optional cancellation check, polled before each page
+        """
         try:
             import fitz  # PyMuPDF
         except ImportError:
             logger.warning("PyMuPDF not installed, skipping PDF image extraction")
-            return []
+            return
 
-        images = []
+        count = 0
         try:
             doc = fitz.open(file_path)
+            try:
+                for page_num in (pages if pages is not None else range(len(doc))):
+                    if should_stop and should_stop():
+                        break
+                    page = doc[page_num]
+                    image_list = page.get_images()
 
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                image_list = page.get_images()
-
-                for img_index, img in enumerate(image_list):
-                    try:
-                        xref = img[0]
-                        base_image = doc.extract_image(xref)
-                        image_data = base_image["image"]
-                        ext = base_image["ext"]
+                    for img_index, img in enumerate(image_list):
+                        try:
+                            xref = img[0]
+                            base_image = doc.extract_image(xref)
+                            image_data = base_image["image"]
+                            ext = base_image["ext"]
+                        except Exception as e:
+                            logger.debug(f"Failed to extract image from page {page_num + 1}: {e}")
+                            continue
 
                         if ext in ('png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'):
-                            images.append(ExtractedImage(
-                                index=len(images) + 1,
+                            count += 1
+                            yield ExtractedImage(
+                                index=count,
                                 image_data=image_data,
                                 format=ext if ext != 'jpg' else 'jpeg',
                                 source_page=page_num + 1
-                            ))
-                    except Exception as e:
-                        logger.debug(f"Failed to extract image from page {page_num + 1}: {e}")
-
-            doc.close()
+                            )
+            finally:
+                doc.close()
         except Exception as e:
             logger.error(f"Failed to extract images from PDF: {e}")
 
-        return images
-
     @classmethod
-    def extract_images(cls, file_path: str) -> List[ExtractedImage]:
+    def extract_images(
+        cls,
+        file_path: str,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> Iterator[ExtractedImage]:
         """
         Extract images from a document based on its type.
 
         Args:
             file_path: Path to the document
+            should_stop: Optional cancellation check (PDF: polled per page)
 
         Returns:
-            List of ExtractedImage objects
+            Iterator of ExtractedImage objects, in document order
         """
         ext = Path(file_path).suffix.lower()
 
@@ -157,14 +214,38 @@ class ImageExtractor:
         elif ext in ('.pptx', '.ppt'):
             return cls.extract_from_pptx(file_path)
         elif ext == '.pdf':
-            return cls.extract_from_pdf(file_path)
+            return cls.extract_from_pdf(file_path, should_stop=should_stop)
         else:
             logger.info(f"Image extraction not supported for {ext}")
-            return []
+            return iter(())
+
+    @staticmethod
+    def spill_images(images: Iterable[ExtractedImage], output_dir: str) -> List[ExtractedImage]:
+        """
+        Write images to disk as they are extracted, keeping only their metadata.
+        At most one image's bytes are in memory at a time.
+
+        Args:
+            images: ExtractedImage objects (e.g. an extractor generator)
+            output_dir: Directory to save images (should be {base_name}_images)
+
+        Returns:
+            The spilled images (path, size, sha256 set; image_data dropped)
+        """
+        spilled = []
+        for img in images:
+            try:
+                img.spill(output_dir)
+            except Exception as e:
+                logger.error(f"Failed to save image {img.filename}: {e}")
+                continue
+            logger.debug(f"Saved image: {img.path}")
+            spilled.append(img)
+        return spilled
 
     @staticmethod
     def save_images(
-        images: List[ExtractedImage],
+        images: Iterable[ExtractedImage],
         output_dir: str,
         base_name: str
     ) -> List[str]:
@@ -173,7 +254,7 @@ class ImageExtractor:
         Images are saved to: {output_dir}/ with simple numbered names.
 
         Args:
-            images: List of ExtractedImage objects
+            images: ExtractedImage objects
             output_dir: Directory to save images (should be {base_name}_images)
             base_name: Base name (used for reference only)
 
@@ -181,22 +262,7 @@ class ImageExtractor:
             List of saved image paths
         """
         os.makedirs(output_dir, exist_ok=True)
-        saved_paths = []
-
-        for img in images:
-            # Simple filename: image_001.png, image_002.png, etc.
-            filename = f"image_{img.index:03d}.{img.format}"
-            filepath = os.path.join(output_dir, filename)
-
-            try:
-                with open(filepath, 'wb') as f:
-                    f.write(img.image_data)
-                saved_paths.append(filepath)
-                logger.debug(f"Saved image: {filepath}")
-            except Exception as e:
-                logger.error(f"Failed to save image {filename}: {e}")
-
-        return saved_paths
+        return [img.path for img in ImageExtractor.spill_images(images, output_dir)]
 
 
 class AIImageDescriber:
@@ -333,7 +399,8 @@ Nếu có text trong ảnh, hãy trích xuất text đó."""
     def describe_images(
         self,
         images: List[ExtractedImage],
-        prompt: Optional[str] = None
+        prompt: Optional[str] = None,
+        should_stop: Optional[Callable[[], bool]] = None
     ) -> List[ExtractedImage]:
         """
         Add descriptions to a list of images.
@@ -341,12 +408,16 @@ Nếu có text trong ảnh, hãy trích xuất text đó."""
         Args:
             images: List of ExtractedImage objects
             prompt: Custom prompt (optional)
+            should_stop: Optional cancellation check, polled before each image
 
         Returns:
-            Same list with descriptions added
+            Same list with descriptions added (the rest left undescribed if stopped)
         """
         for img in images:
-            description = self.describe_image(img.image_data, img.format, prompt)
+            if should_stop and should_stop():
+                logger.info("Image description cancelled")
+                break
+            description = self.describe_image(img.read(), img.format, prompt)
             if description:
                 img.description = description
 
@@ -379,7 +450,7 @@ def format_images_for_markdown(
 
     for img in images:
         # Simple filename without base_name prefix since folder already includes it
-        filename = f"image_{img.index:03d}.{img.format}"
+        filename = img.filename
 
         if relative_path:
             # Per-file folder: document_images/image_001.png
@@ -0,0 +1,229 @@
+"""
+Journal Module
+Append-only JSONL journal of a batch job: the planned files, which ones were
+dispatched and which finished, plus the options they were converted with.
+After a crash the journal tells exactly what is left to do and which files
+were in flight (their outputs are never trusted and are converted again).
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Optional, Dict, List, Set, Any
+
+from manifest import options_fingerprint, options_snapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_DIR = Path.home() / ".markdown-converter" / "jobs"
+JOURNAL_FORMAT = 1
+
+# Completed records are fsync'ed at most this often; a record lost in a crash
+# only means that file is converted again
+_FSYNC_INTERVAL = 1.0
+
+
+def new_job_id() -> str:
+    """Sortable unique id of a batch job (also its run id in the results store)."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+@dataclass
+class JobState:
+    """A job replayed from its journal."""
+    job_id: str
+    created: float
+    output_dir: Optional[str]
+    overwrite: bool
+    options: str
+    ai_options: Dict[str, Any]
+    # Folder the files were scanned from (None = a plain file list)
+    source_root: Optional[str] = None
+    planned: List[str] = field(default_factory=list)
+    started: Set[str] = field(default_factory=set)
+    completed: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def in_flight(self) -> List[str]:
+        """Files dispatched but never finished."""
+        return [f for f in self.planned if f in self.started and f not in self.completed]
+
+    @property
+    def not_started(self) -> List[str]:
+        """Files never dispatched."""
+        return [f for f in self.planned if f not in self.started and f not in self.completed]
+
+    @property
+    def finished(self) -> bool:
+        return all(f in self.completed for f in self.planned)
+
+
+class JobJournal:
+    """
+    Journal of one job, stored as {job_id}.jsonl in the journal folder.
+    Records: {"event": "job" | "planned" | "started" | "completed", ...}
+    """
+
+    def __init__(self, path: Path, state: JobState):
+        self.path = path
+        self.state = state
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._last_sync = 0.0
+
+    @property
+    def job_id(self) -> str:
+        return self.state.job_id
+
+    @classmethod
+    def create(
+        cls,
+        files: List[str],
+        output_dir: Optional[str],
+        overwrite: bool,
+        ai_options,
+        source_root: Optional[str] = None,
+        journal_dir: Optional[str] = None
+    ) -> 'JobJournal':
+        """
+        Start the journal of a new job.
+
+        Args:
+            files: Source files in planned order
+            output_dir: Output directory of the job (None = next to the sources)
+            overwrite: Overwrite flag of the job
+            ai_options: AIOptions of the job
+            source_root: Folder the files were scanned from (None = a plain file list)
+            journal_dir: Journal folder (default: ~/.markdown-converter/jobs)
+
+        Returns:
+            The open journal
+        """
+        directory = Path(journal_dir) if journal_dir else DEFAULT_JOURNAL_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        job_id = new_job_id()
+        state = JobState(
+            job_id=job_id,
+            created=time.time(),
+            output_dir=os.path.abspath(output_dir) if output_dir else None,
+            overwrite=overwrite,
+            options=options_fingerprint(ai_options),
+            ai_options=options_snapshot(ai_options),
+            source_root=os.path.abspath(source_root) if source_root else None,
+            planned=[os.path.abspath(f) for f in files]
+        )
+
+        journal = cls(directory / f"{job_id}.jsonl", state)
+        header = {key: value for key, value in asdict(state).items()
+                  if key not in ('planned', 'started', 'completed')}
+        journal._append({'event': 'job', 'format': JOURNAL_FORMAT, **header}, sync=True)
+        journal._append({'event': 'planned', 'files': state.planned}, sync=True)
+        return journal
+
+    @classmethod
+    def open(cls, job_id: str, journal_dir: Optional[str] = None) -> 'JobJournal':
+        """
+        Reopen a job's journal to resume it.
+
+        Raises:
+            FileNotFoundError: No journal with this id
+            ValueError: The journal cannot be read
+        """
+        directory = Path(journal_dir) if journal_dir else DEFAULT_JOURNAL_DIR
+        path = directory / f"{job_id}.jsonl"
+        return cls(path, cls.replay(path))
+
+    @staticmethod
+    def replay(path: Path) -> JobState:
+        """Rebuild a job's state from its journal file (a torn last line is ignored)."""
+        state = None
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Line cut short by a crash
+                    continue
+                event = record.pop('event', None)
+                if event == 'job':
+                    if record.pop('format', None) != JOURNAL_FORMAT:
+                        raise ValueError(f"Unsupported journal format: {path}")
+                    state = JobState(**record)
+                elif state is None:
+                    continue
+                elif event == 'planned':
+                    state.planned = record['files']
+                elif event == 'started':
+                    state.started.add(record['path'])
+                elif event == 'completed':
+                    state.completed[record['path']] = record['status']
+        if state is None:
+            raise ValueError(f"Not a job journal: {path}")
+        return state
+
+    @staticmethod
+    def list_jobs(journal_dir: Optional[str] = None) -> List[JobState]:
+        """Jobs with a journal (unfinished ones: finished journals are deleted), oldest first."""
+        directory = Path(journal_dir) if journal_dir else DEFAULT_JOURNAL_DIR
+        jobs = []
+        for path in sorted(directory.glob("*.jsonl")):
+            try:
+                jobs.append(JobJournal.replay(path))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable journal {path}: {e}")
+        return jobs
+
+    def _append(self, record: Dict[str, Any], sync: bool = False):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            now = time.monotonic()
+            if sync or now - self._last_sync >= _FSYNC_INTERVAL:
+                os.fsync(self._file.fileno())
+                self._last_sync = now
+
+    def started(self, file_path: str):
+        """Record that a file was dispatched."""
+        file_path = os.path.abspath(file_path)
+        self.state.started.add(file_path)
+        self._append({'event': 'started', 'path': file_path})
+
+    def completed(self, result):
+        """Record a finished file (cancelled files stay in flight and are redone on resume)."""
+        if result.cancelled:
+            return
+        file_path = os.path.abspath(result.source_path)
+        self.state.completed[file_path] = result.status
+        self._append({
+            'event': 'completed',
+            'path': file_path,
+            'status': result.status,
+            'output': result.output_path
+        })
+
+    def close(self):
+        """Close the journal; a finished job's journal is deleted."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        if self.state.finished:
+            try:
+                self.path.unlink()
+            except OSError as e:
+                logger.warning(f"Could not remove finished journal {self.path}: {e}")
+
+    def discard(self):
+        """Close and delete the journal (job abandoned)."""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
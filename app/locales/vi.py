@@ -18,6 +18,7 @@ LABELS = {
     'depth': 'Độ sâu',
     'depth_one': '1 cấp',
     'depth_all': 'Tất cả các cấp',
+    'remove_orphans': 'Xóa output của tệp nguồn đã bị xóa',
 
     # Output Options
     'output_settings': 'Cài đặt Đầu ra',
@@ -29,6 +30,21 @@ LABELS = {
     'tab_general': '⚙️ Cấu hình',
     'tab_formats': '📑 Định dạng',
     'tab_advanced': '🖼️ Nâng cao & AI',
+    'tab_history': '🕘 Lịch sử',
+
+    # Run History
+    'unfinished_jobs': 'Tác vụ chưa hoàn thành',
+    'recent_runs': 'Các lần chạy gần đây',
+    'no_unfinished_jobs': 'Không có tác vụ nào đang dở',
+    'no_runs': 'Chưa có lần chạy nào',
+    'job_summary': '{created}  {completed}/{planned} tệp xong',
+    'run_summary': '{started}  {total} tệp: {success} thành công, {failed} lỗi',
+    'resume': 'Tiếp tục',
+    'discard': 'Xóa',
+    'retry_failed': 'Chạy lại lỗi',
+    'refresh': 'Làm mới',
+    'unfinished_jobs_found': 'Có {count} tác vụ chưa hoàn thành, mở thẻ Lịch sử để tiếp tục',
+    'nothing_to_retry': 'Không có tệp lỗi để chạy lại',
 
     # Format Filter
     'file_formats': 'Định dạng Tệp',
@@ -55,6 +71,7 @@ LABELS = {
     # Progress
     'progress': 'Tiến trình',
     'converting': 'Đang chuyển đổi {current}/{total} tệp...',
+    'converting_pages': 'Đang chuyển đổi {name}: trang {done}/{total}...',
     'done': 'Hoàn thành! Đã chuyển đổi {success}/{total} tệp.',
     'ready': 'Sẵn sàng',
     'processing': 'Đang xử lý...',
@@ -73,6 +90,7 @@ LABELS = {
     'failed': 'Thất bại',
     'skipped': 'Bỏ qua',
     'file_skipped': 'Bỏ qua (đã tồn tại)',
+    'duplicates_saved': 'Bỏ qua chuyển đổi {count} tệp trùng lặp (tiết kiệm {size})',
 
     # Image Options
     'image_options': 'Tùy chọn Hình ảnh',
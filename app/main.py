@@ -5,7 +5,9 @@ Cross-platform desktop application for converting files to Markdown.
 
 import os
 import sys
+import logging
 import threading
+import multiprocessing
 
 # Add app directory to path for imports BEFORE importing local modules
 app_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,6 +19,11 @@ from typing import Optional, List
 
 from locales import LABELS
 from converter import MarkdownConverter, ConversionResult, AIOptions as ConverterAIOptions
+from batch_engine import BatchOptions
+from warm_pool import shutdown_warm_pool
+from dedup import duplicate_savings
+from journal import JobJournal
+from results_store import ResultsStore
 from config_manager import ConfigManager, AppConfig
 from components import (
     FileSelector,
@@ -29,6 +36,7 @@ from components import (
     AIOptions,
     FilePreview,
     CollapsibleFrame,
+    RunHistory,
 )
 
 
@@ -53,6 +61,7 @@ class MarkdownConverterApp(ctk.CTk):
 
         # Initialize converter
         self._converter = MarkdownConverter()
+        self._converter.set_page_callback(self._on_pages)
         self._is_converting = False
         self._conversion_thread: Optional[threading.Thread] = None
 
@@ -63,6 +72,7 @@ class MarkdownConverterApp(ctk.CTk):
         self._create_widgets()
         self._bind_events()
         self._load_config_to_ui()
+        self._refresh_history(announce=True)
 
     def _create_widgets(self):
         """Create and layout all widgets."""
@@ -134,6 +144,7 @@ class MarkdownConverterApp(ctk.CTk):
         tab_general = self._tab_view.add(LABELS.get('tab_general', "Cấu hình"))
         tab_formats = self._tab_view.add(LABELS.get('tab_formats', "Định dạng"))
         tab_advanced = self._tab_view.add(LABELS.get('tab_advanced', "Nâng cao & AI"))
+        tab_history = self._tab_view.add(LABELS.get('tab_history', "Lịch sử"))
 
         # --- Tab 1: General ---
         self._output_options = OutputOptions(tab_general, fg_color="transparent")
@@ -165,6 +176,17 @@ class MarkdownConverterApp(ctk.CTk):
         self._ai_options = AIOptions(tab_advanced, fg_color="transparent")
         self._ai_options.pack(fill="both", expand=True, padx=5, pady=5)
 
+        # --- Tab 4: History (resume unfinished jobs, retry failed files) ---
+        self._run_history = RunHistory(
+            tab_history,
+            on_resume=self._resume_job,
+            on_discard=self._discard_job,
+            on_retry=self._retry_failed,
+            on_refresh=self._refresh_history,
+            fg_color="transparent"
+        )
+        self._run_history.pack(fill="both", expand=True, padx=5, pady=5)
+
         # Action Button (Bottom of Left Column)
         self._convert_btn = ctk.CTkButton(
             left_col,
@@ -195,6 +217,7 @@ class MarkdownConverterApp(ctk.CTk):
         # Folder options
         if self._config.include_subfolders:
             self._folder_options._recursive_var.set(True)
+        self._folder_options.set_remove_orphans(self._config.remove_orphans)
 
         # Output options
         self._output_options.set_overwrite_existing(self._config.overwrite_existing)
@@ -219,6 +242,7 @@ class MarkdownConverterApp(ctk.CTk):
 
         # Folder options
         self._config.include_subfolders = self._folder_options.is_recursive
+        self._config.remove_orphans = self._folder_options.remove_orphans
 
         # Output options
         self._config.overwrite_existing = self._output_options.overwrite_existing
@@ -266,15 +290,15 @@ class MarkdownConverterApp(ctk.CTk):
     def _on_format_change(self):
         """Handle format selection change."""
         if self._file_selector.is_folder_mode() and self._file_selector.selected_path:
-            self._scan_folder()
+            self._scan_folder(refresh=False)
 
     def _on_folder_options_change(self):
         """Handle folder options change."""
         if self._file_selector.is_folder_mode() and self._file_selector.selected_path:
-            self._scan_folder()
+            self._scan_folder(refresh=False)
 
-    def _scan_folder(self):
-        """Scan folder for files and update preview."""
+    def _scan_folder(self, refresh: bool = True):
+        """Scan folder for files and update preview (refresh=False filters the cached index)."""
         path = self._file_selector.selected_path
         if not path or not os.path.isdir(path):
             return
@@ -293,7 +317,8 @@ class MarkdownConverterApp(ctk.CTk):
                 folder_path=path,
                 recursive=recursive,
                 max_depth=max_depth,
-                allowed_extensions=self._converter.get_extensions_for_formats(selected_formats)
+                allowed_extensions=self._converter.get_extensions_for_formats(selected_formats),
+                refresh=refresh
             )
             # Update UI on main thread
             self.after(0, lambda: self._update_preview_after_scan(files))
@@ -365,9 +390,14 @@ class MarkdownConverterApp(ctk.CTk):
         if not self._validate_inputs():
             return
 
+        self._start_run(self._run_conversion)
+
+    def _start_run(self, target, *args):
+        """Apply the current options and run target(*args) in a background thread."""
         # Update UI state
         self._is_converting = True
         self._convert_btn.configure(text=f"⏹ {LABELS['stop_convert']}")
+        self._run_history.set_enabled(False)
         self._progress_panel.reset()
         self._progress_panel.set_status(LABELS['processing'])
 
@@ -377,17 +407,31 @@ class MarkdownConverterApp(ctk.CTk):
             extract_images=ai_cfg.get("extract_images", False),
             describe_images=ai_cfg.get("describe_images", False),
             chunk_enabled=ai_cfg.get("chunk_enabled", False),
+            chunk_level=self._config.chunk_level,
             excel_clean_enabled=ai_cfg.get("excel_clean_enabled", False),
             summary_enabled=ai_cfg.get("summary_enabled", False),
             ai_provider=ai_cfg.get("ai_provider", "openai"),
             api_key=ai_cfg.get("openai_key") if ai_cfg.get("ai_provider")=="openai" else ai_cfg.get("gemini_key"),
-            ai_model=ai_cfg.get("ai_model")
+            ai_model=ai_cfg.get("ai_model"),
+            cache_enabled=self._config.cache_enabled,
+            cache_max_mb=self._config.cache_max_mb,
+            deterministic_output=self._config.deterministic_output
         )
         self._converter.set_ai_options(ai_opts)
+        self._converter.set_batch_options(BatchOptions(
+            max_workers=self._config.max_workers or None,
+            incremental=True,
+        dedup=True,
+        journal=True,
+        results_store=True,
+        scan_index=True,
+            remove_orphans=self._folder_options.remove_orphans
+        ))
 
         # Start conversion in background thread
         self._conversion_thread = threading.Thread(
-            target=self._run_conversion,
+            target=target,
+            args=args,
             daemon=True
         )
         self._conversion_thread.start()
@@ -419,28 +463,115 @@ class MarkdownConverterApp(ctk.CTk):
 
             self.after(0, lambda: self._progress_panel.set_progress(0, total))
 
-            success_count = 0
-            for i, file_path in enumerate(files_to_convert):
-                if self._converter._stop_requested:
-                    break
-
-                result = self._converter.convert_file(file_path, output_dir, overwrite=overwrite)
-                if result.success:
-                    success_count += 1
+            results = self._converter.convert_files(
+                files_to_convert,
+                output_dir=output_dir,
+                overwrite=overwrite,
+                progress_callback=self._on_progress,
+                # Folder mode: the manifest lives in the folder and orphans are looked for there
+                source_root=source_path if self._file_selector.is_folder_mode() else None
+            )
+            self._show_results(results, total)
 
-                self.after(0, lambda r=result, c=i+1, t=total: self._on_progress(c, t, r))
+        except Exception as e:
+            self.after(0, lambda: self._progress_panel.log_message(
+                str(e), "error"
+            ))
 
-            self.after(0, lambda: self._progress_panel.show_done(success_count, total))
+        finally:
+            # Reset UI state
+            self.after(0, self._conversion_complete)
 
+    def _run_resume(self, job_id: str):
+        """Continue an unfinished journaled job in background thread."""
+        try:
+            results = self._converter.resume_job(job_id, progress_callback=self._on_progress)
+            self._show_results(results, len(results))
         except Exception as e:
             self.after(0, lambda: self._progress_panel.log_message(
                 str(e), "error"
             ))
+        finally:
+            self.after(0, self._conversion_complete)
 
+    def _run_retry(self, run_id: str):
+        """Re-run the failed files of a stored run in background thread."""
+        try:
+            results = self._converter.retry_failed(run_id, progress_callback=self._on_progress)
+            if not results:
+                self.after(0, lambda: self._progress_panel.log_message(
+                    LABELS['nothing_to_retry'], "info"
+                ))
+                return
+            self._show_results(results, len(results))
+        except Exception as e:
+            self.after(0, lambda: self._progress_panel.log_message(
+                str(e), "error"
+            ))
         finally:
-            # Reset UI state
             self.after(0, self._conversion_complete)
 
+    def _show_results(self, results: List[ConversionResult], total: int):
+        """Show the batch summary (called from the background thread)."""
+        success_count = sum(1 for r in results if r.success)
+
+        self.after(0, lambda: self._progress_panel.show_done(success_count, total))
+
+        duplicate_count, duplicate_bytes = duplicate_savings(results)
+        if duplicate_count:
+            message = LABELS['duplicates_saved'].format(
+                count=duplicate_count,
+                size=f"{duplicate_bytes / (1024 * 1024):.1f} MB"
+            )
+            self.after(0, lambda: self._progress_panel.log_message(message, "info"))
+
+    def _resume_job(self, job_id: str):
+        """Handle resume button of an unfinished job."""
+        if self._is_converting:
+            return
+        self._start_run(self._run_resume, job_id)
+
+    def _retry_failed(self, run_id: str):
+        """Handle retry button of a stored run."""
+        if self._is_converting:
+            return
+        self._start_run(self._run_retry, run_id)
+
+    def _discard_job(self, job_id: str):
+        """Handle discard button: delete the journal of an unfinished job."""
+        if self._is_converting:
+            return
+        try:
+            JobJournal.open(job_id).discard()
+        except (FileNotFoundError, ValueError) as e:
+            self._progress_panel.log_message(str(e), "error")
+        self._refresh_history()
+
+    def _refresh_history(self, announce: bool = False):
+        """
+        Reload unfinished jobs and recent runs into the history tab.
+
+        Args:
+            announce: Log a hint when unfinished jobs are found (at startup)
+        """
+        jobs = JobJournal.list_jobs()
+        try:
+            store = ResultsStore()
+            try:
+                runs = store.list_runs()
+            finally:
+                store.close()
+        except Exception as e:
+            self._progress_panel.log_message(str(e), "error")
+            runs = []
+        self._run_history.set_jobs(jobs)
+        self._run_history.set_runs(runs)
+
+        if announce and jobs:
+            self._progress_panel.log_message(
+                LABELS['unfinished_jobs_found'].format(count=len(jobs)), "info"
+            )
+
     def _on_progress(self, current: int, total: int, result: ConversionResult):
         """Callback for progress updates from converter."""
         def update():
@@ -460,6 +591,13 @@ class MarkdownConverterApp(ctk.CTk):
 
         self.after(0, update)
 
+    def _on_pages(self, source_path: str, pages_done: int, page_count: int):
+        """Callback for page progress of large PDFs converted page by page."""
+        status = LABELS['converting_pages'].format(
+            name=os.path.basename(source_path), done=pages_done, total=page_count
+        )
+        self.after(0, lambda: self._progress_panel.set_status(status))
+
     def _conversion_complete(self):
         """Reset UI after conversion completes."""
         self._is_converting = False
@@ -468,6 +606,8 @@ class MarkdownConverterApp(ctk.CTk):
             state="normal"
         )
         self._converter.reset_stop()
+        self._run_history.set_enabled(True)
+        self._refresh_history()
 
     def _on_close(self):
         """Handle window close."""
@@ -476,11 +616,15 @@ class MarkdownConverterApp(ctk.CTk):
 
         if self._is_converting:
             self._converter.request_stop()
+        shutdown_warm_pool(kill=True)
         self.destroy()
 
 
 def main():
     """Application entry point."""
+    # Required for worker processes in PyInstaller builds
+    multiprocessing.freeze_support()
+    logging.basicConfig(level=logging.INFO)
     app = MarkdownConverterApp()
     app.mainloop()
 
@@ -0,0 +1,313 @@
+"""
+Manifest Module
+Per-output-root record of what every output was converted from: source path,
+size, mtime, content hash, converter options and tool version. Lets re-runs
+convert only new or changed sources and remove outputs whose source is gone.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import functools
+from datetime import datetime
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from typing import Optional, Dict, List, Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".markdown-converter-manifest.json"
+MANIFEST_FORMAT = 1
+
+# Bump when a change to the converter alters the markdown it produces
+TOOL_VERSION = "1.2.0"
+
+# AIOptions fields that change how a file is converted but not what is written
+_OUTPUT_NEUTRAL_OPTIONS = {
+    'api_key',
+    'pdf_split_min_pages',
+    'pdf_pages_per_range',
+    'pdf_stream_min_pages',
+    'excel_split_min_sheets',
+    'excel_split_min_size_mb',
+    'cache_enabled',
+    'cache_dir',
+    'cache_max_mb',
+}
+
+# AIOptions fields that only shape the RAG chunks (.jsonl), tracked separately so
+# chunk files can be regenerated from existing markdown without reconverting
+_CHUNK_OPTIONS = {
+    'chunk_enabled',
+    'chunk_level',
+}
+
+# Secrets are never written to journals or the results store
+_UNRECORDED_OPTIONS = {'api_key'}
+
+_HASH_BLOCK = 1024 * 1024
+
+
+def file_hash(file_path: str) -> str:
+    """SHA-256 of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def tool_version() -> str:
+    """Converter version plus the markitdown version it runs on."""
+    try:
+        from importlib.metadata import version
+        return f"{TOOL_VERSION}+markitdown-{version('markitdown')}"
+    except Exception:
+        return TOOL_VERSION
+
+
+def options_fingerprint(ai_options, exclude: Iterable[str] = ()) -> str:
+    """Short hash of the AIOptions that affect the output, leaving out the exclude fields."""
+    relevant = {
+        f.name: getattr(ai_options, f.name)
+        for f in fields(ai_options)
+        if f.name not in _OUTPUT_NEUTRAL_OPTIONS and f.name not in _CHUNK_OPTIONS
+        and f.name not in exclude
+    }
+    encoded = json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def chunking_fingerprint(ai_options) -> str:
+    """Short hash of the chunking options ("" when chunking is off)."""
+    if not ai_options.chunk_enabled:
+        return ""
+    relevant = {name: getattr(ai_options, name) for name in sorted(_CHUNK_OPTIONS)}
+    encoded = json.dumps(relevant, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def options_snapshot(ai_options) -> Dict[str, Any]:
+    """AIOptions as a plain dict for later reuse, without secrets."""
+    return {
+        f.name: getattr(ai_options, f.name)
+        for f in fields(ai_options)
+        if f.name not in _UNRECORDED_OPTIONS
+    }
+
+
+@dataclass
+class ManifestEntry:
+    """What one output was converted from."""
+    source: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    options: str
+    tool_version: str
+    chunking: str = ""
+    # Run metadata kept out of deterministic outputs
+    converted_at: str = ""
+
+
+class Manifest:
+    """
+    Manifest of one output root, stored as MANIFEST_NAME in that folder.
+    Entries are keyed by the output's path relative to the root.
+    """
+
+    def __init__(self, root: str):
+        """
+        Load the manifest of an output root (empty if there is none yet).
+
+        Args:
+            root: Output root folder
+        """
+        self.root = Path(root)
+        self.path = self.root / MANIFEST_NAME
+        self._entries: Dict[str, ManifestEntry] = {}
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def for_batch(
+        cls,
+        files: List[str],
+        output_dir: Optional[str],
+        source_root: Optional[str] = None
+    ) -> Optional['Manifest']:
+        """
+        Manifest of a batch: the output folder, else the scanned source folder when
+        outputs are written next to the sources, so every batch of a folder shares
+        one manifest. A plain file list falls back to the common folder of its
+        sources (None if they share no folder).
+        """
+        if output_dir:
+            return cls(output_dir)
+        if source_root:
+            return cls(source_root)
+        try:
+            return cls(os.path.commonpath([str(Path(f).resolve().parent) for f in files]))
+        except ValueError:
+            # Sources on different drives
+            return None
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') != MANIFEST_FORMAT:
+                logger.info(f"Ignoring manifest with unknown format: {self.path}")
+                return
+            self._entries = {
+                key: ManifestEntry(**value) for key, value in data.get('entries', {}).items()
+            }
+        except Exception as e:
+            logger.warning(f"Could not read manifest {self.path}, starting fresh: {e}")
+            self._entries = {}
+
+    def save(self):
+        """Write the manifest atomically (only if it changed)."""
+        if not self._dirty:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = {
+            'format': MANIFEST_FORMAT,
+            'entries': {key: asdict(entry) for key, entry in sorted(self._entries.items())},
+        }
+        temp_path = self.path.with_name(self.path.name + ".part")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.path)
+        self._dirty = False
+
+    def _key(self, output_path: str) -> str:
+        try:
+            return Path(output_path).resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return Path(output_path).resolve().as_posix()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_current(self, source_path: str, output_path: str, options: str, chunking: str = "") -> bool:
+        """
+        Whether an existing output is up to date with its source and options.
+        Size and mtime decide when they match; otherwise the content hash does,
+        so a touched but unchanged file is not reconverted.
+        """
+        entry = self._entries.get(self._key(output_path))
+        if entry is None or not Path(output_path).exists():
+            return False
+        if entry.options != options or entry.tool_version != tool_version():
+            return False
+        if entry.chunking != chunking:
+            return False
+
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return False
+        if stat.st_size != entry.size:
+            return False
+        if stat.st_mtime_ns == entry.mtime_ns:
+            return True
+
+        if file_hash(source_path) != entry.sha256:
+            return False
+        # Same content, new mtime: remember it to skip hashing next time
+        entry.mtime_ns = stat.st_mtime_ns
+        self._dirty = True
+        return True
+
+    def has_entry(self, output_path: str) -> bool:
+        """Whether the output was produced by a recorded conversion."""
+        return self._key(output_path) in self._entries
+
+    def record(self, source_path: str, output_path: str, options: str, chunking: str = ""):
+        """Record a successful conversion."""
+        try:
+            stat = os.stat(source_path)
+            digest = file_hash(source_path)
+        except OSError as e:
+            logger.warning(f"Could not record {source_path} in manifest: {e}")
+            return
+        self._entries[self._key(output_path)] = ManifestEntry(
+            source=str(Path(source_path).resolve()),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            sha256=digest,
+            options=options,
+            tool_version=tool_version(),
+            chunking=chunking,
+            converted_at=datetime.now().isoformat(timespec='seconds')
+        )
+        self._dirty = True
+
+    def set_chunking(self, output_path: str, chunking: str) -> bool:
+        """
+        Update the chunking options of a recorded output whose chunks were regenerated.
+
+        Returns:
+            False if the output is not recorded
+        """
+        entry = self._entries.get(self._key(output_path))
+        if entry is None:
+            return False
+        if entry.chunking != chunking:
+            entry.chunking = chunking
+            self._dirty = True
+        return True
+
+    def remove_orphans(
+        self,
+        source_root: str,
+        before_remove: Optional[Callable[[str, Path], None]] = None
+    ) -> List[str]:
+        """
+        Delete outputs whose source file no longer exists under source_root
+        (markdown, RAG chunks and extracted images) and forget their entries.
+        Nothing is removed if source_root itself is missing (unmounted drive,
+        renamed folder): its sources are unreachable, not deleted.
+
+        Args:
+            source_root: Scanned source folder; entries of other folders are left alone
+            before_remove: Optional callback(source_path, output_path) run before an output is deleted
+
+        Returns:
+            Output paths that were removed
+        """
+        root = Path(source_root).resolve()
+        if not root.is_dir():
+            logger.warning(f"Source folder {root} is missing, not removing orphaned outputs")
+            return []
+
+        removed = []
+        for key, entry in list(self._entries.items()):
+            if root not in Path(entry.source).parents or os.path.exists(entry.source):
+                continue
+
+            output_path = Path(key) if Path(key).is_absolute() else self.root / key
+            if before_remove is not None:
+                before_remove(entry.source, output_path)
+            source_name = Path(entry.source).name
+            for path in (output_path, output_path.with_suffix('.jsonl')):
+                try:
+                    if path.is_file():
+                        path.unlink()
+                except OSError as e:
+                    logger.warning(f"Could not remove orphaned output {path}: {e}")
+            images_dir = output_path.with_name(f"{source_name}_images")
+            if images_dir.is_dir():
+                shutil.rmtree(images_dir, ignore_errors=True)
+
+            del self._entries[key]
+            self._dirty = True
+            removed.append(str(output_path))
+            logger.info(f"Removed orphaned output: {output_path}")
+        return removed
@@ -0,0 +1,358 @@
+"""
+PDF Pages Module
+Page-range helpers for large PDFs: page counting, per-range text and image
+extraction, parallel conversion stitched back together in page order, and
+page-by-page conversion straight to a file for very large documents.
+
+The text helpers reproduce markitdown's PdfConverter range by range, so they
+are only used with the markitdown versions listed in SPLIT_COMPATIBLE_MARKITDOWN.
+"""
+
+import os
+import logging
+from typing import List, Tuple, Optional, Callable, Iterable, Iterator
+
+import text_processor
+from worker_pool import TaskCancelled
+
+logger = logging.getLogger(__name__)
+
+# markitdown versions whose PdfConverter is reproduced here: pdfplumber per page
+# (forms and tables), pdfminer for the whole text when no page is a form,
+# partial numbering lines merged. Other versions convert PDFs whole.
+SPLIT_COMPATIBLE_MARKITDOWN = ("0.1.8",)
+
+# Pages opened at a time when streaming: each open starts a fresh document,
+# so the parser's object cache does not grow with the page count
+STREAM_PAGES_PER_OPEN = 50
+
+
+def _pdf_converter_module():
+    """markitdown's PDF converter module, or None if its output cannot be reproduced by range."""
+    try:
+        from markitdown import __version__
+        from markitdown.converters import _pdf_converter
+    except ImportError:
+        return None
+    if __version__ not in SPLIT_COMPATIBLE_MARKITDOWN or _pdf_converter._dependency_exc_info is not None:
+        return None
+    return _pdf_converter
+
+
+def can_split() -> bool:
+    """Whether PDFs can be converted in page ranges with the same output as a whole conversion."""
+    return _pdf_converter_module() is not None
+
+
+def count_pages(file_path: str) -> int:
+    """
+    Count the pages of a PDF without parsing its content.
+
+    Returns:
+        Page count, or 0 if it cannot be read
+    """
+    try:
+        import fitz  # PyMuPDF
+        with fitz.open(file_path) as doc:
+            return doc.page_count
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.debug(f"PyMuPDF could not count pages of {file_path}: {e}")
+        return 0
+
+    try:
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdftypes import resolve1
+
+        with open(file_path, 'rb') as f:
+            doc = PDFDocument(PDFParser(f))
+            return int(resolve1(doc.catalog['Pages'])['Count'])
+    except Exception as e:
+        logger.debug(f"pdfminer could not count pages of {file_path}: {e}")
+        return 0
+
+
+def page_ranges(page_count: int, pages_per_range: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into consecutive (first, last) ranges, last exclusive."""
+    pages_per_range = max(1, pages_per_range)
+    return [
+        (first, min(first + pages_per_range, page_count))
+        for first in range(0, page_count, pages_per_range)
+    ]
+
+
+def extract_text_range(file_path: str, first: int, last: int) -> str:
+    """
+    Extract the pdfminer text of pages [first, last), as markitdown does for
+    documents without form pages. pdfminer ends every page with a form feed,
+    so ranges concatenate to the whole-document text.
+    """
+    import pdfminer.high_level
+    return pdfminer.high_level.extract_text(file_path, page_numbers=range(first, last))
+
+
+def _plumber_pages(converter, file_path: str, first: int, last: int) -> Iterator[Tuple[bool, Optional[str]]]:
+    """
+    markitdown's pdfplumber pass over pages [first, last): yields (is_form, chunk)
+    per page, chunk being None when the page adds nothing to the markdown.
+    """
+    import pdfplumber
+    with pdfplumber.open(file_path, pages=range(first + 1, last + 1)) as pdf:
+        for page in pdf.pages:
+            content = converter._extract_form_content_from_words(page)
+            if content is not None:
+                chunk = content if content.strip() else None
+            else:
+                text = page.extract_text()
+                chunk = text.strip() if text and text.strip() else None
+            page.close()
+            yield content is not None, chunk
+
+
+def extract_markdown_range(file_path: str, first: int, last: int) -> Optional[Tuple[int, List[str]]]:
+    """
+    Run markitdown's pdfplumber pass on pages [first, last) (runs in a worker).
+
+    Returns:
+        (form page count, page chunks), or None if pdfplumber failed
+        (markitdown then falls back to pdfminer for the whole document)
+    """
+    converter = _pdf_converter_module()
+    form_pages = 0
+    chunks = []
+    try:
+        for is_form, chunk in _plumber_pages(converter, file_path, first, last):
+            form_pages += is_form
+            if chunk:
+                chunks.append(chunk)
+    except Exception as e:
+        logger.debug(f"pdfplumber failed on pages {first}-{last} of {file_path}: {e}")
+        return None
+    return form_pages, chunks
+
+
+def iter_page_text(file_path: str) -> Iterator[str]:
+    """
+    pdfminer text of each page in order, as extract_text gives it one page at
+    a time. Parsed objects are not cached, so memory stays flat however many
+    pages the document has.
+    """
+    import io
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.pdfpage import PDFPage
+
+    with open(file_path, 'rb') as f, io.StringIO() as page_text:
+        resources = PDFResourceManager(caching=True)
+        device = TextConverter(resources, page_text, laparams=LAParams())
+        interpreter = PDFPageInterpreter(resources, device)
+        for page in PDFPage.get_pages(f, caching=False):
+            interpreter.process_page(page)
+            yield page_text.getvalue()
+            page_text.seek(0)
+            page_text.truncate()
+
+
+def merge_partial_numbering_stream(lines: Iterable[str]) -> Iterator[str]:
+    """
+    markitdown's partial numbering merge (".1" on its own line joined with the
+    next non-empty line) over lines given one at a time; yields the output lines.
+    """
+    pattern = _pdf_converter_module().PARTIAL_NUMBERING_PATTERN
+    numbering = None  # Numbering-only line waiting for the next non-empty line
+    blanks = []
+    for line in lines:
+        if numbering is not None:
+            if not line.strip():
+                blanks.append(line)
+                continue
+            yield f"{numbering.strip()} {line.strip()}"
+            numbering = None
+            blanks = []
+        elif pattern.match(line.strip()):
+            numbering = line
+        else:
+            yield line
+    if numbering is not None:
+        yield numbering
+        yield from blanks
+
+
+def convert_pdf_streaming(
+    file_path: str,
+    output_path: str,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None
+) -> int:
+    """
+    Convert a PDF page by page into a markdown file, holding one page in memory.
+    Runs markitdown's pdfplumber pass first; a document without form pages is
+    converted again with pdfminer, as markitdown does.
+
+    Args:
+        file_path: Path to the PDF
+        output_path: File the markdown is written to
+        on_page: Optional callback(pages_done, page_count) after each page of each pass
+        should_stop: Optional cancellation check, polled after each page
+
+    Returns:
+        Number of pages converted
+
+    Raises:
+        TaskCancelled: should_stop turned true
+    """
+    converter = _pdf_converter_module()
+    page_count = count_pages(file_path)
+    pages_path = output_path + '.pages'
+
+    def page_done(pages_done: int):
+        if on_page:
+            on_page(pages_done, page_count)
+        if should_stop and should_stop():
+            raise TaskCancelled("Task cancelled")
+
+    def plumber_pass(f) -> bool:
+        """Write the joined pdfplumber chunks; False if markitdown would use pdfminer instead."""
+        form_pages = 0
+        pages_done = 0
+        pending = None  # Last chunk, written once we know whether it ends the text
+        try:
+            for first, last in page_ranges(page_count, STREAM_PAGES_PER_OPEN):
+                for is_form, chunk in _plumber_pages(converter, file_path, first, last):
+                    form_pages += is_form
+                    if chunk:
+                        if pending is None:
+                            pending = chunk.lstrip()
+                        else:
+                            f.write(pending + "\n\n")
+                            pending = chunk
+                    pages_done += 1
+                    page_done(pages_done)
+        except TaskCancelled:
+            raise
+        except Exception as e:
+            logger.debug(f"pdfplumber failed on {file_path}, using pdfminer: {e}")
+            return False
+        if form_pages == 0 or pending is None:
+            return False
+        f.write(pending.rstrip())
+        return True
+
+    def pdfminer_pass(f):
+        for pages_done, text in enumerate(iter_page_text(file_path), 1):
+            f.write(text)
+            page_done(pages_done)
+
+    try:
+        with open(pages_path, 'w', encoding='utf-8') as f:
+            if not plumber_pass(f):
+                f.seek(0)
+                f.truncate()
+                pdfminer_pass(f)
+
+        def joined(lines: Iterable[str]) -> Iterator[str]:
+            for index, line in enumerate(lines):
+                yield line if index == 0 else "\n" + line
+
+        lines = text_processor.iter_lines(text_processor.file_line_blocks(pages_path))
+        with open(output_path, 'w', encoding='utf-8') as f:
+            # Same post-processing as markitdown, applied across page boundaries
+            for text in text_processor.normalize_markdown_stream(joined(merge_partial_numbering_stream(lines))):
+                f.write(text)
+    finally:
+        if os.path.exists(pages_path):
+            os.remove(pages_path)
+    return page_count
+
+
+def extract_images_range(file_path: str, first: int, last: int, output_dir: str) -> list:
+    """
+    Extract images of pages [first, last) straight to disk (runs in a worker).
+    Files are named after the range ("range_{first}_{n}") until the caller
+    numbers them in document order; only metadata is sent back.
+
+    Returns:
+        Spilled ExtractedImage list (indices local to the range)
+    """
+    from image_handler import ImageExtractor
+    images = []
+    for image in ImageExtractor.extract_from_pdf(file_path, pages=range(first, last)):
+        image.spill(output_dir, f"range_{first:06d}_{image.index:03d}.{image.format}")
+        images.append(image)
+    return images
+
+
+def convert_pdf_parallel(
+    file_path: str,
+    ranges: List[Tuple[int, int]],
+    pool,
+    should_stop: Optional[Callable[[], bool]] = None,
+    deadline: Optional[float] = None
+) -> str:
+    """
+    Convert a PDF by running markitdown's per-page pass on page ranges on a worker pool.
+
+    Args:
+        file_path: Path to the PDF
+        ranges: Page ranges from page_ranges()
+        pool: WorkerPool running the range tasks
+        should_stop: Optional cancellation check; pending ranges are cancelled when it turns true
+        deadline: Optional time.monotonic() limit (WorkerTimeout once passed)
+
+    Returns:
+        Markdown identical to a serial markitdown conversion
+    """
+    converter = _pdf_converter_module()
+    futures = [pool.submit(extract_markdown_range, file_path, first, last, tag=file_path) for first, last in ranges]
+    results = pool.gather(futures, should_stop, deadline)
+
+    markdown = ""
+    if all(result is not None for result in results) and sum(forms for forms, _ in results) > 0:
+        markdown = "\n\n".join(chunk for _, chunks in results for chunk in chunks).strip()
+    if not markdown:
+        # No form page (or pdfplumber failed): markitdown uses pdfminer's text
+        futures = [pool.submit(extract_text_range, file_path, first, last, tag=file_path) for first, last in ranges]
+        markdown = "".join(pool.gather(futures, should_stop, deadline))
+
+    markdown = converter._merge_partial_numbering_lines(markdown)
+    return text_processor.normalize_markdown(markdown)
+
+
+def extract_images_parallel(
+    file_path: str,
+    ranges: List[Tuple[int, int]],
+    pool,
+    output_dir: str,
+    should_stop: Optional[Callable[[], bool]] = None,
+    deadline: Optional[float] = None
+) -> list:
+    """
+    Extract PDF images to disk on a worker pool, numbered in page order as a serial run would.
+
+    Args:
+        file_path: Path to the PDF
+        ranges: Page ranges from page_ranges()
+        pool: WorkerPool running the range tasks
+        output_dir: Directory the images are saved to
+        should_stop: Optional cancellation check
+        deadline: Optional time.monotonic() limit (WorkerTimeout once passed)
+
+    Returns:
+        List of spilled ExtractedImage
+    """
+    futures = [
+        pool.submit(extract_images_range, file_path, first, last, output_dir, tag=file_path)
+        for first, last in ranges
+    ]
+    images = []
+    for range_images in pool.gather(futures, should_stop, deadline):
+        for image in range_images:
+            image.index = len(images) + 1
+            final_path = os.path.join(output_dir, image.filename)
+            os.replace(image.path, final_path)
+            image.path = final_path
+            images.append(image)
+    return images
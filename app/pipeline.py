@@ -0,0 +1,299 @@
+"""
+Conversion Pipeline Module
+Runs the conversion stages (parse -> images -> text -> AI -> write) for many
+files at once. Stages are connected by bounded queues and each stage has its
+own worker count, so CPU-bound parsing overlaps with network-bound AI calls
+and disk writes of other files. Files enter the pipeline under the batch
+engine's format lanes and memory admission, and are parsed on its warm pool.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Callable, Tuple
+
+from converter import MarkdownConverter, ConversionResult
+from worker_pool import WorkerPool, TaskCancelled
+from warm_pool import get_warm_pool, parse_task
+from scheduler import ScheduledJob
+from admission import MemoryAdmission
+
+logger = logging.getLogger(__name__)
+
+# Seconds between queue depth log lines while the pipeline runs
+DEPTH_LOG_INTERVAL = 5.0
+
+# End-of-stream marker passed between stages
+_DONE = object()
+
+def _default_stage_workers() -> Dict[str, int]:
+    return {
+        'parse': os.cpu_count() or 1,
+        'images': 2,
+        'text': 2,
+        'ai': 4,
+        'write': 2,
+    }
+
+
+@dataclass
+class PipelineOptions:
+    """Options for the staged conversion pipeline."""
+    # Worker count per stage (threads; parse threads hand their files to the warm pool)
+    stage_workers: Dict[str, int] = field(default_factory=_default_stage_workers)
+    # Maximum number of files waiting in front of each stage
+    queue_size: int = 8
+    # Wall-clock limit for parsing one file; the parse worker is killed and replaced (None = unlimited)
+    parse_timeout: Optional[float] = 600.0
+
+
+class _Stage:
+    """One pipeline stage: its input queue and the number of live workers."""
+
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._alive = self.workers
+        self._lock = threading.Lock()
+
+    def worker_exited(self) -> bool:
+        """Mark one worker as finished. Returns True for the last one."""
+        with self._lock:
+            self._alive -= 1
+            return self._alive == 0
+
+
+class ConversionPipeline:
+    """
+    Staged conversion of many files.
+    Each file goes through MarkdownConverter.STAGES; a stage failure turns the
+    file into a failed ConversionResult and skips its remaining stages.
+    """
+
+    def __init__(self, converter: MarkdownConverter, options: Optional[PipelineOptions] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            converter: Converter running the non-parse stages and providing the stop flag
+            options: Stage worker counts and queue size
+        """
+        self._converter = converter
+        self._options = options or PipelineOptions()
+        self._stages = [
+            _Stage(name, self._options.stage_workers.get(name, 1), self._options.queue_size)
+            for name in MarkdownConverter.STAGES
+        ]
+        self._results: queue.Queue = queue.Queue()
+        # Admission state, shared by the feed thread and the calling thread
+        self._gate = threading.Condition()
+        self._lanes = None
+        self._admission: Optional[MemoryAdmission] = None
+        # index -> (scheduled job, memory charged to its lane, parse timeout)
+        self._in_flight: Dict[int, Tuple[ScheduledJob, Optional[float], Optional[float]]] = {}
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Number of files waiting in front of each stage (the largest is the bottleneck)."""
+        return {stage.name: stage.queue.qsize() for stage in self._stages}
+
+    def run(
+        self,
+        scheduler,
+        output_dir: Optional[str],
+        overwrite_for: Callable[[str], bool],
+        deliver: Callable[[int, ConversionResult], None],
+        pool: Optional[WorkerPool] = None,
+        lanes=None,
+        admission: Optional[MemoryAdmission] = None
+    ):
+        """
+        Convert every job of a scheduler.
+
+        Args:
+            scheduler: FifoScheduler/CostScheduler giving the feed order
+            output_dir: Optional output directory
+            overwrite_for: Whether a source may overwrite its existing .md file
+            deliver: Called on the calling thread with (job index, result) for each file
+            pool: Warm pool for the parse stage (None = shared pool sized by the parse workers)
+            lanes: Per-format lane tracker of the batch engine (admits/acquire/release/timeout)
+            admission: Memory admission; a file holds its lane and memory until its result is in
+        """
+        parse_pool = pool or get_warm_pool(self._stages[0].workers)
+        self._lanes, self._admission = lanes, admission
+        threads = [threading.Thread(
+            target=self._feed,
+            args=(scheduler, output_dir, overwrite_for),
+            daemon=True
+        )]
+        for position, stage in enumerate(self._stages):
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(position, parse_pool),
+                    daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+
+        last_log = time.monotonic()
+        while True:
+            try:
+                item = self._results.get(timeout=1.0)
+            except queue.Empty:
+                item = None
+
+            if time.monotonic() - last_log >= DEPTH_LOG_INTERVAL:
+                logger.info(f"Pipeline queue depths: {self.queue_depths()}")
+                last_log = time.monotonic()
+
+            if item is _DONE:
+                break
+            if item is not None:
+                index, result = item
+                with self._gate:
+                    scheduler.record(result)
+                    self._release(index)
+                deliver(index, result)
+            self._observe(parse_pool)
+
+        for thread in threads:
+            thread.join()
+
+    def _feed(self, scheduler, output_dir: Optional[str], overwrite_for: Callable[[str], bool]):
+        """Prepare jobs in scheduler order and push them into the first stage."""
+        first = self._stages[0]
+        try:
+            while len(scheduler) and not self._converter.stop_requested:
+                scheduled = self._admit(scheduler)
+                if scheduled is None:
+                    break
+                job = self._converter.prepare_job(scheduled.path, output_dir, overwrite_for(scheduled.path))
+                if isinstance(job, ConversionResult):
+                    self._results.put((scheduled.index, job))
+                else:
+                    job.units = scheduled.units or None
+                    # Blocks while the parse queue is full (backpressure)
+                    first.queue.put((scheduled.index, job))
+        finally:
+            for _ in range(first.workers):
+                first.queue.put(_DONE)
+
+    def _admits(self, job: ScheduledJob) -> bool:
+        if self._lanes is not None and not self._lanes.admits(job):
+            return False
+        return self._admission is None or self._admission.admits(job)
+
+    def _admit(self, scheduler) -> Optional[ScheduledJob]:
+        """Wait until a queued job fits its lane and the memory budget (None on stop)."""
+        with self._gate:
+            while not self._converter.stop_requested:
+                scheduled = scheduler.pop(self._admits)
+                if scheduled is not None:
+                    charged = self._lanes.acquire(scheduled) if self._lanes is not None else None
+                    timeout = self._options.parse_timeout
+                    if self._lanes is not None:
+                        timeout = self._lanes.timeout(scheduled, timeout)
+                    if self._admission is not None:
+                        self._admission.acquire(scheduled)
+                    self._in_flight[scheduled.index] = (scheduled, charged, timeout)
+                    return scheduled
+                # Released when a result comes in
+                self._gate.wait(0.5)
+        return None
+
+    def _release(self, index: int):
+        """Give back the lane slot and memory of a finished file. Caller holds the gate."""
+        entry = self._in_flight.pop(index, None)
+        if entry is None:
+            return
+        scheduled, charged, _ = entry
+        if self._lanes is not None:
+            self._lanes.release(scheduled, charged)
+        if self._admission is not None:
+            self._admission.release(scheduled)
+        self._gate.notify_all()
+
+    def _observe(self, parse_pool: WorkerPool):
+        """Charge the observed RSS of the parse workers to their files."""
+        if self._admission is None:
+            return
+        with self._gate:
+            for scheduled, _, _ in self._in_flight.values():
+                self._admission.attach(scheduled, parse_pool.idle_rss_for(scheduled.path))
+            self._admission.sample()
+
+    def _parse_timeout(self, index: int) -> Optional[float]:
+        with self._gate:
+            entry = self._in_flight.get(index)
+        return entry[2] if entry is not None else self._options.parse_timeout
+
+    def _work(self, position: int, parse_pool: WorkerPool):
+        """Worker loop for one stage."""
+        stage = self._stages[position]
+        next_stage = self._stages[position + 1] if position + 1 < len(self._stages) else None
+
+        while True:
+            item = stage.queue.get()
+            if item is _DONE:
+                if stage.worker_exited():
+                    if next_stage:
+                        for _ in range(next_stage.workers):
+                            next_stage.queue.put(_DONE)
+                    else:
+                        self._results.put(_DONE)
+                return
+
+            index, job = item
+            try:
+                if self._converter.stop_requested:
+                    raise TaskCancelled("Task cancelled")
+                if stage.name == 'parse' and not self._converter.should_split(job.source_path, job.units):
+                    future = parse_pool.submit(
+                        parse_task, job, self._converter.ai_options,
+                        timeout=self._parse_timeout(index),
+                        on_progress=self._converter.forward_page_progress,
+                        tag=job.source_path
+                    )
+                    # A stop request kills the parse worker instead of waiting for it
+                    job = parse_pool.gather([future], lambda: self._converter.stop_requested)[0]
+                elif stage.name == 'parse':
+                    # Split document: its parts fan out from here under the same parse timeout
+                    timeout = self._parse_timeout(index)
+                    job.deadline = time.monotonic() + timeout if timeout else None
+                    try:
+                        self._converter.run_stage(stage.name, job)
+                    finally:
+                        job.deadline = None
+                else:
+                    self._converter.run_stage(stage.name, job)
+            except Exception as e:
+                self._post_failure(index, job, e)
+                continue
+
+            if next_stage:
+                next_stage.queue.put((index, job))
+                continue
+            try:
+                result = self._converter.finish_job(job)
+            except Exception as e:
+                self._post_failure(index, job, e)
+                continue
+            self._results.put((index, result))
+
+    def _post_failure(self, index: int, job, error: Exception):
+        """Post the failure result of a job; run() waits for one result per job, so one is always posted."""
+        try:
+            result = self._converter.fail_job(job, error)
+        except Exception as e:
+            logger.error(f"Could not clean up after {job.source_path}: {e}")
+            result = ConversionResult(
+                source_path=job.source_path,
+                output_path=None,
+                success=False,
+                error_message=str(error)
+            )
+        self._results.put((index, result))
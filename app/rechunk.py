@@ -0,0 +1,205 @@
+"""
+Rechunk Module
+Regenerates RAG chunk files (.jsonl) from existing markdown outputs, e.g.
+after changing the chunk level, without reconverting the sources. Files are
+chunked in parallel on the warm worker pool; manifests are updated so the
+next incremental run does not reconvert the rechunked outputs.
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, List, Callable
+
+import chunker
+import text_processor
+from converter import replace_if_changed
+from chunk_delta import read_chunk_ids, diff_chunk_ids, RunDeltaLog, DELTA_DIR_NAME
+from manifest import Manifest, MANIFEST_NAME, chunking_fingerprint
+from journal import new_job_id
+
+logger = logging.getLogger(__name__)
+
+# Markdown files per worker task (amortises the round trip for small files)
+FILES_PER_TASK = 32
+
+
+@dataclass
+class RechunkResult:
+    """Result of regenerating one chunk file."""
+    markdown_path: str
+    chunks_path: Optional[str]
+    success: bool
+    error_message: Optional[str] = None
+    skipped: bool = False  # Not a converter output
+    chunks: int = 0
+    chunk_delta: Optional[Dict[str, List[str]]] = None
+
+
+def _source_name(markdown_path: Path) -> Optional[str]:
+    """source_file of a converter output's frontmatter (None = not one of our outputs)."""
+    with open(markdown_path, 'r', encoding='utf-8') as f:
+        if f.readline() != '---\n':
+            return None
+        source_name = None
+        for line in f:
+            if line.startswith('---'):
+                return source_name
+            if line.startswith('source_file: ') and source_name is None:
+                source_name = line[len('source_file: '):].strip()
+    return None
+
+
+def rechunk_file(markdown_path: str, chunk_level: int) -> RechunkResult:
+    """
+    Regenerate the .jsonl next to one markdown output (runs in a worker).
+    The markdown is streamed through the chunker and each chunk written as
+    soon as it closes, so memory does not grow with the file size.
+
+    Args:
+        markdown_path: Converter output (.md with source_file frontmatter)
+        chunk_level: Header level to split at
+
+    Returns:
+        RechunkResult (skipped for markdown files that are not converter outputs)
+    """
+    path = Path(markdown_path)
+    try:
+        source_name = _source_name(path)
+        if source_name is None:
+            return RechunkResult(markdown_path, None, True, "Không phải tệp do công cụ tạo ra", skipped=True)
+
+        lines = text_processor.iter_lines(text_processor.file_line_blocks(str(path)))
+        jsonl_path = path.with_suffix('.jsonl')
+        staged = jsonl_path.with_name(jsonl_path.name + ".part")
+        previous_ids = read_chunk_ids(jsonl_path)
+        chunk_ids = []
+        with open(staged, 'w', encoding='utf-8') as f:
+            for chunk in chunker.MarkdownChunker(chunk_level).iter_chunks(lines, source_name):
+                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+                chunk_ids.append(chunk['id'])
+        replace_if_changed(staged, jsonl_path)
+    except Exception as e:
+        return RechunkResult(markdown_path, None, False, str(e))
+
+    return RechunkResult(
+        markdown_path=markdown_path,
+        chunks_path=str(jsonl_path),
+        success=True,
+        chunks=len(chunk_ids),
+        chunk_delta=diff_chunk_ids(previous_ids, chunk_ids)
+    )
+
+
+def rechunk_task(markdown_paths: List[str], chunk_level: int) -> List[RechunkResult]:
+    """Worker task: rechunk several files."""
+    return [rechunk_file(path, chunk_level) for path in markdown_paths]
+
+
+def find_outputs(folder_path: str, recursive: bool = True) -> List[str]:
+    """Markdown files under a folder that may be converter outputs (checked when read)."""
+    folder = Path(folder_path)
+    pattern = "**/*.md" if recursive else "*.md"
+    return sorted(
+        str(path) for path in folder.glob(pattern)
+        if path.is_file() and DELTA_DIR_NAME not in path.parts
+    )
+
+
+def rechunk_folder(
+    folder_path: str,
+    ai_options,
+    recursive: bool = True,
+    workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int, RechunkResult], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None
+) -> List[RechunkResult]:
+    """
+    Regenerate the chunk files of every markdown output under a folder.
+
+    Args:
+        folder_path: Output folder (as written by the converter)
+        ai_options: AIOptions giving the chunk settings (chunk_level)
+        recursive: Include subfolders
+        workers: Worker processes (None = one per CPU core, 1 = in-process)
+        progress_callback: Optional callback(current, total, result)
+        should_stop: Optional cancellation check; unfinished tasks are cancelled
+
+    Returns:
+        List of RechunkResult in completion order
+    """
+    files = find_outputs(folder_path, recursive)
+    if not files:
+        return []
+
+    started = time.monotonic()
+    results: List[RechunkResult] = []
+    deltas = RunDeltaLog(folder_path, new_job_id())
+
+    def deliver(result: RechunkResult):
+        results.append(result)
+        if result.chunk_delta is not None:
+            deltas.add(result.markdown_path, result.chunks_path, result.chunk_delta)
+        if progress_callback:
+            progress_callback(len(results), len(files), result)
+
+    tasks = [files[i:i + FILES_PER_TASK] for i in range(0, len(files), FILES_PER_TASK)]
+    try:
+        if workers == 1:
+            for task in tasks:
+                if should_stop and should_stop():
+                    break
+                for result in rechunk_task(task, ai_options.chunk_level):
+                    deliver(result)
+        else:
+            _run_on_pool(tasks, ai_options.chunk_level, workers, deliver, should_stop)
+    finally:
+        deltas.close()
+        _update_manifests(folder_path, results, chunking_fingerprint(ai_options))
+
+    succeeded = sum(1 for r in results if r.success and not r.skipped)
+    logger.info(f"Rechunked {succeeded}/{len(files)} files in {time.monotonic() - started:.1f}s")
+    return results
+
+
+def _run_on_pool(tasks, chunk_level, workers, deliver, should_stop):
+    from warm_pool import get_warm_pool
+
+    pool = get_warm_pool(max(1, workers or os.cpu_count() or 1))
+    pending = {pool.submit(rechunk_task, task, chunk_level): task for task in tasks}
+    try:
+        while pending:
+            if should_stop and should_stop():
+                break
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = pending.pop(future)
+                try:
+                    task_results = future.result()
+                except Exception as e:
+                    task_results = [RechunkResult(path, None, False, str(e)) for path in task]
+                for result in task_results:
+                    deliver(result)
+    finally:
+        for future in pending:
+            pool.cancel(future)
+
+
+def _update_manifests(folder_path: str, results: List[RechunkResult], chunking: str):
+    """Record the new chunk settings for rechunked outputs in the manifests under the folder."""
+    rechunked = [r.markdown_path for r in results if r.success and not r.skipped]
+    if not rechunked:
+        return
+    folder = Path(folder_path).resolve()
+    # Outputs written next to their sources are recorded in a manifest that may sit above the folder
+    roots = {path.parent for path in folder.glob(f"**/{MANIFEST_NAME}")}
+    roots.update(parent for parent in folder.parents if (parent / MANIFEST_NAME).exists())
+    for root in roots:
+        manifest = Manifest(str(root))
+        for markdown_path in rechunked:
+            manifest.set_chunking(markdown_path, chunking)
+        manifest.save()
@@ -0,0 +1,199 @@
+"""
+Results Store Module
+Local SQLite database of every batch run and the result of each file in it
+(status, error message, duration, options), so failures outlive the window
+and can be re-run on their own.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, List, Any
+
+from manifest import options_fingerprint, options_snapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path.home() / ".markdown-converter" / "results.db"
+
+# Commit at most this often while results stream in (and always when a run ends)
+_COMMIT_INTERVAL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    output_dir TEXT,
+    overwrite INTEGER NOT NULL,
+    options TEXT NOT NULL,
+    ai_options TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    retry_of TEXT,
+    source_root TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    source_path TEXT NOT NULL,
+    output_path TEXT,
+    status TEXT NOT NULL,
+    error_message TEXT,
+    duration REAL NOT NULL,
+    images_extracted INTEGER NOT NULL,
+    images_described INTEGER NOT NULL,
+    duplicate_of TEXT,
+    recorded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results(run_id, status);
+"""
+
+
+@dataclass
+class RunSummary:
+    """A stored run with its result counts (latest result per file)."""
+    run_id: str
+    started: float
+    finished: Optional[float]
+    output_dir: Optional[str]
+    overwrite: bool
+    ai_options: Dict[str, Any]
+    total: int
+    retry_of: Optional[str]
+    counts: Dict[str, int]
+    source_root: Optional[str] = None
+
+
+class ResultsStore:
+    """
+    SQLite store of conversion results, shared by the GUI and the command line.
+    Safe to use from the batch engine's delivery threads.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Open (and create if needed) the results database.
+
+        Args:
+            db_path: Database file (default: ~/.markdown-converter/results.db)
+        """
+        self.path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if 'source_root' not in columns:
+            # Database created before runs recorded their source folder
+            self._conn.execute("ALTER TABLE runs ADD COLUMN source_root TEXT")
+        self._conn.commit()
+        self._last_commit = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def start_run(
+        self,
+        run_id: str,
+        files: List[str],
+        output_dir: Optional[str],
+        overwrite: bool,
+        ai_options,
+        retry_of: Optional[str] = None,
+        source_root: Optional[str] = None
+    ):
+        """Register a run (a resumed run keeps its original record)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started, output_dir, overwrite, options, ai_options, total, retry_of,"
+                " source_root) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, time.time(), os.path.abspath(output_dir) if output_dir else None, int(overwrite), options_fingerprint(ai_options),
+                 json.dumps(options_snapshot(ai_options), default=str), len(files), retry_of,
+                 os.path.abspath(source_root) if source_root else None)
+            )
+            self._conn.commit()
+
+    def record(self, run_id: str, result):
+        """Store one ConversionResult of a run."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO results (run_id, source_path, output_path, status, error_message, duration,"
+                " images_extracted, images_described, duplicate_of, recorded) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, result.source_path, result.output_path, result.status, result.error_message,
+                 result.duration, result.images_extracted, result.images_described,
+                 result.duplicate_of, time.time())
+            )
+            now = time.monotonic()
+            if now - self._last_commit >= _COMMIT_INTERVAL:
+                self._conn.commit()
+                self._last_commit = now
+
+    def finish_run(self, run_id: str):
+        """Mark a run as ended and flush its results."""
+        with self._lock:
+            self._conn.execute("UPDATE runs SET finished = ? WHERE run_id = ?", (time.time(), run_id))
+            self._conn.commit()
+            self._last_commit = time.monotonic()
+
+    def _latest(self, run_id: str) -> List[sqlite3.Row]:
+        """Latest result of every file of a run (a resumed or repeated file counts once)."""
+        return self._conn.execute(
+            "SELECT r.* FROM results r JOIN ("
+            "  SELECT source_path, MAX(id) AS id FROM results WHERE run_id = ? GROUP BY source_path"
+            ") latest ON r.id = latest.id ORDER BY r.id",
+            (run_id,)
+        ).fetchall()
+
+    def get_run(self, run_id: str) -> Optional[RunSummary]:
+        """A run with its result counts, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            counts: Dict[str, int] = {}
+            for result in self._latest(run_id):
+                counts[result['status']] = counts.get(result['status'], 0) + 1
+        return RunSummary(
+            run_id=row['run_id'],
+            started=row['started'],
+            finished=row['finished'],
+            output_dir=row['output_dir'],
+            overwrite=bool(row['overwrite']),
+            ai_options=json.loads(row['ai_options']),
+            total=row['total'],
+            retry_of=row['retry_of'],
+            counts=counts,
+            source_root=row['source_root']
+        )
+
+    def list_runs(self, limit: int = 20) -> List[RunSummary]:
+        """Most recent runs first."""
+        with self._lock:
+            run_ids = [row[0] for row in self._conn.execute(
+                "SELECT run_id FROM runs ORDER BY started DESC LIMIT ?", (limit,)
+            )]
+        return [run for run in map(self.get_run, run_ids) if run is not None]
+
+    def failed_files(self, run_id: str, include_timeouts: bool = True) -> List[str]:
+        """
+        Source files whose latest result in a run is a failure.
+
+        Args:
+            run_id: Run to look at
+            include_timeouts: Also return files killed by the per-file timeout
+
+        Returns:
+            Source paths in the order they finished
+        """
+        statuses = {'failed', 'timeout'} if include_timeouts else {'failed'}
+        with self._lock:
+            return [row['source_path'] for row in self._latest(run_id) if row['status'] in statuses]
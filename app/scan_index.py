@@ -0,0 +1,225 @@
+"""
+Scan Index Module
+Persistent index of a folder tree (directory mtimes and listings) used by
+folder scans. A rescan re-lists only the directories whose mtime changed;
+unchanged directories cost a single stat. Format and depth filters are
+answered from the in-memory index without touching the disk.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import posixpath
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, List, Set, Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = Path.home() / ".markdown-converter" / "scan-index"
+INDEX_FORMAT = 1
+
+# Directories modified this recently are re-listed next time: a change in the
+# same mtime tick as our listing would otherwise go unnoticed
+MTIME_SAFETY_NS = 2 * 1_000_000_000
+
+
+@dataclass
+class _DirListing:
+    """Files and subdirectories of one directory at a given mtime."""
+    mtime_ns: int
+    files: List[str] = field(default_factory=list)
+    dirs: List[str] = field(default_factory=list)
+
+
+class ScanIndex:
+    """
+    Index of one root folder, persisted under ~/.markdown-converter/scan-index.
+    Directories are keyed by their path relative to the root ("" = root).
+    """
+
+    def __init__(self, root: str, index_dir: Optional[str] = None):
+        """
+        Load the index of a root folder (empty if it was never scanned).
+
+        Args:
+            root: Folder to index
+            index_dir: Where index files are stored (default: ~/.markdown-converter/scan-index)
+        """
+        self.root = Path(root).resolve()
+        key = hashlib.sha256(str(self.root).encode('utf-8')).hexdigest()[:24]
+        self.path = Path(index_dir or DEFAULT_INDEX_DIR) / f"{key}.json"
+        self._dirs: Dict[str, _DirListing] = {}
+        # Depth of the last completed refresh (-1 = never, None = whole tree);
+        # listings below it were not checked then and may be stale
+        self._depth: Optional[int] = -1
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') != INDEX_FORMAT or data.get('root') != str(self.root):
+                return
+            self._dirs = {rel: _DirListing(**listing) for rel, listing in data['dirs'].items()}
+            self._depth = data.get('depth', -1)
+        except Exception as e:
+            logger.warning(f"Could not read scan index {self.path}: {e}")
+            self._dirs, self._depth = {}, -1
+
+    def save(self):
+        """Write the index atomically (only if it changed)."""
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(self.path.name + ".part")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'format': INDEX_FORMAT,
+                    'root': str(self.root),
+                    'depth': self._depth,
+                    'dirs': {
+                        rel: {'mtime_ns': d.mtime_ns, 'files': d.files, 'dirs': d.dirs}
+                        for rel, d in self._dirs.items()
+                    },
+                }, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Could not save scan index {self.path}: {e}")
+
+    def covers(self, max_depth: Optional[int]) -> bool:
+        """Whether the index is current down to `max_depth` levels (None = whole tree)."""
+        if self._depth is None:
+            return True
+        if max_depth is None:
+            return False
+        return self._depth >= max_depth
+
+    def _list(self, dir_path: Path, mtime_ns: int) -> Optional[_DirListing]:
+        """Read one directory from disk."""
+        if time.time_ns() - mtime_ns < MTIME_SAFETY_NS:
+            # Too fresh to trust: force a re-list on the next refresh
+            mtime_ns = -1
+        listing = _DirListing(mtime_ns=mtime_ns)
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            listing.files.append(entry.name)
+                        elif entry.is_dir():
+                            listing.dirs.append(entry.name)
+                    except OSError:
+                        continue
+        except PermissionError:
+            logger.warning(f"Permission denied: {dir_path}")
+            return None
+        except OSError as e:
+            logger.warning(f"Could not list {dir_path}: {e}")
+            return None
+        return listing
+
+    def refresh(
+        self,
+        max_depth: Optional[int] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> bool:
+        """
+        Bring the index up to date with the disk down to `max_depth` levels.
+        Every directory is stat'ed; only those whose mtime changed are listed again.
+
+        Args:
+            max_depth: Levels below the root to visit (0 = root only, None = whole tree)
+            should_stop: Optional cancellation check
+
+        Returns:
+            False if the refresh was cancelled
+        """
+        visited: Set[str] = set()
+        listed = 0
+        stack = [("", 0)]
+
+        while stack:
+            if should_stop and should_stop():
+                return False
+
+            rel, depth = stack.pop()
+            dir_path = self.root / rel if rel else self.root
+            try:
+                mtime_ns = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                continue
+
+            listing = self._dirs.get(rel)
+            if listing is None or listing.mtime_ns != mtime_ns:
+                listing = self._list(dir_path, mtime_ns)
+                if listing is None:
+                    self._dirs.pop(rel, None)
+                    continue
+                self._dirs[rel] = listing
+                listed += 1
+            visited.add(rel)
+
+            if max_depth is None or depth < max_depth:
+                for name in listing.dirs:
+                    stack.append((posixpath.join(rel, name) if rel else name, depth + 1))
+
+        # Forget directories that disappeared within the refreshed depth
+        for rel in list(self._dirs):
+            if rel in visited:
+                continue
+            depth = rel.count('/') + 1 if rel else 0
+            if max_depth is None or depth <= max_depth:
+                del self._dirs[rel]
+                self._dirty = True
+
+        # A shallower refresh than the previous one leaves the deeper listings unchecked
+        if self._depth != max_depth:
+            self._depth = max_depth
+            self._dirty = True
+        if listed:
+            self._dirty = True
+        logger.debug(f"Scan index: {len(visited)} folders checked, {listed} re-listed")
+        return True
+
+    def files(
+        self,
+        max_depth: Optional[int] = None,
+        allowed_extensions: Optional[Set[str]] = None,
+        exclude: Optional[Set[str]] = None
+    ) -> List[str]:
+        """
+        Files of the indexed tree, answered from memory.
+
+        Args:
+            max_depth: Levels below the root to include (0 = root only, None = all)
+            allowed_extensions: Lowercase extensions to keep (None = all)
+            exclude: File names to leave out
+
+        Returns:
+            Sorted absolute file paths
+        """
+        result = []
+        stack = [("", 0)]
+        while stack:
+            rel, depth = stack.pop()
+            listing = self._dirs.get(rel)
+            if listing is None:
+                continue
+            dir_path = self.root / rel if rel else self.root
+            for name in listing.files:
+                if exclude and name in exclude:
+                    continue
+                if allowed_extensions is None or os.path.splitext(name)[1].lower() in allowed_extensions:
+                    result.append(str(dir_path / name))
+            if max_depth is None or depth < max_depth:
+                for name in listing.dirs:
+                    stack.append((posixpath.join(rel, name) if rel else name, depth + 1))
+        return sorted(result)
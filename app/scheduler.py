@@ -0,0 +1,207 @@
+"""
+Batch Scheduler Module
+Orders batch conversion work longest-job-first using a simple cost model.
+Estimated cost = weighted size / learned throughput of the file's format.
+"""
+
+import os
+import re
+import logging
+import zipfile
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Dict, Callable
+
+import pdf_pages
+from converter import MarkdownConverter, ConversionResult
+
+logger = logging.getLogger(__name__)
+
+# Bytes of work charged for each page/slide/sheet on top of the file size
+UNIT_WEIGHT_BYTES = 64 * 1024
+
+# Initial throughput (weighted bytes per second) before any file has completed
+DEFAULT_BYTES_PER_SECOND = 2 * 1024 * 1024
+
+# Weight of the newest observation in the throughput moving average
+LEARNING_RATE = 0.3
+
+# docProps/app.xml counters written by Office for each format
+_APP_XML_COUNTERS = {
+    '.docx': re.compile(rb'<Pages>(\d+)</Pages>'),
+    '.pptx': re.compile(rb'<Slides>(\d+)</Slides>'),
+}
+_XLSX_SHEET = re.compile(rb'<sheet\b')
+
+
+def count_units(file_path: str) -> int:
+    """
+    Count pages, slides or sheets by reading only document headers.
+
+    Args:
+        file_path: Path to the document
+
+    Returns:
+        Number of units, or 0 if unknown
+    """
+    ext = Path(file_path).suffix.lower()
+
+    try:
+        if ext == '.pdf':
+            return pdf_pages.count_pages(file_path)
+
+        if ext in _APP_XML_COUNTERS:
+            with zipfile.ZipFile(file_path) as zf:
+                match = _APP_XML_COUNTERS[ext].search(zf.read('docProps/app.xml'))
+                return int(match.group(1)) if match else 0
+
+        if ext == '.xlsx':
+            with zipfile.ZipFile(file_path) as zf:
+                return len(_XLSX_SHEET.findall(zf.read('xl/workbook.xml')))
+    except Exception as e:
+        logger.debug(f"Could not read units from {file_path}: {e}")
+
+    return 0
+
+
+@dataclass
+class ScheduledJob:
+    """A file waiting to be converted, with its cost estimate inputs."""
+    index: int
+    path: str
+    format_name: str
+    size: int
+    units: int
+
+    @property
+    def weight(self) -> float:
+        """Size-based work estimate (format independent)."""
+        return self.size + self.units * UNIT_WEIGHT_BYTES
+
+
+class FifoScheduler:
+    """
+    Input-order scheduler with one queue per format lane.
+
+    Jobs are kept in one queue per format category. `pop` compares only the
+    queue heads, so a lane that is currently full can be skipped cheaply.
+    """
+
+    def __init__(self, files: List[str]):
+        """
+        Build the schedule.
+
+        Args:
+            files: Source file paths (their list index is kept as job index)
+        """
+        self._queues: Dict[str, deque] = {}
+        self._jobs_by_path: Dict[str, ScheduledJob] = {}
+
+        jobs = [self._make_job(index, path) for index, path in enumerate(files)]
+        for job in self._order(jobs):
+            self._queues.setdefault(job.format_name, deque()).append(job)
+            self._jobs_by_path[job.path] = job
+
+    def _make_job(self, index: int, path: str) -> ScheduledJob:
+        ext = Path(path).suffix.lower()
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        return ScheduledJob(
+            index=index,
+            path=path,
+            format_name=MarkdownConverter.get_format_for_extension(ext) or 'Text',
+            size=size,
+            units=0
+        )
+
+    def _order(self, jobs: List[ScheduledJob]) -> List[ScheduledJob]:
+        """Order of jobs inside each lane queue."""
+        return jobs
+
+    def _rank(self, job: ScheduledJob) -> float:
+        """Priority of a lane head (highest is popped first)."""
+        return -job.index
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def pop(self, admits: Optional[Callable[[ScheduledJob], bool]] = None) -> Optional[ScheduledJob]:
+        """
+        Remove and return the highest-ranked lane head.
+
+        Args:
+            admits: Optional predicate; lane heads it rejects are left queued
+
+        Returns:
+            The next job, or None if no lane head can run now
+        """
+        best_name = None
+        best_rank = None
+        for name, queue in self._queues.items():
+            if not queue or (admits and not admits(queue[0])):
+                continue
+            rank = self._rank(queue[0])
+            if best_rank is None or rank > best_rank:
+                best_name, best_rank = name, rank
+
+        if best_name is None:
+            return None
+        return self._queues[best_name].popleft()
+
+    def record(self, result: ConversionResult):
+        """Hook called with every completed conversion."""
+        pass
+
+
+class CostScheduler(FifoScheduler):
+    """
+    Longest-job-first scheduler with per-format throughput learning.
+
+    Each lane queue is sorted by weight and the lane head with the largest
+    estimated seconds runs next, so re-ranking after a throughput update
+    only compares lane heads.
+    """
+
+    def __init__(self, files: List[str]):
+        self._bytes_per_second: Dict[str, float] = {}
+        super().__init__(files)
+
+    def _make_job(self, index: int, path: str) -> ScheduledJob:
+        job = super()._make_job(index, path)
+        job.units = count_units(path)
+        return job
+
+    def _order(self, jobs: List[ScheduledJob]) -> List[ScheduledJob]:
+        return sorted(jobs, key=lambda job: job.weight, reverse=True)
+
+    def _rank(self, job: ScheduledJob) -> float:
+        return self.estimate_seconds(job)
+
+    def bytes_per_second(self, format_name: str) -> float:
+        """Current throughput estimate for a format category."""
+        if format_name in self._bytes_per_second:
+            return self._bytes_per_second[format_name]
+        factor = MarkdownConverter.FORMAT_COST_FACTORS.get(format_name, 1.0)
+        return DEFAULT_BYTES_PER_SECOND / factor
+
+    def estimate_seconds(self, job: ScheduledJob) -> float:
+        """Estimated conversion time for a job."""
+        return job.weight / self.bytes_per_second(job.format_name)
+
+    def record(self, result: ConversionResult):
+        """Learn format throughput from a completed conversion."""
+        job = self._jobs_by_path.get(result.source_path)
+        if job is None or not result.success or result.skipped or result.duration <= 0:
+            return
+
+        observed = job.weight / result.duration
+        current = self._bytes_per_second.get(job.format_name)
+        if current is None:
+            self._bytes_per_second[job.format_name] = observed
+        else:
+            self._bytes_per_second[job.format_name] = (
+                (1 - LEARNING_RATE) * current + LEARNING_RATE * observed
+            )
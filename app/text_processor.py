@@ -6,10 +6,19 @@ Handles text cleaning, encoding detection, and Japanese-specific optimizations.
 import re
 import unicodedata
 import logging
-from typing import Optional
+from typing import Optional, Iterable, Iterator
 
 logger = logging.getLogger(__name__)
 
+# Characters per block when a document is processed or written in pieces
+BLOCK_SIZE = 1 << 20
+
+# Where streamed text may be cut so that cleaning the parts gives the same result
+# as cleaning the whole: before a character NFKC never combines with what precedes
+# it (ASCII, kana, CJK ideographs; quick check Yes, combining class 0), after a
+# character that cannot belong to a removable run of spaces (space, tab, ZWSP)
+_SAFE_BOUNDARY = re.compile(r'(?<![ \t\u200b])(?=[\n\r!-~\u3041-\u3096\u30a1-\u30fa\u4e00-\u9fff])')
+
 try:
     import chardet
     HAS_CHARDET = True
@@ -75,6 +84,61 @@ def normalize_width(text: str) -> str:
     """
     return unicodedata.normalize('NFKC', text)
 
+def file_line_blocks(file_path: str, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """Read a UTF-8 text file in blocks of about block_size characters that end on a line break."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            if not block.endswith('\n'):
+                block += f.readline()
+            yield block
+
+def iter_lines(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Lines of the concatenated pieces without building it (same as "".join(pieces).split('\n')).
+    """
+    pending = ""
+    for piece in pieces:
+        lines = (pending + piece).split('\n')
+        pending = lines.pop()
+        yield from lines
+    yield pending
+
+def normalize_markdown(text: str) -> str:
+    """
+    Apply the whitespace normalization MarkItDown.convert runs on every result:
+    strip trailing spaces and collapse runs of blank lines.
+    Used when a document is converted in parts and assembled here.
+    """
+    text = "\n".join([line.rstrip() for line in re.split(r"\r?\n", text)])
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+def normalize_markdown_stream(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    normalize_markdown for text given in pieces (e.g. page by page): yields the
+    normalized text piece by piece, so "".join() of the result equals
+    normalize_markdown("".join(pieces)). Only the current line is held back.
+    """
+    pending = ""
+    newlines = 0  # Line breaks not written yet (runs of 3+ collapse to 2)
+    for piece in pieces:
+        lines = (pending + piece).split('\n')
+        pending = lines.pop()
+        out = []
+        for line in lines:
+            line = line.rstrip()
+            if line:
+                out.append('\n' * min(newlines, 2))
+                out.append(line)
+                newlines = 0
+            newlines += 1
+        yield "".join(out)
+
+    pending = pending.rstrip()
+    yield '\n' * min(newlines, 2) + pending
+
 def clean_japanese_text(text: str) -> str:
     """
     Clean Japanese text for better RAG/Markdown quality.
@@ -106,3 +170,38 @@ def clean_japanese_text(text: str) -> str:
     text = re.sub(pattern, "", text)
 
     return text
+
+def clean_text(text: str) -> str:
+    """Clean text for RAG: remove spaces between Japanese characters, then normalize width."""
+    return normalize_width(clean_japanese_text(text))
+
+def clean_text_stream(pieces: Iterable[str], block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """
+    clean_text for text given in pieces of any size: yields the cleaned text
+    block by block, so "".join() of the result equals clean_text("".join(pieces)).
+    Blocks are cut only where neither an NFKC combining sequence nor a run of
+    spaces between Japanese characters can straddle the cut; the undecided
+    tail is carried into the next block.
+
+    Args:
+        pieces: Text in pieces (e.g. blocks read from a file)
+        block_size: Characters per cleaned block (memory bound besides the pieces)
+    """
+    pending = ""
+    for piece in pieces:
+        for start in range(0, len(piece), block_size):
+            pending += piece[start:start + block_size]
+            if len(pending) < block_size:
+                continue
+            # Last safe cut, looked for near the end first
+            cut = 0
+            for window in (block_size // 8, len(pending)):
+                for match in _SAFE_BOUNDARY.finditer(pending, max(1, len(pending) - window)):
+                    cut = match.start()
+                if cut:
+                    break
+            if cut:
+                yield clean_text(pending[:cut])
+                pending = pending[cut:]
+    if pending:
+        yield clean_text(pending)
@@ -0,0 +1,149 @@
+"""
+Warm Pool Module
+Long-lived worker processes shared by every batch (library calls and GUI runs).
+Workers import markitdown, pdfminer, openpyxl, python-pptx and PyMuPDF once,
+through a forkserver with preloaded modules where the platform allows it, and
+keep a ready MarkdownConverter so short files do not pay the start-up cost.
+"""
+
+import sys
+import atexit
+import logging
+import threading
+import multiprocessing
+from typing import Optional
+
+from converter import MarkdownConverter, ConversionJob, ConversionResult, AIOptions
+from worker_pool import WorkerPool, report_progress
+
+logger = logging.getLogger(__name__)
+
+# Imported once in the forkserver and inherited by every forked worker
+PRELOAD_MODULES = [
+    'converter',
+    'pdf_pages',
+    'excel_sheets',
+    'markitdown',
+    'pdfminer.high_level',
+    'openpyxl',
+    'pandas',
+    'docx',
+    'pptx',
+    'fitz',
+    'PIL.Image',
+]
+
+# Recycle workers to contain memory leaks in the parsing libraries
+DEFAULT_MAX_TASKS_PER_WORKER = 200
+DEFAULT_MAX_RSS_GROWTH_MB = 1024
+
+# Converter owned by each worker process (created by _warm_up)
+_worker_converter: Optional[MarkdownConverter] = None
+
+_pool: Optional[WorkerPool] = None
+_pool_key: Optional[tuple] = None
+_pool_lock = threading.Lock()
+
+
+def _warm_up():
+    """Build the worker's MarkItDown instance before the first task arrives."""
+    global _worker_converter
+    _worker_converter = MarkdownConverter()
+    # Page-by-page conversions report their pages to the task's on_progress in the parent
+    _worker_converter.set_page_callback(report_progress)
+
+
+def _get_converter(ai_options: AIOptions) -> MarkdownConverter:
+    if _worker_converter is None:
+        _warm_up()
+    _worker_converter.set_ai_options(ai_options)
+    return _worker_converter
+
+
+def convert_task(
+    source_path: str,
+    output_dir: Optional[str],
+    overwrite: bool,
+    ai_options: AIOptions,
+    units: Optional[int] = None
+) -> ConversionResult:
+    """Convert a single file inside a warm worker (units: page/sheet count if known)."""
+    return _get_converter(ai_options).convert_file(source_path, output_dir, overwrite=overwrite, units=units)
+
+
+def parse_task(job: ConversionJob, ai_options: AIOptions) -> ConversionJob:
+    """Run the parse stage of a job inside a warm worker."""
+    _get_converter(ai_options).run_stage('parse', job)
+    return job
+
+
+def start_method() -> str:
+    """forkserver where available (preloaded imports), spawn otherwise (Windows, frozen builds)."""
+    if getattr(sys, 'frozen', False):
+        return "spawn"
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return "spawn"
+    return "forkserver"
+
+
+def get_warm_pool(
+    size: int,
+    max_tasks_per_worker: Optional[int] = DEFAULT_MAX_TASKS_PER_WORKER,
+    max_rss_growth_mb: Optional[int] = DEFAULT_MAX_RSS_GROWTH_MB
+) -> WorkerPool:
+    """
+    Get the shared warm pool, starting it (or restarting it with new limits) if needed.
+
+    Args:
+        size: Number of worker processes
+        max_tasks_per_worker: Recycle a worker after this many files (None = never)
+        max_rss_growth_mb: Recycle a worker after this much RSS growth (None = never)
+
+    Returns:
+        The shared WorkerPool
+    """
+    global _pool, _pool_key
+
+    key = (size, max_tasks_per_worker, max_rss_growth_mb)
+    with _pool_lock:
+        if _pool is not None and not _pool.closed and _pool_key == key:
+            return _pool
+
+        if _pool is not None:
+            _pool.shutdown()
+
+        method = start_method()
+        if method == "forkserver":
+            multiprocessing.get_context(method).set_forkserver_preload(PRELOAD_MODULES)
+
+        logger.info(f"Starting {size} warm workers ({method})")
+        _pool = WorkerPool(
+            size,
+            initializer=_warm_up,
+            context=method,
+            max_tasks_per_worker=max_tasks_per_worker,
+            max_rss_growth_mb=max_rss_growth_mb
+        )
+        _pool_key = key
+        return _pool
+
+
+def running_warm_pool(size: int) -> WorkerPool:
+    """The shared warm pool as currently configured, started with `size` workers if none is running."""
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            return _pool
+    return get_warm_pool(size)
+
+
+def shutdown_warm_pool(kill: bool = False):
+    """Stop the shared warm pool (e.g. when the application closes)."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(kill=kill)
+        _pool = None
+        _pool_key = None
+
+
+atexit.register(shutdown_warm_pool, kill=True)
@@ -0,0 +1,360 @@
+"""
+Watcher Module
+Watch mode: keeps a folder's markdown outputs in sync with its sources.
+File system events (inotify/FSEvents/ReadDirectoryChangesW through watchdog,
+or a polling fallback on the scan index) are debounced, then only the added
+or modified files are converted and outputs of deleted sources are removed.
+"""
+
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional, Dict, List, Set, Tuple, Callable
+
+from converter import MarkdownConverter, ConversionResult
+from batch_engine import BatchOptions
+from manifest import Manifest, MANIFEST_NAME
+from chunk_delta import RunDeltaLog
+from journal import new_job_id
+
+logger = logging.getLogger(__name__)
+
+# Optional dependency: native file system events
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+    FileSystemEventHandler = object
+
+
+@dataclass
+class WatchOptions:
+    """Options for watch mode."""
+    recursive: bool = True
+    # Maximum depth below the watched folder (None = unlimited)
+    max_depth: Optional[int] = None
+    # Format categories to convert (None = all supported)
+    allowed_formats: Optional[List[str]] = None
+    # Seconds without events (and without size change) before a file is converted
+    debounce: float = 2.0
+    # Scan interval of the polling fallback in seconds
+    poll_interval: float = 2.0
+    # Poll even if watchdog is installed (network shares do not deliver remote events)
+    use_polling: bool = False
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards watchdog events to the watcher."""
+
+    def __init__(self, watcher: 'FolderWatcher'):
+        self._watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ('created', 'modified', 'closed'):
+            self._watcher.notify_changed(event.src_path, event.is_directory)
+        elif event.event_type == 'deleted':
+            self._watcher.notify_deleted(event.src_path)
+        elif event.event_type == 'moved':
+            self._watcher.notify_deleted(event.src_path)
+            self._watcher.notify_changed(event.dest_path, event.is_directory)
+
+
+class FolderWatcher:
+    """
+    Watches a source folder and converts what changes.
+    A catch-up sync (incremental, through the manifest) runs first, so changes
+    made while the watcher was not running are picked up too. Event batches go
+    through the manifest as well, so a touch or a save without content change
+    converts nothing; they keep no job journal and no results store run.
+    """
+
+    def __init__(
+        self,
+        converter: MarkdownConverter,
+        folder_path: str,
+        output_dir: Optional[str] = None,
+        options: Optional[WatchOptions] = None,
+        progress_callback: Optional[Callable[[int, int, ConversionResult], None]] = None
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            converter: Converter with AI and batch options set
+            folder_path: Source folder to watch
+            output_dir: Optional output directory (None = next to the sources)
+            options: Watch options
+            progress_callback: Optional callback(current, total, result) per converted file
+        """
+        self._converter = converter
+        self._folder = Path(folder_path).resolve()
+        self._output_dir = output_dir
+        self._output_root = Path(output_dir).resolve() if output_dir else None
+        self._options = options or WatchOptions()
+        self._progress_callback = progress_callback
+
+        batch_options = converter.batch_options or BatchOptions()
+        self._sync_options = replace(batch_options, incremental=True)
+        self._event_options = replace(self._sync_options, journal=False, results_store=False)
+
+        if self._options.allowed_formats:
+            self._extensions = converter.get_extensions_for_formats(self._options.allowed_formats)
+        else:
+            self._extensions = converter.get_all_extensions()
+
+        # path -> (time of the last event, size seen then); deleted paths separately
+        self._changed: Dict[str, Tuple[float, int]] = {}
+        self._deleted: Set[str] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._observer = None
+
+    @property
+    def backend(self) -> str:
+        """Event source in use: "watchdog" or "polling"."""
+        return "watchdog" if HAS_WATCHDOG and not self._options.use_polling else "polling"
+
+    def _depth_of(self, path: Path) -> Optional[int]:
+        """Folder depth of a file below the watched folder (None = outside)."""
+        try:
+            return len(path.relative_to(self._folder).parts) - 1
+        except ValueError:
+            return None
+
+    def accepts(self, file_path: str) -> bool:
+        """Whether a path is a source file the watcher converts (not one of our outputs)."""
+        path = Path(file_path)
+        if path.suffix.lower() not in self._extensions:
+            return False
+        if path.name == MANIFEST_NAME or path.name.startswith('cleaned_') or path.name.endswith('.part'):
+            return False
+        if self._output_root is not None and self._output_root in path.parents:
+            return False
+        if any(parent.name.endswith('_images') or parent.name.endswith('_images.part')
+               for parent in path.parents):
+            # Images extracted from a converted document
+            return False
+
+        depth = self._depth_of(path)
+        if depth is None:
+            return False
+        if depth > 0 and not self._options.recursive:
+            return False
+        if self._options.max_depth is not None and depth > self._options.max_depth:
+            return False
+        return True
+
+    def notify_changed(self, path: str, is_directory: bool = False):
+        """Record that a file (or every file of a folder moved in) was created or modified."""
+        if is_directory:
+            for dirpath, _, filenames in os.walk(path):
+                for name in filenames:
+                    self.notify_changed(os.path.join(dirpath, name))
+            return
+        if not self.accepts(path):
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            self._changed[path] = (time.monotonic(), size)
+            self._deleted.discard(path)
+        self._wakeup.set()
+
+    def notify_deleted(self, path: str):
+        """Record that a file or folder was deleted or moved away."""
+        with self._lock:
+            self._changed.pop(path, None)
+            self._deleted.add(path)
+        self._wakeup.set()
+
+    def sync(self) -> List[ConversionResult]:
+        """Convert every new or changed file of the folder (incremental catch-up)."""
+        files = self._converter.scan_folder(
+            str(self._folder),
+            recursive=self._options.recursive,
+            max_depth=self._options.max_depth,
+            allowed_extensions=self._extensions
+        )
+        files = [f for f in files if self.accepts(f)]
+        logger.info(f"Watch: catch-up sync of {len(files)} files in {self._folder}")
+        self._converter.set_batch_options(self._sync_options)
+        return self._converter.convert_files(
+            files,
+            output_dir=self._output_dir,
+            progress_callback=self._progress_callback,
+            source_root=str(self._folder)
+        )
+
+    def start(self, initial_sync: bool = True):
+        """
+        Start watching (returns immediately; conversions run on a background thread).
+
+        Args:
+            initial_sync: Run a catch-up sync before processing events
+        """
+        self._converter.reset_stop()
+        # Watch before the sync, so changes made while it runs are not missed
+        if self.backend == "watchdog":
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), str(self._folder), recursive=self._options.recursive)
+            self._observer.start()
+        else:
+            self._threads.append(threading.Thread(
+                target=self._poll_loop, args=(self._snapshot(),), name="watch-poll", daemon=True
+            ))
+
+        if initial_sync:
+            self.sync()
+
+        self._threads.append(threading.Thread(target=self._process_loop, name="watch-convert", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Watching {self._folder} ({self.backend})")
+
+    def stop(self):
+        """Stop watching and cancel the conversion in progress."""
+        self._stopped.set()
+        self._wakeup.set()
+        self._converter.request_stop()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def run_forever(self):
+        """Watch until stop() is called or Ctrl+C is pressed."""
+        self.start()
+        try:
+            while not self._stopped.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """{path: (size, mtime_ns)} of the watched files (polling backend)."""
+        files = self._converter.scan_folder(
+            str(self._folder),
+            recursive=self._options.recursive,
+            max_depth=self._options.max_depth,
+            allowed_extensions=self._extensions
+        )
+        snapshot = {}
+        for file_path in files:
+            if not self.accepts(file_path):
+                continue
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[file_path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _poll_loop(self, previous: Dict[str, Tuple[int, int]]):
+        while not self._stopped.wait(self._options.poll_interval):
+            current = self._snapshot()
+            if self._stopped.is_set():
+                return
+            for file_path, state in current.items():
+                if previous.get(file_path) != state:
+                    self.notify_changed(file_path)
+            for file_path in previous.keys() - current.keys():
+                self.notify_deleted(file_path)
+            previous = current
+
+    def _take_ready(self) -> Tuple[List[str], List[str]]:
+        """Files quiet for the debounce interval with a stable size, and deleted paths."""
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for file_path, (last_event, size) in list(self._changed.items()):
+                if now - last_event < self._options.debounce:
+                    continue
+                try:
+                    current_size = os.path.getsize(file_path)
+                except OSError:
+                    # Gone again before it settled
+                    del self._changed[file_path]
+                    continue
+                if current_size != size:
+                    # Still being written without events (e.g. network share)
+                    self._changed[file_path] = (now, current_size)
+                    continue
+                del self._changed[file_path]
+                ready.append(file_path)
+            deleted = sorted(self._deleted)
+            self._deleted.clear()
+        return sorted(ready), deleted
+
+    def _process_loop(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(min(0.5, self._options.debounce))
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+
+            ready, deleted = self._take_ready()
+            if deleted:
+                self._remove_outputs()
+            if ready:
+                logger.info(f"Watch: converting {len(ready)} changed files")
+                self._converter.set_batch_options(self._event_options)
+                recorded, unrecorded = self._split_recorded(ready)
+                # The manifest decides for recorded outputs; an output without a record
+                # was not written by a watched conversion and is replaced
+                for files, overwrite in ((recorded, False), (unrecorded, True)):
+                    if not files or self._stopped.is_set():
+                        continue
+                    try:
+                        self._converter.convert_files(
+                            files,
+                            output_dir=self._output_dir,
+                            overwrite=overwrite,
+                            progress_callback=self._progress_callback,
+                            source_root=str(self._folder)
+                        )
+                    except Exception as e:
+                        logger.error(f"Watch: conversion failed: {e}", exc_info=True)
+
+    def _split_recorded(self, files: List[str]) -> Tuple[List[str], List[str]]:
+        """Files whose output is recorded in the manifest, and the others."""
+        manifest = Manifest(str(self._output_root or self._folder))
+        recorded, unrecorded = [], []
+        for file_path in files:
+            output_path = str(self._converter.output_path_for(file_path, self._output_dir))
+            (recorded if manifest.has_entry(output_path) else unrecorded).append(file_path)
+        return recorded, unrecorded
+
+    def _remove_outputs(self):
+        """Remove recorded outputs whose source no longer exists (after delete events)."""
+        # Batches of the watched folder keep their manifest in the output root or the folder itself
+        root = self._output_root or self._folder
+        if not (root / MANIFEST_NAME).exists():
+            return
+        deltas = RunDeltaLog(str(root), new_job_id())
+        try:
+            manifest = Manifest(str(root))
+            removed = manifest.remove_orphans(
+                str(self._folder),
+                lambda source, output: deltas.add_removed(source, output.with_suffix('.jsonl'))
+            )
+            manifest.save()
+        except OSError as e:
+            logger.warning(f"Watch: could not clean outputs in {root}: {e}")
+            return
+        finally:
+            deltas.close()
+        if removed:
+            logger.info(f"Watch: removed {len(removed)} outputs of deleted sources")
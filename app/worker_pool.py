@@ -0,0 +1,517 @@
+"""
+Worker Pool Module
+Process pool with killable workers. Unlike ProcessPoolExecutor, a single hung
+or crashed worker can be terminated and replaced without breaking the pool,
+which lets the batch engine enforce a wall-clock timeout per file.
+Workers can also retire themselves after N tasks or too much RSS growth.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, wait
+from multiprocessing import connection
+from typing import Optional, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+# How often the monitor thread checks deadlines (seconds)
+POLL_INTERVAL = 0.1
+
+# Connection to the parent while this process is a worker (used by report_progress)
+_progress_conn = None
+
+
+def read_rss(pid: int) -> Optional[int]:
+    """Resident set size of a process in bytes, or None if it cannot be read."""
+    if HAS_PSUTIL:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except Exception:
+            return None
+
+    if sys.platform.startswith('linux'):
+        try:
+            with open(f"/proc/{pid}/status", 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            return None
+
+    return None
+
+
+def can_fan_out() -> bool:
+    """
+    Whether this process may hand sub-tasks to a worker pool.
+    Worker processes are daemonic and cannot start or use a pool themselves.
+    """
+    return not multiprocessing.current_process().daemon
+
+
+def report_progress(*args):
+    """
+    Send progress of the running task to the parent, where the task's
+    on_progress(*args) callback receives it. No-op outside a worker.
+    """
+    if _progress_conn is not None:
+        _progress_conn.send((None, args, False))
+
+
+class WorkerTimeout(TimeoutError):
+    """A task exceeded its timeout and its worker was terminated."""
+
+
+class WorkerCrashed(RuntimeError):
+    """A worker process died while running a task."""
+
+
+class TaskCancelled(RuntimeError):
+    """A task was cancelled by a stop request (its worker, if running, was terminated)."""
+
+
+def _worker_main(
+    conn,
+    initializer: Optional[Callable],
+    initargs: tuple,
+    max_tasks: Optional[int],
+    max_rss_growth: Optional[int]
+):
+    """
+    Entry point of a worker process: run tasks received on `conn` until told to stop.
+    Every reply is (ok, value, retiring); a retiring worker exits after replying.
+    Progress sent while a task runs is (None, args, False).
+    """
+    global _progress_conn
+    _progress_conn = conn
+
+    if initializer:
+        initializer(*initargs)
+
+    baseline = read_rss(os.getpid())
+    tasks_done = 0
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+
+        fn, args = task
+        try:
+            ok, value = True, fn(*args)
+        except Exception as e:
+            ok, value = False, e
+
+        tasks_done += 1
+        retiring = bool(max_tasks and tasks_done >= max_tasks)
+        if max_rss_growth and baseline and not retiring:
+            rss = read_rss(os.getpid())
+            retiring = rss is not None and rss - baseline > max_rss_growth
+
+        try:
+            conn.send((ok, value, retiring))
+        except Exception:
+            # Result or exception could not be pickled
+            conn.send((False, RuntimeError(repr(value)), retiring))
+
+        if retiring:
+            break
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, ctx, initializer: Optional[Callable], initargs: tuple, limits: tuple):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, initializer, initargs) + limits,
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.future: Optional[Future] = None
+        self.deadline: Optional[float] = None
+        self.timeout: Optional[float] = None
+        self.on_progress: Optional[Callable] = None
+        self.tag = None
+        # RSS after the last finished task, i.e. while waiting for the next one (None = no task yet)
+        self.idle_rss: Optional[int] = None
+
+    @property
+    def busy(self) -> bool:
+        return self.future is not None
+
+    def start_task(self, future: Future, fn: Callable, args: tuple, timeout: Optional[float],
+                   on_progress: Optional[Callable], tag):
+        self.future = future
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.tag = tag
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.conn.send((fn, args))
+
+    def finish_task(self) -> Future:
+        future = self.future
+        self.future = None
+        self.deadline = None
+        self.on_progress = None
+        self.tag = None
+        return future
+
+    def kill(self):
+        """Terminate the process immediately."""
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        except Exception as e:
+            logger.debug(f"Failed to kill worker {self.process.pid}: {e}")
+        self.conn.close()
+
+    def stop(self):
+        """Ask the process to exit after its current task."""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+
+
+class WorkerPool:
+    """
+    Fixed-size pool of worker processes with per-task timeouts.
+    Tasks are submitted with `submit` and return concurrent.futures.Future objects.
+    A task that times out fails with WorkerTimeout, a dead worker with WorkerCrashed;
+    in both cases the worker is replaced and the pool keeps running.
+    Workers that retire (task or RSS growth limit) are replaced the same way.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+        context: str = "spawn",
+        max_tasks_per_worker: Optional[int] = None,
+        max_rss_growth_mb: Optional[int] = None
+    ):
+        """
+        Start the pool.
+
+        Args:
+            size: Number of worker processes
+            initializer: Optional function run once in every new worker
+            initargs: Arguments for the initializer
+            context: multiprocessing start method
+            max_tasks_per_worker: Recycle a worker after this many tasks (None = never)
+            max_rss_growth_mb: Recycle a worker once its RSS grew this much since start (None = never)
+        """
+        self._ctx = multiprocessing.get_context(context)
+        self._initializer = initializer
+        self._initargs = initargs
+        self._limits = (
+            max_tasks_per_worker,
+            max_rss_growth_mb * 1024 * 1024 if max_rss_growth_mb else None
+        )
+        self.size = max(1, size)
+        self._lock = threading.Lock()
+        self._pending: deque = deque()
+        self._closed = False
+        self._workers: List[_Worker] = [self._spawn() for _ in range(self.size)]
+        self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._monitor.start()
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self._initializer, self._initargs, self._limits)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the pool has been shut down."""
+        return self._closed
+
+    def submit(
+        self,
+        fn: Callable,
+        *args,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable] = None,
+        tag=None
+    ) -> Future:
+        """
+        Schedule fn(*args) on a worker.
+
+        Args:
+            fn: Picklable module-level function
+            args: Picklable arguments
+            timeout: Wall-clock limit in seconds (None = unlimited)
+            on_progress: Optional callback(*args) for each report_progress(*args)
+                the task makes (called from the pool's monitor thread)
+            tag: Optional label (e.g. the source file) to find the task's worker with pids_for
+
+        Returns:
+            Future resolved with the function's result or exception
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WorkerPool is shut down")
+            self._pending.append((future, fn, args, timeout, on_progress, tag))
+            self._dispatch()
+        return future
+
+    def pid_for(self, future: Future) -> Optional[int]:
+        """PID of the worker currently running a task (None if queued or finished)."""
+        with self._lock:
+            for worker in self._workers:
+                if worker.future is future:
+                    return worker.process.pid
+        return None
+
+    def pids_for(self, tag) -> List[int]:
+        """PIDs of the workers currently running tasks submitted with `tag`."""
+        with self._lock:
+            return [worker.process.pid for worker in self._workers if worker.busy and worker.tag == tag]
+
+    def idle_rss_for(self, tag) -> Dict[int, Optional[int]]:
+        """
+        Workers currently running tasks submitted with `tag`, with the RSS each had
+        while idle before its task (None for a worker that has not finished a task yet).
+        """
+        with self._lock:
+            return {worker.process.pid: worker.idle_rss
+                    for worker in self._workers if worker.busy and worker.tag == tag}
+
+    def cancel(self, future: Future) -> bool:
+        """
+        Cancel a task: drop it if still queued, kill and replace its worker if running.
+        The future fails with TaskCancelled.
+
+        Returns:
+            True if the task was still queued or running
+        """
+        with self._lock:
+            for entry in self._pending:
+                if entry[0] is future:
+                    self._pending.remove(entry)
+                    future.set_exception(TaskCancelled("Task cancelled"))
+                    return True
+            for worker in self._workers:
+                if worker.future is future:
+                    worker.finish_task()
+                    logger.info(f"Cancelling task on worker {worker.process.pid}")
+                    self._replace(worker)
+                    future.set_exception(TaskCancelled("Task cancelled"))
+                    self._dispatch()
+                    return True
+        return False
+
+    def gather(
+        self,
+        futures: List[Future],
+        should_stop: Optional[Callable[[], bool]] = None,
+        deadline: Optional[float] = None
+    ) -> list:
+        """
+        Wait for tasks and return their results in submission order.
+        If one fails, should_stop() turns true or the deadline passes, the
+        remaining tasks are cancelled.
+
+        Args:
+            futures: Futures returned by submit
+            should_stop: Optional cancellation check, polled while waiting
+            deadline: Optional time.monotonic() limit; passing it raises WorkerTimeout
+
+        Returns:
+            List of results
+        """
+        pending = set(futures)
+        try:
+            while pending:
+                if should_stop is not None and should_stop():
+                    raise TaskCancelled("Task cancelled")
+                if deadline is not None and time.monotonic() > deadline:
+                    raise WorkerTimeout("Deadline passed")
+                done, pending = wait(pending, timeout=POLL_INTERVAL)
+                for future in done:
+                    if future.exception() is not None:
+                        raise future.exception()
+        except BaseException:
+            for future in pending:
+                self.cancel(future)
+            raise
+        return [future.result() for future in futures]
+
+    def _dispatch(self):
+        """Hand pending tasks to idle workers. Caller holds the lock."""
+        for worker in self._workers:
+            if not self._pending:
+                return
+            if worker.busy:
+                continue
+            future, fn, args, timeout, on_progress, tag = self._pending.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                worker.start_task(future, fn, args, timeout, on_progress, tag)
+            except Exception as e:
+                worker.finish_task()
+                future.set_exception(e)
+
+    def _replace(self, worker: _Worker, graceful: bool = False):
+        """Kill (or join, if it is exiting by itself) a worker and start a fresh one in its slot. Caller holds the lock."""
+        if graceful:
+            worker.process.join(timeout=5)
+        worker.kill()
+        index = self._workers.index(worker)
+        if not self._closed:
+            self._workers[index] = self._spawn()
+
+    def _monitor_loop(self):
+        """Collect results, detect dead workers and enforce deadlines."""
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                busy = [w for w in self._workers if w.busy]
+                waitables = [w.conn for w in busy] + [w.process.sentinel for w in busy]
+
+            ready = connection.wait(waitables, timeout=POLL_INTERVAL) if waitables else []
+            if not waitables:
+                time.sleep(POLL_INTERVAL)
+
+            progress = []
+            with self._lock:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                for worker in busy:
+                    if not worker.busy:
+                        # Cancelled (and replaced) while we were waiting
+                        continue
+                    if worker.conn in ready:
+                        self._receive(worker, progress)
+                    elif worker.process.sentinel in ready:
+                        future = worker.finish_task()
+                        future.set_exception(WorkerCrashed(
+                            f"Worker exited with code {worker.process.exitcode}"
+                        ))
+                        self._replace(worker)
+                    elif worker.deadline is not None and now > worker.deadline:
+                        timeout = worker.timeout
+                        future = worker.finish_task()
+                        logger.warning(f"Worker {worker.process.pid} timed out after {timeout}s, restarting")
+                        self._replace(worker)
+                        future.set_exception(WorkerTimeout(f"Timed out after {timeout:.0f}s"))
+                self._dispatch()
+
+            # Outside the lock, so callbacks may use the pool
+            for on_progress, args in progress:
+                try:
+                    on_progress(*args)
+                except Exception as e:
+                    logger.debug(f"Progress callback failed: {e}")
+
+    def _receive(self, worker: _Worker, progress: list):
+        """
+        Read a reply from a busy worker. Caller holds the lock.
+        Progress replies are appended to `progress` as (callback, args) for the caller to run.
+        """
+        try:
+            ok, value, retiring = worker.conn.recv()
+        except (EOFError, OSError):
+            # Pipe closed: the process died before replying
+            worker.process.join(timeout=1)
+            future = worker.finish_task()
+            future.set_exception(WorkerCrashed(
+                f"Worker exited with code {worker.process.exitcode}"
+            ))
+            self._replace(worker)
+            return
+
+        if ok is None:
+            if worker.on_progress is not None:
+                progress.append((worker.on_progress, value))
+            return
+
+        future = worker.finish_task()
+        # The worker waits for its next task now: its RSS is the baseline of that task
+        worker.idle_rss = None if retiring else read_rss(worker.process.pid)
+        if retiring:
+            logger.debug(f"Recycling worker {worker.process.pid}")
+            self._replace(worker, graceful=True)
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def shutdown(self, kill: bool = False):
+        """
+        Stop the pool.
+
+        Args:
+            kill: Terminate running tasks instead of waiting for them
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for future, *_ in self._pending:
+                future.cancel()
+            self._pending.clear()
+            workers = list(self._workers)
+
+        self._monitor.join()
+
+        for worker in workers:
+            if worker.busy:
+                if kill:
+                    future = worker.finish_task()
+                    worker.kill()
+                    future.set_exception(WorkerCrashed("Worker pool shut down"))
+                    continue
+                self._wait_for(worker)
+            worker.stop()
+
+        for worker in workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive() or not worker.conn.closed:
+                worker.kill()
+
+    @staticmethod
+    def _wait_for(worker: _Worker):
+        """Wait for a busy worker to finish during shutdown."""
+        future = worker.finish_task()
+        while worker.conn in connection.wait([worker.conn, worker.process.sentinel]):
+            try:
+                ok, value, _ = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            if ok is None:
+                # Progress; the pool is shutting down, so nobody listens
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+            return
+        future.set_exception(WorkerCrashed("Worker exited during shutdown"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        return False
@@ -0,0 +1,29 @@
+"""Helpers shared by the verify scripts."""
+
+import os
+
+
+def check(condition, message):
+    """Print PASS or FAIL for one check and return the condition."""
+    print(f"{'PASS' if condition else 'FAIL'}: {message}")
+    return condition
+
+
+def write(path, text):
+    """Write a UTF-8 text file, creating its folder."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read(path):
+    """Read a UTF-8 text file."""
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def touch(path):
+    """Create an empty file, creating its folder."""
+    write(path, "")
@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+from admission import MemoryAdmission, MB
+from scheduler import ScheduledJob
+from worker_pool import WorkerPool, read_rss
+from helpers import check
+
+
+def job(index, size_mb, format_name='PDF'):
+    return ScheduledJob(index=index, path=f"file{index}.pdf", format_name=format_name, size=int(size_mb * MB), units=0)
+
+
+def echo(value):
+    return value
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+def verify_budget():
+    admission = MemoryAdmission(1000 * MB)
+    big = job(0, 200)  # 200 MB PDF: 1200 MB estimated
+    check(admission.admits(big), "an empty engine admits even a job over budget")
+    admission.acquire(big)
+    check(not admission.admits(job(1, 10)), "a job that does not fit next to the admitted one waits")
+    admission.release(big)
+    check(admission.admits(job(1, 10)), "released memory admits the next job")
+    check(MemoryAdmission(None).admits(job(0, 10_000)), "no budget admits everything")
+
+
+def verify_baseline():
+    admission = MemoryAdmission(None)
+    running = job(0, 10)
+    admission.acquire(running)
+
+    # The worker was idle at this RSS; the task allocated memory before attach() ran
+    idle_rss = read_rss(os.getpid())
+    allocated = bytearray(64 * MB)
+    allocated[::4096] = b"x" * len(allocated[::4096])
+    admission.attach(running, {os.getpid(): idle_rss})
+    admission.sample()
+    peak = admission._tracked[running.index].peak
+    check(peak >= 60 * MB, "memory the task used before attach counts against its peak")
+    del allocated
+
+    fresh = job(1, 10)
+    admission.acquire(fresh)
+    admission.attach(fresh, {12345: None})
+    check(admission._tracked[fresh.index].baselines == {12345: int(admission._worker_base)},
+          "a fresh worker's baseline is the learned idle worker RSS")
+
+    admission.release(running)
+    check(admission.factor('PDF') >= peak / running.size, "an underestimated format factor is raised at once")
+
+
+def verify_pool_idle_rss():
+    pool = WorkerPool(1)
+    try:
+        first = pool.submit(echo, 1, tag="a")
+        check(pool.idle_rss_for("b") == {}, "idle_rss_for ignores other tags")
+        first.result(timeout=30)
+        second = pool.submit(sleep, 1, tag="a")
+        idle = {}
+        while not idle and not second.done():
+            idle = pool.idle_rss_for("a")
+        second.result(timeout=30)
+        check(len(idle) == 1 and all(rss and rss > 0 for rss in idle.values()),
+              "idle_rss_for reports the RSS the worker had after its previous task")
+    finally:
+        pool.shutdown()
+
+
+def main():
+    verify_budget()
+    verify_baseline()
+    verify_pool_idle_rss()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+from converter import MarkdownConverter, AIOptions
+from batch_engine import BatchOptions
+from cache import ConversionCache, ENTRY_FILE, MARKDOWN_FILE
+from helpers import check, write, read
+
+SENTINEL = "restored from the cache"
+
+
+def entry_dirs(cache_dir):
+    return sorted(root for root, _, files in os.walk(cache_dir) if ENTRY_FILE in files)
+
+
+def convert(source, cache_dir, **ai_options):
+    converter = MarkdownConverter()
+    # The manifest would skip the file before the cache is consulted, so always overwrite
+    converter.set_batch_options(BatchOptions(
+        max_workers=1, journal=False, results_store=False, incremental=False
+    ))
+    converter.set_ai_options(AIOptions(**{'cache_enabled': True, 'cache_dir': cache_dir, **ai_options}))
+    result = converter.convert_files([source], overwrite=True)[0]
+    return read(result.output_path) if result.success else None
+
+
+def verify_hits(tmp):
+    cache_dir = os.path.join(tmp, "cache")
+    source = os.path.join(tmp, "doc.txt")
+    write(source, "original text")
+
+    convert(source, cache_dir)
+    entries = entry_dirs(cache_dir)
+    check(len(entries) == 1, "a finished conversion is stored in the cache")
+
+    # Mark the cached markdown so a hit shows in the output
+    write(os.path.join(entries[0], MARKDOWN_FILE), SENTINEL + "\n")
+    check(SENTINEL in (convert(source, cache_dir) or ""), "same source and options are restored from the cache")
+    check(SENTINEL in (convert(source, cache_dir, deterministic_output=True) or ""),
+          "deterministic_output shares the cache entry")
+    check("converted_at" not in convert(source, cache_dir, deterministic_output=True),
+          "deterministic output restored from the cache has no converted_at")
+
+    output = convert(source, cache_dir, extract_images=True) or ""
+    check(SENTINEL not in output and "original text" in output, "options that change the output miss the cache")
+    check(SENTINEL not in (convert(source, cache_dir, cache_enabled=False) or ""), "cache_enabled=False bypasses the cache")
+
+    write(source, "edited text")
+    output = convert(source, cache_dir) or ""
+    check(SENTINEL not in output and "edited text" in output, "changed source content misses the cache")
+
+
+def verify_eviction(tmp):
+    cache_dir = os.path.join(tmp, "evict")
+    cache = ConversionCache(cache_dir)
+    for number in range(3):
+        cache.put(f"{number:064x}", ["x" * 1000], "", None, 0, 0)
+        # Distinct last-used times, oldest first
+        os.utime(os.path.join(cache_dir, "00", f"{number:064x}", ENTRY_FILE), (time.time() - 100 + number,) * 2)
+
+    # Looking an entry up marks it as recently used
+    check(cache.get(f"{0:064x}") is not None, "stored entry is found")
+    cache.max_size = 2500
+    removed = cache.evict()
+    remaining = [os.path.basename(path) for path in entry_dirs(cache_dir)]
+    check(removed == 1 and remaining == [f"{0:064x}", f"{2:064x}"],
+          "eviction removes the least recently used entries first")
+    check(cache.get(f"{1:064x}") is None, "evicted entry is a miss")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        verify_hits(tmp)
+        verify_eviction(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+from chunker import MarkdownChunker
+from chunk_delta import read_chunk_ids, diff_chunk_ids, DELTA_DIR_NAME
+from converter import MarkdownConverter, AIOptions
+from batch_engine import BatchOptions
+from helpers import check
+
+FRONTMATTER = "---\ntitle: report\nconverted_at: {time}\n---\n"
+SECTIONS = [
+    "# Report\nIntro text.",
+    "## Scope\nThe scope section.",
+    "## Costs\nThe costs section.\n### Detail\nNested header stays in the chunk.",
+    "## Notes\nRepeated body.",
+    "## Notes\nRepeated body.",
+]
+
+
+def document(sections, time="2026-01-01 10:00:00"):
+    return FRONTMATTER.format(time=time) + "\n\n".join(sections) + "\n"
+
+
+def ids_of(text):
+    return [chunk['id'] for chunk in MarkdownChunker(2).chunk_text(text, "report.txt")]
+
+
+def verify_ids():
+    ids = ids_of(document(SECTIONS))
+    check(ids == ids_of(document(SECTIONS)), "same document gives the same chunk ids")
+    check(ids == ids_of(document(SECTIONS, time="2026-06-30 23:59:59")), "converted_at does not change the ids")
+    check(len(set(ids)) == len(ids) and ids[-1] == ids[-2].split('-')[0] + "-1",
+          "repeated identical chunks get an occurrence suffix")
+
+    edited = SECTIONS[:]
+    edited[2] = edited[2].replace("costs", "updated costs")
+    edited_ids = ids_of(document(edited))
+    changed = [index for index, (old, new) in enumerate(zip(ids, edited_ids)) if old != new]
+    check(changed == [3], "editing one section changes only its chunk id")
+
+    text = document(SECTIONS)
+    chunker = MarkdownChunker(2)
+    streamed = list(chunker.iter_chunks(iter(text.split('\n')), "report.txt"))
+    check(streamed == chunker.chunk_text(text, "report.txt"), "iter_chunks matches chunk_text")
+
+    delta = diff_chunk_ids(ids, edited_ids)
+    check(delta == {'added': [edited_ids[3]], 'removed': [ids[3]], 'unchanged': ids[:3] + ids[4:]},
+          "diff_chunk_ids splits added, removed and unchanged ids")
+
+
+def verify_legacy_ids(tmp):
+    chunks = MarkdownChunker(2).chunk_text(document(SECTIONS), "report.txt")
+    path = os.path.join(tmp, "legacy.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            legacy = {key: value for key, value in chunk.items() if key != 'id'}
+            f.write(json.dumps(legacy, ensure_ascii=False) + "\n")
+    check(read_chunk_ids(path) == [chunk['id'] for chunk in chunks],
+          "chunk files written without ids get the ids they would have now")
+    check(read_chunk_ids(os.path.join(tmp, "missing.jsonl")) == [], "missing chunk file has no ids")
+
+
+def convert(folder, output_dir, remove_orphans=False):
+    converter = MarkdownConverter()
+    converter.set_batch_options(BatchOptions(
+        max_workers=1, incremental=True, journal=False, results_store=False, remove_orphans=remove_orphans
+    ))
+    converter.set_ai_options(AIOptions(cache_enabled=False, chunk_enabled=True, chunk_level=2))
+    results = converter.convert_folder(folder, output_dir=output_dir, overwrite=True)
+    return {os.path.basename(r.source_path): r for r in results}
+
+
+def delta_logs(output_dir):
+    delta_dir = os.path.join(output_dir, DELTA_DIR_NAME)
+    return set(os.listdir(delta_dir)) if os.path.isdir(delta_dir) else set()
+
+
+def run_summary(output_dir, before):
+    """Summary record of the one run delta log written since `before` (None if there is none)."""
+    new = delta_logs(output_dir) - before
+    if len(new) != 1:
+        return None
+    with open(os.path.join(output_dir, DELTA_DIR_NAME, new.pop()), encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    return records[-1]
+
+
+def verify_conversion_deltas(tmp):
+    folder, output_dir = os.path.join(tmp, "src"), os.path.join(tmp, "out")
+    os.makedirs(folder)
+    source = os.path.join(folder, "report.txt")
+    other = os.path.join(folder, "other.txt")
+    with open(source, 'w', encoding='utf-8') as f:
+        f.write("\n\n".join(SECTIONS) + "\n")
+    with open(other, 'w', encoding='utf-8') as f:
+        f.write("## Other\nAnother document.\n")
+
+    first = convert(folder, output_dir)["report.txt"].chunk_delta
+    check(first is not None and first['added'] and not first['removed'] and not first['unchanged'],
+          "first conversion adds every chunk")
+
+    again = convert(folder, output_dir)["report.txt"].chunk_delta
+    check(again is not None and again['unchanged'] == first['added'] and not again['added'] and not again['removed'],
+          "reconverting an unchanged source leaves every chunk unchanged")
+
+    with open(source, 'w', encoding='utf-8') as f:
+        f.write("\n\n".join(SECTIONS).replace("scope section", "revised scope section") + "\n")
+    before = delta_logs(output_dir)
+    edited = convert(folder, output_dir)["report.txt"].chunk_delta
+    check(edited is not None and len(edited['added']) == 1 and len(edited['removed']) == 1
+          and len(edited['unchanged']) == len(first['added']) - 1, "editing one section adds and removes one chunk")
+
+    summary = run_summary(output_dir, before) or {}
+    check(summary.get('type') == 'summary' and summary.get('files') == 2 and summary.get('added') == 1
+          and summary.get('removed') == 1, "run delta log sums the file deltas")
+
+    other_ids = read_chunk_ids(os.path.join(output_dir, "other.txt.jsonl"))
+    os.remove(other)
+    before = delta_logs(output_dir)
+    convert(folder, output_dir, remove_orphans=True)
+    summary = run_summary(output_dir, before) or {}
+    check(other_ids and summary.get('removed') == len(other_ids) and summary.get('files') == 2,
+          "chunks of a deleted source are recorded as removed")
+
+
+def main():
+    verify_ids()
+    with tempfile.TemporaryDirectory() as tmp:
+        verify_legacy_ids(tmp)
+        verify_conversion_deltas(tmp)
+
+
+if __name__ == "__main__":
+    main()
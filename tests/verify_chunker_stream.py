@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import random
+import tempfile
+import tracemalloc
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import text_processor
+from chunker import MarkdownChunker
+from converter import MarkdownConverter, AIOptions
+from helpers import check, write, read
+
+DOCUMENT = (
+    "---\nsource_file: a.txt\nconverted_at: 2026-01-01 00:00:00\n---\n\n"
+    "Intro before any header.\n\n"
+    "# Title\n\nTop text.\n\n"
+    "## Part\nSame body.\n\n"
+    "## Part\nSame body.\n\n"
+    "## Other\n### Detail\nDeep text.\n\n"
+    "## Empty\n\n"
+    "#NotAHeader\nplain line\n"
+)
+
+
+def pieces(text, seed):
+    """Split text at random points, as streamed body segments arrive."""
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(text)), 12))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+def verify_equivalence():
+    for level in (1, 2, 3):
+        expected = MarkdownChunker(level).chunk_text(DOCUMENT, "a.txt")
+        for seed in range(5):
+            lines = text_processor.iter_lines(pieces(DOCUMENT, seed))
+            if list(MarkdownChunker(level).iter_chunks(lines, "a.txt")) != expected:
+                check(False, f"iter_chunks over streamed pieces equals chunk_text (level {level}, seed {seed})")
+                return
+    check(True, "iter_chunks over streamed pieces equals chunk_text")
+
+    chunks = MarkdownChunker(2).chunk_text(DOCUMENT, "a.txt")
+    check(chunks[0]["header"] == "Preamble / Introduction", "the first chunk without a header is the preamble")
+    ids = [chunk["id"] for chunk in chunks]
+    check(len(set(ids)) == len(ids) and ids[3] == ids[2] + "-1", "repeated chunks get numbered ids")
+
+
+def verify_stable_ids():
+    chunker = MarkdownChunker(2)
+    before = chunker.chunk_text(DOCUMENT, "a.txt")
+    rerun = chunker.chunk_text(DOCUMENT.replace("2026-01-01 00:00:00", "2026-02-02 12:00:00"), "a.txt")
+    check([c["id"] for c in rerun] == [c["id"] for c in before], "a new converted_at keeps every chunk id")
+    edited = chunker.chunk_text(DOCUMENT.replace("Top text.", "Top text, edited."), "a.txt")
+    changed = [old["id"] != new["id"] for old, new in zip(before, edited)]
+    check(changed == [False, True, False, False, False, False], "an edit changes only the id of its chunk")
+
+
+def verify_lazy():
+    consumed = []
+
+    def lines():
+        for number in range(1000):
+            consumed.append(number)
+            yield f"# Section {number}" if number % 10 == 0 else f"line {number}"
+
+    first = next(MarkdownChunker(1).iter_chunks(lines(), "lazy.txt"))
+    check(first["header"] == "Section 0" and len(consumed) <= 11,
+          "the first chunk is yielded when the next header closes it")
+
+
+def verify_bounded_memory():
+    def lines():
+        for number in range(200_000):
+            yield f"## Section {number}" if number % 20 == 0 else f"Line {number} of a long document with some text."
+
+    tracemalloc.start()
+    count = sum(1 for _ in MarkdownChunker(2).iter_chunks(lines(), "big.txt"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Only the current chunk and the ids seen so far are kept
+    check(count == 10_000 and peak < 4 * 1024 * 1024,
+          f"chunking a ~10 MB document stays far below its size (peak {peak // 1024} KB)")
+
+
+def verify_converter(tmp):
+    source = os.path.join(tmp, "notes.txt")
+    write(source, DOCUMENT.split("---\n\n", 1)[1] * 50)
+    converter = MarkdownConverter()
+    converter.set_ai_options(AIOptions(chunk_enabled=True, chunk_level=2))
+    result = converter.convert_file(source, output_dir=tmp, overwrite=True)
+    jsonl = os.path.join(tmp, "notes.txt.jsonl")
+    records = [json.loads(line) for line in read(jsonl).splitlines()]
+    check(result.success and records == MarkdownChunker(2).chunk_text(read(result.output_path), "notes.txt"),
+          "the written .jsonl equals chunk_text of the written .md")
+    check(result.chunk_delta is not None and len(result.chunk_delta["added"]) == len(records),
+          "the chunk delta lists the new ids")
+    check(not os.path.exists(jsonl + ".part"), "the staged .jsonl is moved into place")
+
+
+def main():
+    verify_equivalence()
+    verify_stable_ids()
+    verify_lazy()
+    verify_bounded_memory()
+    with tempfile.TemporaryDirectory() as tmp:
+        verify_converter(tmp)
+
+
+if __name__ == "__main__":
+    main()
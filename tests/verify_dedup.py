@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+from converter import MarkdownConverter, AIOptions
+from batch_engine import BatchOptions
+from dedup import find_duplicates, duplicate_savings
+from helpers import check, write, read
+
+
+def body(markdown):
+    """Markdown without the frontmatter (the source name and time differ between copies)."""
+    return markdown.split("\n---\n", 1)[-1]
+
+
+def verify_find_duplicates(tmp):
+    files = []
+    for name, text in [("a.txt", "same"), ("b.txt", "same"), ("c.txt", "other"),
+                       ("d.txt", "diff"), ("sub/e.txt", "same")]:
+        files.append(os.path.join(tmp, name))
+        write(files[-1], text)
+    groups = find_duplicates(files)
+    # "diff" has the size of "same" but other content: hashed, not grouped
+    check(groups == {files[0]: [files[1], files[4]]}, "byte-identical files are grouped under the first one")
+
+
+def verify_batch(tmp, workers, hardlink=False):
+    folder = os.path.join(tmp, f"batch_{workers}_{hardlink}")
+    write(os.path.join(folder, "report.txt"), "quarterly report\n" * 50)
+    write(os.path.join(folder, "copy", "report.txt"), "quarterly report\n" * 50)
+    write(os.path.join(folder, "notes.txt"), "unrelated notes")
+
+    converter = MarkdownConverter()
+    converter.set_batch_options(BatchOptions(
+        max_workers=workers, dedup=True, journal=False, results_store=False, dedup_hardlink=hardlink
+    ))
+    converter.set_ai_options(AIOptions(cache_enabled=False))
+    results = {os.path.relpath(r.source_path, folder): r
+               for r in converter.convert_folder(folder, recursive=True, overwrite=True)}
+
+    label = f"{workers} worker(s){', hardlinked' if hardlink else ''}"
+    check(all(r.success for r in results.values()), f"{label}: every file succeeds")
+    duplicates = [name for name, r in results.items() if r.duplicate_of]
+    check(len(duplicates) == 1 and duplicates[0] in ("report.txt", "copy/report.txt"),
+          f"{label}: the identical file is served from its twin's conversion")
+
+    outputs = [read(results[name].output_path) for name in ("report.txt", "copy/report.txt")]
+    check(body(outputs[0]) == body(outputs[1]) and "quarterly report" in outputs[0],
+          f"{label}: both copies have the converted markdown")
+    count, size = duplicate_savings(list(results.values()))
+    check(count == 1 and size == os.path.getsize(os.path.join(folder, "report.txt")),
+          f"{label}: duplicate_savings counts the skipped conversion")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        verify_find_duplicates(tmp)
+        verify_batch(tmp, 1)
+        verify_batch(tmp, 1, hardlink=True)
+        verify_batch(tmp, 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import os
+import sys
+import datetime
+import tempfile
+
+import openpyxl
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import excel_sheets
+from converter import MarkdownConverter, AIOptions
+from batch_engine import BatchOptions
+from worker_pool import WorkerPool
+from helpers import check
+
+
+def create_workbook(path):
+    """Workbook with mixed cell types, blanks, merged cells, an empty sheet and unicode names."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Summary"
+    ws.append(["Category", "Item", "Qty", "Price", "Date"])
+    ws.append(["Tools", "Hammer", 3, 12.5, datetime.date(2026, 1, 2)])
+    ws.append([None, "Saw", 1, 20.0, datetime.date(2026, 1, 3)])
+    ws.append(["Parts", "Bolt", 100, 0.15, None])
+    ws.merge_cells("A2:A3")
+
+    ws = wb.create_sheet("Bảng giá 2026")
+    ws.append(["Mã", "Tên hàng", "Đơn giá"])
+    for number in range(1, 30):
+        ws.append([f"SP{number:03d}", f"Sản phẩm {number}", number * 1000])
+
+    ws = wb.create_sheet("Merged")
+    ws.append(["Group", "Member", "Score"])
+    for group in range(3):
+        first = 2 + group * 3
+        ws.cell(first, 1, f"Group {group + 1}")
+        for offset in range(3):
+            ws.cell(first + offset, 2, f"Member {group * 3 + offset + 1}")
+            ws.cell(first + offset, 3, (group + 1) * 10 + offset)
+        ws.merge_cells(start_row=first, start_column=1, end_row=first + 2, end_column=1)
+
+    wb.create_sheet("Empty")
+
+    ws = wb.create_sheet("Notes")
+    ws.append(["Note"])
+    ws.append(["Pipe | inside a cell"])
+    ws.append(["Line one\nline two"])
+    wb.save(path)
+
+
+def convert(source, output_dir, split, clean):
+    converter = MarkdownConverter()
+    converter.set_batch_options(BatchOptions(
+        max_workers=2, journal=False, results_store=False, incremental=False, dedup=False
+    ))
+    converter.set_ai_options(AIOptions(
+        cache_enabled=False,
+        deterministic_output=True,
+        excel_clean_enabled=clean,
+        excel_split_min_sheets=1 if split else 0,
+        excel_split_min_size_mb=0
+    ))
+    result = converter.convert_files([source], output_dir=output_dir, overwrite=True)[0]
+    if not result.success:
+        print(f"  conversion failed: {result.error_message}")
+        return None
+    with open(result.output_path, encoding='utf-8') as f:
+        return f.read()
+
+
+def verify_sheet_names(path):
+    check(excel_sheets.sheet_names(path) == ["Summary", "Bảng giá 2026", "Merged", "Empty", "Notes"],
+          "sheet names are read in workbook order")
+    check(excel_sheets.merged_ranges(path, "Merged") == ["A2:A4", "A5:A7", "A8:A10"],
+          "merged ranges of a sheet are read from the workbook")
+
+
+def verify_conversion(path, tmp, clean):
+    label = "cleaned" if clean else "raw"
+    serial = convert(path, os.path.join(tmp, f"serial_{label}"), split=False, clean=clean)
+
+    # Count the split conversions, to be sure the sheets really went through the pool
+    calls = []
+    original = excel_sheets.convert_excel_parallel
+    excel_sheets.convert_excel_parallel = lambda *args, **kwargs: calls.append(args[0]) or original(*args, **kwargs)
+    try:
+        split = convert(path, os.path.join(tmp, f"split_{label}"), split=True, clean=clean)
+    finally:
+        excel_sheets.convert_excel_parallel = original
+    check(calls == [path], f"{label} workbook: converted sheet by sheet")
+    if check(serial is not None and split == serial, f"{label} workbook: sheet by sheet output equals serial output"):
+        return
+    for number, (serial_line, split_line) in enumerate(zip((serial or "").split("\n"), (split or "").split("\n"))):
+        if serial_line != split_line:
+            print(f"  line {number + 1}: serial {serial_line!r}")
+            print(f"  line {number + 1}: split  {split_line!r}")
+            break
+
+
+def verify_deadline(path):
+    pool = WorkerPool(2)
+    try:
+        names = excel_sheets.sheet_names(path)
+        markdown = excel_sheets.convert_excel_parallel(path, names, False, pool)
+        check(all(f"## {name}" in markdown for name in names), "every sheet gets its section")
+        try:
+            excel_sheets.convert_excel_parallel(path, names, False, pool, deadline=0)
+            check(False, "a passed deadline stops the sheet tasks")
+        except TimeoutError:
+            check(True, "a passed deadline stops the sheet tasks")
+    finally:
+        pool.shutdown(kill=True)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workbook.xlsx")
+        create_workbook(path)
+        verify_sheet_names(path)
+        verify_conversion(path, tmp, clean=False)
+        verify_conversion(path, tmp, clean=True)
+        verify_deadline(path)
+
+
+if __name__ == "__main__":
+    main()
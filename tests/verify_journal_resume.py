@@ -0,0 +1,106 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import journal
+from journal import JobJournal
+from converter import MarkdownConverter, ConversionResult, AIOptions
+from batch_engine import BatchOptions
+from helpers import check, write, read
+
+
+def make_converter():
+    converter = MarkdownConverter()
+    converter.set_batch_options(BatchOptions(max_workers=1, journal=True, results_store=False, incremental=False))
+    converter.set_ai_options(AIOptions(cache_enabled=False))
+    return converter
+
+
+def make_sources(folder, names):
+    paths = []
+    for name in names:
+        paths.append(os.path.join(folder, name))
+        write(paths[-1], f"content of {name}")
+    return paths
+
+
+def verify_crashed_job(tmp):
+    folder, output_dir = os.path.join(tmp, "crash"), os.path.join(tmp, "crash_out")
+    done, in_flight, existing, fresh = make_sources(folder, ["done.txt", "in_flight.txt", "existing.txt", "fresh.txt"])
+    output = lambda path: os.path.join(output_dir, os.path.basename(path) + ".md")
+
+    # A job that crashed after finishing one file, while converting the next
+    job = JobJournal.create([done, in_flight, existing, fresh], output_dir, False,
+                            AIOptions(cache_enabled=False, extract_images=True), source_root=folder)
+    job.started(done)
+    write(output(done), "finished before the crash")
+    job.completed(ConversionResult(source_path=done, output_path=output(done), success=True))
+    job.started(in_flight)
+    write(output(in_flight), "half written")
+    write(output(existing), "converted by an earlier run")
+    with open(job.path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "completed", "pa')  # line cut short by the crash
+    job._file.close()  # the process died: no close(), the journal stays
+
+    jobs = JobJournal.list_jobs()
+    check([j.job_id for j in jobs] == [job.job_id], "unfinished job is listed")
+    state = jobs[0] if jobs else None
+    check(state is not None and state.in_flight == [in_flight] and state.not_started == [existing, fresh],
+          "journal replay finds the in-flight and not started files")
+
+    converter = make_converter()
+    progress = []
+    results = converter.resume_job(job.job_id, progress_callback=lambda current, total, r: progress.append((current, total)))
+    by_name = {os.path.basename(r.source_path): r for r in results}
+
+    check(sorted(by_name) == ["existing.txt", "fresh.txt", "in_flight.txt"], "resume handles only the remaining files")
+    check(by_name["in_flight.txt"].success and not by_name["in_flight.txt"].skipped
+          and "content of in_flight.txt" in read(output(in_flight)), "in-flight file is converted again over its leftover")
+    check(by_name["existing.txt"].skipped and read(output(existing)) == "converted by an earlier run",
+          "not started file keeps the job's overwrite setting")
+    check(by_name["fresh.txt"].success and "content of fresh.txt" in read(output(fresh)), "not started file is converted")
+    check(read(output(done)) == "finished before the crash", "completed file is left alone")
+    check(progress == [(1, 3), (2, 3), (3, 3)], "progress counts across the resumed files")
+    check(converter._ai_options.extract_images, "the job's AI options are restored")
+    check(JobJournal.list_jobs() == [] and not job.path.exists(), "journal of the finished job is deleted")
+
+
+def verify_stopped_batch(tmp):
+    folder, output_dir = os.path.join(tmp, "stop"), os.path.join(tmp, "stop_out")
+    files = make_sources(folder, [f"file{number}.txt" for number in range(5)])
+
+    converter = make_converter()
+
+    def stop_after_first(current, total, result):
+        converter.request_stop()
+
+    first = converter.convert_files(files, output_dir=output_dir, progress_callback=stop_after_first, source_root=folder)
+    jobs = JobJournal.list_jobs()
+    check(len(jobs) == 1 and len(jobs[0].completed) < len(files), "stopped batch leaves its journal")
+
+    rest = make_converter().resume_job(jobs[0].job_id) if jobs else []
+    converted = {r.source_path for r in first + rest if r.success and not r.cancelled}
+    check(converted == set(files), "resume converts every file the stopped batch left")
+    check(JobJournal.list_jobs() == [], "journal is deleted once the job is finished")
+
+    try:
+        make_converter().resume_job("no-such-job")
+        check(False, "unknown job id raises FileNotFoundError")
+    except FileNotFoundError:
+        check(True, "unknown job id raises FileNotFoundError")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the journals of this script out of ~/.markdown-converter/jobs
+        journal.DEFAULT_JOURNAL_DIR = Path(tmp) / "jobs"
+        verify_crashed_job(tmp)
+        verify_stopped_batch(tmp)
+
+
+if __name__ == "__main__":
+    main()
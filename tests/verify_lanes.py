@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+from converter import MarkdownConverter, AIOptions
+from batch_engine import BatchOptions, LaneLimits, _LaneTracker
+from scheduler import ScheduledJob
+from warm_pool import shutdown_warm_pool
+from helpers import check, write
+
+MB = 1024 * 1024
+
+
+def job(index, format_name, size_mb=1):
+    return ScheduledJob(index=index, path=f"file{index}", format_name=format_name, size=size_mb * MB, units=0)
+
+
+def verify_worker_share():
+    lanes = _LaneTracker({'PDF': LaneLimits(worker_share=0.5)}, 4, lambda job: job.size)
+    pdfs = [job(index, 'PDF') for index in range(3)]
+    charged = [lanes.acquire(pdf) for pdf in pdfs[:2]]
+    check(not lanes.admits(pdfs[2]), "a lane with half of 4 workers holds 2 files")
+    check(all(lanes.admits(job(10 + index, 'Text')) for index in range(4)), "other lanes keep the whole pool")
+    lanes.release(pdfs[0], charged[0])
+    check(lanes.admits(pdfs[2]), "a released slot admits the next file of the lane")
+
+    tiny = _LaneTracker({'PDF': LaneLimits(worker_share=0.1)}, 2, lambda job: job.size)
+    check(tiny.admits(pdfs[0]), "a lane always gets at least one worker")
+    tiny.acquire(pdfs[0])
+    check(not tiny.admits(pdfs[1]), "the one worker of a small share is not exceeded")
+
+
+def verify_memory_budget():
+    lanes = _LaneTracker({'PDF': LaneLimits(memory_budget_mb=100)}, 8, lambda job: job.size)
+    huge = job(0, 'PDF', 500)
+    check(lanes.admits(huge), "an idle lane admits a file over its memory budget")
+    charged = lanes.acquire(huge)
+    check(not lanes.admits(job(1, 'PDF', 1)), "nothing joins a lane over its memory budget")
+    lanes.release(huge, charged)
+
+    lanes.acquire(job(2, 'PDF', 60))
+    check(lanes.admits(job(3, 'PDF', 40)), "files that fit the budget together run together")
+    check(not lanes.admits(job(4, 'PDF', 41)), "a file that does not fit next to the running ones waits")
+
+
+def verify_timeouts():
+    lanes = _LaneTracker({'PDF': LaneLimits(timeout=1800), 'Word': LaneLimits()}, 4, lambda job: job.size)
+    check(lanes.timeout(job(0, 'PDF'), 600) == 1800, "a lane timeout replaces the batch timeout")
+    check(lanes.timeout(job(1, 'Word'), 600) == 600, "a lane without a timeout uses the batch timeout")
+    check(lanes.timeout(job(2, 'Text'), None) is None, "a format without limits uses the batch timeout")
+
+
+def verify_engine(tmp):
+    folder = os.path.join(tmp, "src")
+    for number in range(6):
+        write(os.path.join(folder, f"doc{number}.txt"), f"# Document {number}\n\nBody {number}.\n")
+
+    running, timeouts = [], []
+    acquire, timeout = _LaneTracker.acquire, _LaneTracker.timeout
+
+    def spy_acquire(tracker, scheduled):
+        charged = acquire(tracker, scheduled)
+        running.append(tracker._running[scheduled.format_name])
+        return charged
+
+    def spy_timeout(tracker, scheduled, default):
+        timeouts.append(timeout(tracker, scheduled, default))
+        return timeouts[-1]
+
+    _LaneTracker.acquire, _LaneTracker.timeout = spy_acquire, spy_timeout
+    try:
+        converter = MarkdownConverter()
+        converter.set_batch_options(BatchOptions(
+            max_workers=2,
+            lane_limits={'Text': LaneLimits(worker_share=0.5, timeout=42)}
+        ))
+        converter.set_ai_options(AIOptions())
+        results = converter.convert_folder(folder, output_dir=os.path.join(tmp, "out"), overwrite=True)
+    finally:
+        _LaneTracker.acquire, _LaneTracker.timeout = acquire, timeout
+
+    check(len(results) == 6 and all(r.success for r in results), "the parallel batch converts every file")
+    check(len(running) == 6 and max(running) == 1, "the engine keeps a lane within its worker share")
+    check(timeouts == [42] * 6, "the engine gives each file its lane timeout")
+
+
+def main():
+    verify_worker_share()
+    verify_memory_budget()
+    verify_timeouts()
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            verify_engine(tmp)
+        finally:
+            shutdown_warm_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+from converter import MarkdownConverter, AIOptions
+from batch_engine import BatchOptions
+from manifest import MANIFEST_NAME
+from helpers import check, write, read
+
+
+def make_converter(remove_orphans=False, **ai_options):
+    converter = MarkdownConverter()
+    # In-process and without journal/results database, so nothing outside the temp folder is touched
+    converter.set_batch_options(BatchOptions(
+        max_workers=1, incremental=True, journal=False, results_store=False, dedup=False, remove_orphans=remove_orphans
+    ))
+    converter.set_ai_options(AIOptions(cache_enabled=False, **ai_options))
+    return converter
+
+
+def convert(folder, output_dir=None, remove_orphans=False, **ai_options):
+    results = make_converter(remove_orphans, **ai_options).convert_folder(
+        folder, recursive=True, output_dir=output_dir
+    )
+    return {os.path.relpath(r.source_path, folder): r for r in results}
+
+
+def converted(results):
+    return sorted(name for name, r in results.items() if r.success and not r.skipped)
+
+
+def verify_incremental(folder, output_dir):
+    write(os.path.join(folder, "a.txt"), "alpha")
+    write(os.path.join(folder, "sub", "b.txt"), "beta")
+    write(os.path.join(folder, "sub", "c.txt"), "gamma")
+
+    first = convert(folder, output_dir)
+    check(converted(first) == ["a.txt", "sub/b.txt", "sub/c.txt"], "first run converts every file")
+    manifest_dir = output_dir or folder
+    check(os.path.exists(os.path.join(manifest_dir, MANIFEST_NAME)), f"manifest is kept in {'the output folder' if output_dir else 'the scanned folder'}")
+
+    second = convert(folder, output_dir)
+    check(converted(second) == [] and all(r.skipped for r in second.values()), "unchanged files are skipped")
+
+    write(os.path.join(folder, "sub", "b.txt"), "beta, edited")
+    third = convert(folder, output_dir)
+    check(converted(third) == ["sub/b.txt"], "only the changed file is reconverted")
+    check("beta, edited" in read(third["sub/b.txt"].output_path), "reconverted output has the new content")
+
+    # Same content with a new mtime: the content hash decides
+    later = time.time() + 10
+    os.utime(os.path.join(folder, "a.txt"), (later, later))
+    fourth = convert(folder, output_dir)
+    check(converted(fourth) == [], "touched but unchanged file is skipped")
+
+    fifth = convert(folder, output_dir, extract_images=True)
+    check(converted(fifth) == ["a.txt", "sub/b.txt", "sub/c.txt"], "changed output options reconvert every file")
+
+    os.remove(first["sub/c.txt"].output_path)
+    sixth = convert(folder, output_dir, extract_images=True)
+    check(converted(sixth) == ["sub/c.txt"], "file whose output was deleted is reconverted")
+
+
+def verify_orphans(folder, output_dir):
+    outputs = {name: r.output_path for name, r in convert(folder, output_dir).items()}
+    os.remove(os.path.join(folder, "sub", "c.txt"))
+
+    convert(folder, output_dir)
+    check(os.path.exists(outputs["sub/c.txt"]), "orphaned output is kept unless remove_orphans is on")
+
+    convert(folder, output_dir, remove_orphans=True)
+    check(not os.path.exists(outputs["sub/c.txt"]), "orphaned output is removed with remove_orphans")
+    check(os.path.exists(outputs["sub/b.txt"]), "outputs of existing sources are kept")
+
+    # Converting only a subfolder never treats the rest of the tree as deleted
+    convert(os.path.join(folder, "sub"), output_dir and os.path.join(output_dir, "sub"), remove_orphans=True)
+    check(os.path.exists(outputs["a.txt"]), "outputs outside the scanned folder are never removed")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        verify_incremental(os.path.join(tmp, "in_place"), None)
+        verify_orphans(os.path.join(tmp, "in_place"), None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = os.path.join(tmp, "out")
+        verify_incremental(os.path.join(tmp, "src"), output_dir)
+        verify_orphans(os.path.join(tmp, "src"), output_dir)
+
+
+if __name__ == "__main__":
+    main()
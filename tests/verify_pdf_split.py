@@ -0,0 +1,129 @@
+import os
+import sys
+import random
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import pdf_pages
+from worker_pool import WorkerPool, report_progress
+
+PROSE = "Section {page}: the contractor shall provide all labour and materials."
+
+
+def create_pdf(path, pages, table_pages=()):
+    """PDF with prose, MasterFormat numbering lines (".1" alone on a line) and tables on some pages."""
+    import fitz
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        y = 72
+        page.insert_text((72, y), PROSE.format(page=page_number + 1))
+        y += 20
+        page.insert_text((72, y), ".1")
+        y += 20
+        page.insert_text((72, y), "The intent of this request is described below.")
+        y += 30
+        if page_number in table_pages:
+            for row in [("Item", "Qty", "Price"), ("Bolt", "10", "1.50"),
+                        ("Nut", "20", "0.75"), ("Washer", "30", "0.10")]:
+                for column, cell in enumerate(row):
+                    page.insert_text((72 + column * 150, y), cell)
+                y += 18
+        y += 20
+        page.insert_text((72, y), ".2")
+    doc.save(path)
+    doc.close()
+
+
+def stream_in_worker(path, output_path):
+    """Streaming conversion as a warm worker runs it: pages reported to the parent."""
+    return pdf_pages.convert_pdf_streaming(path, output_path, on_page=lambda done, total: report_progress(path, done, total))
+
+
+def serial_markdown(path):
+    from markitdown import MarkItDown
+    return MarkItDown().convert(path).text_content
+
+
+def verify_document(pool, path, label):
+    expected = serial_markdown(path)
+    page_count = pdf_pages.count_pages(path)
+
+    ok = True
+    for pages_per_range in (1, 2, page_count):
+        ranges = pdf_pages.page_ranges(page_count, pages_per_range)
+        split = pdf_pages.convert_pdf_parallel(path, ranges, pool)
+        if split != expected:
+            print(f"FAIL: {label}: split output ({pages_per_range} pages per range) differs from serial.")
+            print(f"  serial: {expected[:200]!r}")
+            print(f"  split:  {split[:200]!r}")
+            ok = False
+
+    streamed_path = path + ".md"
+    pages_seen = []
+    pdf_pages.STREAM_PAGES_PER_OPEN = 2
+    pdf_pages.convert_pdf_streaming(path, streamed_path, on_page=lambda done, total: pages_seen.append(done))
+    with open(streamed_path, encoding='utf-8') as f:
+        streamed = f.read()
+    if streamed != expected:
+        print(f"FAIL: {label}: streamed output differs from serial.")
+        print(f"  serial:   {expected[:200]!r}")
+        print(f"  streamed: {streamed[:200]!r}")
+        ok = False
+    if not pages_seen or pages_seen[-1] != page_count:
+        print(f"FAIL: {label}: page progress ended at {pages_seen[-1:]} of {page_count}.")
+        ok = False
+
+    forwarded = []
+    future = pool.submit(stream_in_worker, path, streamed_path,
+                         on_progress=lambda source, done, total: forwarded.append((done, total)))
+    pool.gather([future])
+    if not forwarded or forwarded[-1] != (page_count, page_count):
+        print(f"FAIL: {label}: page progress from the worker ended at {forwarded[-1:]} of {page_count}.")
+        ok = False
+
+    if ok:
+        print(f"PASS: {label}: split and streamed output equal serial markitdown output.")
+    return ok
+
+
+def verify_numbering_merge(rounds=5000):
+    merge = pdf_pages._pdf_converter_module()._merge_partial_numbering_lines
+    rng = random.Random(2026)
+    alphabet = [".1", " .2 ", ".10", "", "  ", "text", " text ", ".x", "1."]
+    for _ in range(rounds):
+        lines = [rng.choice(alphabet) for _ in range(rng.randint(0, 12))]
+        text = "\n".join(lines)
+        streamed = "\n".join(pdf_pages.merge_partial_numbering_stream(text.split("\n")))
+        if streamed != merge(text):
+            print(f"FAIL: merge_partial_numbering_stream differs for {text!r}")
+            return False
+    print(f"PASS: merge_partial_numbering_stream matches markitdown ({rounds} random texts).")
+    return True
+
+
+def main():
+    if not pdf_pages.can_split():
+        print("SKIP: installed markitdown is not in SPLIT_COMPATIBLE_MARKITDOWN.")
+        return
+
+    verify_numbering_merge()
+
+    pool = WorkerPool(2)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tables = os.path.join(tmp, "tables.pdf")
+            create_pdf(tables, 5, table_pages=(1, 3))
+            verify_document(pool, tables, "PDF with tables")
+
+            prose = os.path.join(tmp, "prose.pdf")
+            create_pdf(prose, 5)
+            verify_document(pool, prose, "PDF without tables")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import warm_pool
+import batch_engine
+from admission import MemoryAdmission
+from converter import MarkdownConverter, AIOptions
+from batch_engine import BatchOptions, LaneLimits
+from pipeline import PipelineOptions
+from warm_pool import shutdown_warm_pool
+from helpers import check, write, read
+
+
+def make_sources(folder):
+    for number in range(8):
+        sections = [f"## Section {section}\nLine {number}-{section} with  extra   spaces." for section in range(number + 1)]
+        write(os.path.join(folder, f"doc{number}.txt"), f"# Document {number}\n\n" + "\n\n".join(sections) + "\n")
+    write(os.path.join(folder, "table.csv"), "name,qty\nbolt,100\nnut,250\n")
+
+
+def convert(folder, output_dir, **batch_options):
+    converter = MarkdownConverter()
+    converter.set_batch_options(BatchOptions(**batch_options))
+    converter.set_ai_options(AIOptions(deterministic_output=True, chunk_enabled=True))
+    return converter.convert_folder(folder, output_dir=output_dir, overwrite=True)
+
+
+def outputs(output_dir):
+    return {name: read(os.path.join(output_dir, name)) for name in sorted(os.listdir(output_dir))}
+
+
+def spy(cls, name, calls, record=lambda instance, job: job):
+    """Record record(instance, job) after every call of a method, keeping its behaviour."""
+    original = getattr(cls, name)
+
+    def wrapper(self, job, *args):
+        result = original(self, job, *args)
+        calls.append(record(self, job))
+        return result
+    setattr(cls, name, wrapper)
+    return original
+
+
+def verify_pipeline(tmp):
+    folder = os.path.join(tmp, "src")
+    make_sources(folder)
+    serial = convert(folder, os.path.join(tmp, "serial"), max_workers=1)
+    check(all(r.success for r in serial), "serial conversion succeeds")
+
+    lanes, admitted = [], []
+    # The files of the lane in flight right after each acquire, that one included
+    original_lane = spy(batch_engine._LaneTracker, 'acquire', lanes,
+                        lambda tracker, job: tracker._running[job.format_name])
+    original_admission = spy(MemoryAdmission, 'acquire', admitted)
+    try:
+        piped = convert(
+            folder, os.path.join(tmp, "piped"),
+            max_workers=2, max_tasks_per_worker=50, max_rss_growth_mb=300,
+            lane_limits={'Text': LaneLimits(worker_share=0.5)},
+            pipeline=PipelineOptions(stage_workers={'parse': 2, 'images': 1, 'text': 2, 'ai': 1, 'write': 2})
+        )
+    finally:
+        batch_engine._LaneTracker.acquire = original_lane
+        MemoryAdmission.acquire = original_admission
+
+    check(len(piped) == len(serial) and all(r.success for r in piped), "pipeline conversion succeeds")
+    check(outputs(os.path.join(tmp, "piped")) == outputs(os.path.join(tmp, "serial")),
+          "pipeline output (markdown and chunks) equals serial output")
+    check(warm_pool._pool_key == (2, 50, 300), "parse stage runs on the warm pool sized and limited by BatchOptions")
+    check(len(lanes) == len(piped), "every file passes its format lane")
+    check(bool(lanes) and max(lanes) == 1,
+          "lane worker share bounds the files in flight")
+    check(len(admitted) == len(piped), "every file passes memory admission")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            verify_pipeline(tmp)
+        finally:
+            shutdown_warm_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+from converter import MarkdownConverter, AIOptions
+from batch_engine import BatchOptions
+from chunk_delta import DELTA_DIR_NAME
+from rechunk import rechunk_folder
+from warm_pool import shutdown_warm_pool
+from helpers import check, write, read
+
+
+def make_sources(folder):
+    for number in range(3):
+        sections = [f"## Section {section}\nBody {number}-{section}.\n\n### Detail\nMore {section}." for section in range(3)]
+        write(os.path.join(folder, f"doc{number}.txt"), f"# Document {number}\n\n" + "\n\n".join(sections) + "\n")
+
+
+def options(level):
+    return AIOptions(deterministic_output=True, chunk_enabled=True, chunk_level=level)
+
+
+def convert(folder, output_dir, level):
+    converter = MarkdownConverter()
+    converter.set_batch_options(BatchOptions(max_workers=1, incremental=True))
+    converter.set_ai_options(options(level))
+    return converter.convert_folder(folder, output_dir=output_dir, overwrite=False)
+
+
+def chunk_files(output_dir):
+    return {name: read(os.path.join(output_dir, name)) for name in sorted(os.listdir(output_dir)) if name.endswith('.jsonl')}
+
+
+def verify_rechunk(tmp, workers):
+    folder = os.path.join(tmp, "src")
+    output_dir, expected_dir = os.path.join(tmp, f"out{workers}"), os.path.join(tmp, f"expected{workers}")
+    convert(folder, output_dir, 1)
+    convert(folder, expected_dir, 3)
+    write(os.path.join(output_dir, "README.md"), "# Written by hand\n")
+    markdown = {name: read(os.path.join(output_dir, name)) for name in os.listdir(output_dir) if name.endswith('.md')}
+    before = chunk_files(output_dir)
+
+    results = rechunk_folder(output_dir, options(3), workers=workers)
+    label = "in-process" if workers == 1 else "on the worker pool"
+    check(len(results) == 4 and all(r.success for r in results), f"rechunk {label} handles every markdown file")
+    check([os.path.basename(r.markdown_path) for r in results if r.skipped] == ["README.md"],
+          "markdown without converter frontmatter is skipped")
+    check(chunk_files(output_dir) == chunk_files(expected_dir) and chunk_files(output_dir) != before,
+          "rechunked files equal a conversion at the new chunk level")
+    check(all(r.chunk_delta["added"] and r.chunk_delta["removed"] for r in results if not r.skipped),
+          "each result reports its chunk delta")
+    check({name: read(os.path.join(output_dir, name)) for name in markdown} == markdown
+          and not os.path.exists(os.path.join(output_dir, "README.jsonl")), "markdown files are not touched")
+    check(os.path.isdir(os.path.join(output_dir, DELTA_DIR_NAME)), "the run delta log is written in the output folder")
+
+    again = convert(folder, output_dir, 3)
+    check(all(r.skipped for r in again), "the next incremental run at the new level reconverts nothing")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_sources(os.path.join(tmp, "src"))
+        try:
+            verify_rechunk(tmp, workers=1)
+            verify_rechunk(tmp, workers=2)
+        finally:
+            shutdown_warm_pool()
+
+
+if __name__ == "__main__":
+    main()
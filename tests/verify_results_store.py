@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import results_store
+from results_store import ResultsStore
+from converter import MarkdownConverter, AIOptions, ConversionResult
+from batch_engine import BatchOptions
+from helpers import check, write
+
+
+def convert(folder, output_dir, failing=None, **batch_options):
+    """Convert a folder in-process; the parse stage of `failing` raises."""
+    run_stage = MarkdownConverter.run_stage
+
+    def flaky(converter, stage, job):
+        if stage == 'parse' and Path(job.source_path).name == failing:
+            raise RuntimeError("parser crashed")
+        return run_stage(converter, stage, job)
+
+    MarkdownConverter.run_stage = flaky
+    try:
+        converter = MarkdownConverter()
+        converter.set_batch_options(BatchOptions(max_workers=1, **batch_options))
+        converter.set_ai_options(AIOptions())
+        return converter.convert_folder(folder, output_dir=output_dir, overwrite=True)
+    finally:
+        MarkdownConverter.run_stage = run_stage
+
+
+def stored_runs():
+    store = ResultsStore()
+    try:
+        return store.list_runs()
+    finally:
+        store.close()
+
+
+def verify_store(tmp):
+    store = ResultsStore(os.path.join(tmp, "direct.db"))
+    try:
+        store.start_run("run-1", ["a.txt", "b.txt"], tmp, False, AIOptions())
+        store.record("run-1", ConversionResult(source_path="a.txt", output_path=None, success=False, error_message="boom"))
+        store.record("run-1", ConversionResult(source_path="b.txt", output_path=None, success=False, timed_out=True))
+        # A resumed run converts a.txt again: only its latest result counts
+        store.record("run-1", ConversionResult(source_path="a.txt", output_path="a.md", success=True))
+        store.finish_run("run-1")
+        run = store.get_run("run-1")
+        check(run.total == 2 and run.finished is not None and run.counts == {'success': 1, 'timeout': 1},
+              "run counts use the latest result of each file")
+        check(store.failed_files("run-1") == ["b.txt"] and store.failed_files("run-1", include_timeouts=False) == [],
+              "failed_files returns timeouts only when asked")
+        check(store.get_run("unknown") is None, "an unknown run id has no summary")
+    finally:
+        store.close()
+
+
+def verify_retry(tmp):
+    folder, output_dir = os.path.join(tmp, "src"), os.path.join(tmp, "out")
+    write(os.path.join(folder, "good.txt"), "# Good\n\nfine")
+    write(os.path.join(folder, "notes.txt"), "# Notes\n\nfixed later")
+
+    convert(folder, output_dir)
+    check(not results_store.DEFAULT_DB_PATH.exists(), "a batch without results_store writes no database")
+    os.remove(os.path.join(output_dir, "notes.txt.md"))
+
+    results = convert(folder, output_dir, failing="notes.txt", results_store=True)
+    check(sorted(r.status for r in results) == ['failed', 'success'], "the crashing file fails")
+    runs = stored_runs()
+    check(len(runs) == 1 and runs[0].counts == {'failed': 1, 'success': 1}
+          and runs[0].output_dir == os.path.abspath(output_dir), "the batch is stored as one run")
+
+    check(not os.path.exists(os.path.join(output_dir, "notes.txt.md")), "a failed file leaves no output")
+    converter = MarkdownConverter()
+    converter.set_batch_options(BatchOptions(max_workers=1, results_store=True))
+    retried = converter.retry_failed(runs[0].run_id)
+    check([Path(r.source_path).name for r in retried] == ["notes.txt"] and retried[0].success,
+          "retry_failed converts only the failed file")
+    check(os.path.exists(os.path.join(output_dir, "notes.txt.md")), "the retry writes to the stored output folder")
+
+    latest = stored_runs()
+    check(len(latest) == 2 and latest[0].retry_of == runs[0].run_id and latest[0].counts == {'success': 1},
+          "the retry is stored as a new run pointing at the original")
+
+    try:
+        converter.retry_failed("unknown")
+        check(False, "an unknown run id raises KeyError")
+    except KeyError:
+        check(True, "an unknown run id raises KeyError")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the results database of this script in the temp folder
+        results_store.DEFAULT_DB_PATH = Path(tmp) / "results.db"
+        verify_store(tmp)
+        verify_retry(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import scan_index
+from scan_index import ScanIndex
+from converter import MarkdownConverter
+from batch_engine import BatchOptions
+from helpers import check, touch
+
+
+def age_tree(root, seconds=100):
+    """Move directory mtimes into the past, so listings are trusted and not re-read."""
+    past = time.time() - seconds
+    for dir_path, _, _ in os.walk(root):
+        os.utime(dir_path, (past, past))
+
+
+def walk_files(root, max_depth=None, extensions=None):
+    """Ground truth from os.walk."""
+    result = []
+    for dir_path, dirs, files in os.walk(root):
+        depth = 0 if dir_path == root else os.path.relpath(dir_path, root).count(os.sep) + 1
+        if max_depth is not None and depth >= max_depth:
+            dirs[:] = []
+        for name in files:
+            if extensions is None or os.path.splitext(name)[1].lower() in extensions:
+                result.append(os.path.join(dir_path, name))
+    return sorted(result)
+
+
+def counting(index):
+    """Count the directories the index reads from disk."""
+    calls = []
+    original = index._list
+    index._list = lambda dir_path, mtime_ns: calls.append(str(dir_path)) or original(dir_path, mtime_ns)
+    return calls
+
+
+def verify_basic(root, index_dir):
+    for name in ["1.pdf", "a/2.docx", "a/b/3.pdf", "a/b/c/4.PDF", "y/5.txt"]:
+        touch(os.path.join(root, name))
+    age_tree(root)
+
+    index = ScanIndex(root, index_dir)
+    index.refresh(None)
+    index.save()
+    check(index.files(None) == walk_files(root), "whole tree matches os.walk")
+    check(index.files(None, {'.pdf'}) == walk_files(root, None, {'.pdf'}), "extension filter matches os.walk")
+    check(all(index.files(depth) == walk_files(root, depth) for depth in range(4)), "depth limits match os.walk")
+
+    reloaded = ScanIndex(root, index_dir)
+    calls = counting(reloaded)
+    check(reloaded.covers(None) and reloaded.files(None) == walk_files(root), "saved index is reloaded")
+    reloaded.refresh(None)
+    check(calls == [], "unchanged folders are not listed again")
+
+    touch(os.path.join(root, "a", "b", "new.pdf"))
+    reloaded.refresh(None)
+    check(calls == [str(reloaded.root / "a" / "b")], "only the changed folder is listed again")
+    check(reloaded.files(None) == walk_files(root), "added file is found")
+
+    shutil.rmtree(os.path.join(root, "a", "b"))
+    reloaded.refresh(None)
+    check(reloaded.files(None) == walk_files(root), "removed folder is forgotten")
+
+
+def verify_shallow_after_deep(root, index_dir):
+    touch(os.path.join(root, "top.txt"))
+    touch(os.path.join(root, "a", "b", "deep.txt"))
+    age_tree(root)
+
+    index = ScanIndex(root, index_dir)
+    index.refresh(None)
+    index.refresh(1)
+    index.save()
+    check(index.covers(1) and not index.covers(None), "a shallow refresh after a deep one covers only its depth")
+
+    # A change below the shallow refresh depth is only seen after a deep refresh
+    touch(os.path.join(root, "a", "b", "later.txt"))
+    reloaded = ScanIndex(root, index_dir)
+    check(not reloaded.covers(None), "reloaded index does not claim the whole tree")
+    reloaded.refresh(None)
+    check(reloaded.files(None) == walk_files(root), "deep refresh finds the file added below the shallow depth")
+
+
+def verify_random(root, index_dir, rounds=200):
+    rng = random.Random(2026)
+    index = ScanIndex(root, index_dir)
+    folders = [""]
+    for step in range(rounds):
+        action = rng.random()
+        if action < 0.5:
+            folder = rng.choice(folders)
+            touch(os.path.join(root, folder, f"f{step}{rng.choice(['.pdf', '.docx', '.txt'])}"))
+        elif action < 0.7:
+            folder = os.path.join(rng.choice(folders), f"d{step}")
+            os.makedirs(os.path.join(root, folder))
+            folders.append(folder)
+        elif action < 0.8 and len(folders) > 1:
+            folder = rng.choice(folders[1:])
+            shutil.rmtree(os.path.join(root, folder), ignore_errors=True)
+            folders = [f for f in folders if f != folder and not f.startswith(folder + os.sep)]
+        else:
+            files = walk_files(root)
+            if files:
+                os.remove(rng.choice(files))
+
+        depth = rng.choice([None, 0, 1, 2, 3])
+        index.refresh(depth)
+        if index.files(depth) != walk_files(root, depth):
+            check(False, f"index matches os.walk after random changes (step {step}, depth {depth})")
+            return
+    check(True, f"index matches os.walk after {rounds} random changes and refresh depths")
+
+
+def verify_scan_folder(root, index_dir):
+    for name in ["b.pdf", "a.txt", "sub/c.docx", "sub/deep/d.pdf", "notes.unknown"]:
+        touch(os.path.join(root, name))
+    link = root + "-link"
+    os.symlink(root, link)
+
+    scan_index.DEFAULT_INDEX_DIR = index_dir
+    converter = MarkdownConverter()
+    for folder, label in ((root, "absolute"), (os.path.relpath(root), "relative"), (link, "symlinked")):
+        # Paths below the folder as given, sorted (not resolved)
+        expected = sorted(path for path in walk_files_as_given(folder)
+                          if os.path.splitext(path)[1] in converter.get_all_extensions())
+        check(converter.scan_folder(folder, recursive=True) == expected,
+              f"scan_folder answers below the {label} folder as given")
+
+    saved = lambda: os.listdir(index_dir) if os.path.isdir(index_dir) else []
+    check(saved() == [], "scan index is kept in memory only by default")
+    converter = MarkdownConverter()
+    converter.set_batch_options(BatchOptions(scan_index=True))
+    converter.scan_folder(root, recursive=True)
+    check(len(saved()) == 1, "BatchOptions.scan_index saves the scan index")
+
+
+def walk_files_as_given(folder):
+    """Files below a folder, joined to the folder string as given."""
+    result = []
+    for dir_path, _, files in os.walk(folder):
+        result.extend(os.path.join(dir_path, name) for name in files)
+    return result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        index_dir = os.path.join(tmp, "index")
+        verify_scan_folder(os.path.join(tmp, "folder"), os.path.join(tmp, "default-index"))
+        verify_basic(os.path.join(tmp, "basic"), index_dir)
+        verify_shallow_after_deep(os.path.join(tmp, "shallow"), index_dir)
+        os.makedirs(os.path.join(tmp, "random"))
+        verify_random(os.path.join(tmp, "random"), index_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+from converter import ConversionResult
+from scheduler import FifoScheduler, CostScheduler, LEARNING_RATE
+from helpers import check, write
+
+
+def make_files(folder):
+    """Text and image files of different sizes, in input order (the scheduler reads only sizes)."""
+    sizes = [("a.txt", 10), ("b.txt", 5000), ("c.png", 200), ("d.txt", 800), ("e.png", 9000)]
+    paths = []
+    for name, size in sizes:
+        path = os.path.join(folder, name)
+        write(path, "x" * size)
+        paths.append(path)
+    return paths
+
+
+def drain(scheduler, admits=None):
+    order = []
+    while True:
+        job = scheduler.pop(admits)
+        if job is None:
+            return order
+        order.append(os.path.basename(job.path))
+
+
+def verify_fifo(paths):
+    scheduler = FifoScheduler(paths)
+    check(len(scheduler) == len(paths), "every file is queued")
+    check(drain(scheduler) == ["a.txt", "b.txt", "c.png", "d.txt", "e.png"], "FIFO keeps input order across lanes")
+    check(len(scheduler) == 0 and scheduler.pop() is None, "an empty schedule pops nothing")
+
+
+def verify_cost(paths):
+    scheduler = CostScheduler(paths)
+    estimates = {os.path.basename(path): scheduler.estimate_seconds(scheduler._jobs_by_path[path]) for path in paths}
+    order = drain(scheduler)
+    check(order == sorted(estimates, key=estimates.get, reverse=True), "the longest estimated job runs first")
+    check(order == ["b.txt", "e.png", "d.txt", "c.png", "a.txt"],
+          "estimates weigh size by format (a large image file runs after a smaller text file)")
+
+    text_only = drain(CostScheduler(paths), admits=lambda job: job.format_name == 'Text')
+    check(text_only == ["b.txt", "d.txt", "a.txt"], "lane heads the predicate rejects stay queued")
+
+
+def verify_learning(paths):
+    scheduler = CostScheduler(paths)
+    job = scheduler._jobs_by_path[paths[1]]
+    default = scheduler.bytes_per_second(job.format_name)
+
+    scheduler.record(ConversionResult(source_path=job.path, output_path=None, success=False, duration=1.0))
+    scheduler.record(ConversionResult(source_path=job.path, output_path=None, success=True, skipped=True, duration=1.0))
+    check(scheduler.bytes_per_second(job.format_name) == default, "failed and skipped files teach nothing")
+
+    scheduler.record(ConversionResult(source_path=job.path, output_path=None, success=True, duration=2.0))
+    first = job.weight / 2.0
+    check(scheduler.bytes_per_second(job.format_name) == first, "the first observation replaces the default")
+
+    scheduler.record(ConversionResult(source_path=job.path, output_path=None, success=True, duration=1.0))
+    expected = (1 - LEARNING_RATE) * first + LEARNING_RATE * job.weight
+    check(abs(scheduler.bytes_per_second(job.format_name) - expected) < 1e-9,
+          "later observations update a moving average")
+
+    # A slow image lane moves its largest file ahead of the largest text file
+    image = scheduler._jobs_by_path[paths[4]]
+    scheduler.record(ConversionResult(source_path=image.path, output_path=None, success=True, duration=1000.0))
+    check(scheduler.bytes_per_second(image.format_name) < scheduler.bytes_per_second(job.format_name)
+          and drain(scheduler)[0] == "e.png", "learned throughput re-ranks the lane heads")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_files(tmp)
+        verify_fifo(paths)
+        verify_cost(paths)
+        verify_learning(paths)
+
+
+if __name__ == "__main__":
+    main()
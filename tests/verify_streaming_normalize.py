@@ -0,0 +1,71 @@
+import os
+import sys
+import random
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import text_processor
+
+# Characters around the block boundaries that matter: Japanese with spaces and
+# zero-width spaces between them, half-width katakana with voiced marks, combining
+# accents, full-width and compatibility characters, Hangul jamo
+ALPHABET = [
+    "日", "本", "か", "ア", "。", "\u3000", " ", "\t", "\u200b", "\n", "\r",
+    "ｶ", "\uff9e", "\u3099", "a", "e", "\u0301", "\u0323", "Ａ", "１", "\ufb01",
+    "\u3131", "\u1161", "가", "\u11a8",
+]
+
+
+def random_pieces(rng, text):
+    """Split text at random points."""
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 6))))
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+
+def verify_clean_stream(rounds=20000):
+    rng = random.Random(2024)
+    for _ in range(rounds):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 80)))
+        pieces = random_pieces(rng, text)
+        block_size = rng.randint(1, 16)
+        streamed = "".join(text_processor.clean_text_stream(pieces, block_size))
+        if streamed != text_processor.clean_text(text):
+            print(f"FAIL: clean_text_stream differs for {text!r} (pieces {pieces!r}, block {block_size})")
+            return False
+    print(f"PASS: clean_text_stream matches clean_text ({rounds} random texts).")
+    return True
+
+
+def verify_normalize_stream(rounds=20000):
+    rng = random.Random(2025)
+    alphabet = ["a", " ", "\t", "\n", "\r\n", "\x0c", "b\n\n\n"]
+    for _ in range(rounds):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        pieces = random_pieces(rng, text)
+        streamed = "".join(text_processor.normalize_markdown_stream(pieces))
+        if streamed != text_processor.normalize_markdown(text):
+            print(f"FAIL: normalize_markdown_stream differs for {text!r} (pieces {pieces!r})")
+            return False
+    print(f"PASS: normalize_markdown_stream matches normalize_markdown ({rounds} random texts).")
+    return True
+
+
+def verify_large_document():
+    line = "日本 語 の テキスト ＡＢＣ１２３ ｶﾞｷﾞ café\n"
+    text = line * 20000 + "日 本" * 50000
+    streamed = "".join(text_processor.clean_text_stream([text], 4096))
+    if streamed == text_processor.clean_text(text):
+        print(f"PASS: {len(text)} characters cleaned in 4096-character blocks.")
+    else:
+        print("FAIL: large document differs.")
+
+
+def main():
+    verify_clean_stream()
+    verify_normalize_stream()
+    verify_large_document()
+
+
+if __name__ == "__main__":
+    main()
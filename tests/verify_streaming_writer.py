@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+import tracemalloc
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import text_processor
+from converter import MarkdownConverter, AIOptions
+from helpers import check, write, read
+
+LINE = "# 日本語 の 見出し\n本文 テキスト ｶﾞ ＡＢＣ １２３ text  with   spaces​。\n\n"
+
+
+def document(chars):
+    return LINE * (chars // len(LINE) + 1)
+
+
+def text_stage(converter, source, output_dir, blocks):
+    """Run the text stage on a document of about `blocks` blocks: (job, expected text, peak bytes)."""
+    original = document(blocks * text_processor.BLOCK_SIZE)
+    expected = text_processor.clean_text(original)
+    job = converter.prepare_job(source, output_dir, overwrite=True)
+    job.markdown = original
+    del original
+
+    tracemalloc.start()
+    converter.run_stage('text', job)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return job, expected, peak
+
+
+def verify_text_stage(tmp):
+    converter = MarkdownConverter()
+    converter.set_ai_options(AIOptions(chunk_enabled=True))
+    source = os.path.join(tmp, "big.txt")
+    write(source, "placeholder")
+
+    os.makedirs(os.path.join(tmp, "small"))
+    small_job, _, small_peak = text_stage(converter, source, os.path.join(tmp, "small"), 2)
+    job, expected, peak = text_stage(converter, source, tmp, 8)
+    check(job.markdown == "" and job.segments is None and job.body_path is not None,
+          "a document larger than one block is cleaned into a spool file")
+    check(read(job.body_path) == expected, "the spooled text equals clean_text of the whole document")
+    # Four times the document, about the same peak: the cleaned text is not kept in memory
+    check(peak - small_peak < sys.getsizeof(expected) / 8,
+          f"text stage memory does not grow with the document (peak {small_peak // 1024} KB "
+          f"for 2 blocks, {peak // 1024} KB for 8)")
+    os.remove(small_job.body_path)
+
+    converter.run_stage('ai', job)
+    converter.run_stage('write', job)
+    output = read(job.output_path)
+    check(output.endswith(expected) and "converted_at" in output, "the writer streams the spooled text to the .md file")
+    check(os.path.exists(job.output_path.with_suffix('.jsonl')), "the chunker reads the spooled text too")
+    check(not any(name.endswith('.part') for name in os.listdir(tmp)), "spool files are removed after writing")
+
+
+def verify_small_document(tmp):
+    converter = MarkdownConverter()
+    source = os.path.join(tmp, "small.txt")
+    write(source, "placeholder")
+    job = converter.prepare_job(source, tmp, overwrite=True)
+    job.markdown = LINE * 10
+    converter.run_stage('text', job)
+    check(job.body_path is None and "".join(job.segments) == text_processor.clean_text(LINE * 10),
+          "a document within one block stays in memory")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        verify_text_stage(tmp)
+        verify_small_document(tmp)
+
+
+if __name__ == "__main__":
+    main()
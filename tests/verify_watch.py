@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+import journal
+import results_store
+from journal import JobJournal
+from results_store import ResultsStore
+from converter import MarkdownConverter, AIOptions
+from batch_engine import BatchOptions
+from watcher import FolderWatcher, WatchOptions
+from helpers import check, write, read
+
+
+def wait_for(condition, timeout=15.0):
+    """Poll until condition() holds; False after the timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def touch_later(path, seconds=5):
+    """Move a file's mtime forward without changing its content."""
+    stamp = time.time() + seconds
+    os.utime(path, (stamp, stamp))
+
+
+def verify_watch(tmp):
+    folder, output_dir = os.path.join(tmp, "src"), os.path.join(tmp, "out")
+    report = os.path.join(folder, "report.txt")
+    write(report, "first version")
+
+    journals = []
+    create = JobJournal.create
+    JobJournal.create = lambda *args, **kwargs: journals.append(args[0]) or create(*args, **kwargs)
+
+    results = []
+    converter = MarkdownConverter()
+    converter.set_batch_options(BatchOptions(max_workers=1, journal=True, results_store=True))
+    converter.set_ai_options(AIOptions())
+    watcher = FolderWatcher(
+        converter, folder, output_dir,
+        WatchOptions(debounce=0.3, poll_interval=0.1, use_polling=True),
+        progress_callback=lambda current, total, result: results.append(result)
+    )
+    output = lambda name: os.path.join(output_dir, name + ".md")
+
+    def next_result(name):
+        """Wait for the next result of a file."""
+        seen = len(results)
+        if not wait_for(lambda: any(Path(r.source_path).name == name for r in results[seen:])):
+            return None
+        return [r for r in results[seen:] if Path(r.source_path).name == name][0]
+
+    try:
+        watcher.start()
+        check(len(results) == 1 and results[0].success and "first version" in read(output("report.txt")),
+              "catch-up sync converts the existing file")
+        check(len(journals) == 1, "catch-up sync keeps a job journal")
+
+        write(report, "second version, edited")
+        result = next_result("report.txt")
+        check(result is not None and result.success and not result.skipped
+              and "second version" in read(output("report.txt")), "edited file is converted again")
+
+        stamp = os.path.getmtime(output("report.txt"))
+        touch_later(report)
+        result = next_result("report.txt")
+        check(result is not None and result.skipped and os.path.getmtime(output("report.txt")) == stamp,
+              "touched file without content change is skipped through the manifest")
+
+        write(output("notes.txt"), "written by hand")
+        write(os.path.join(folder, "notes.txt"), "new notes")
+        result = next_result("notes.txt")
+        check(result is not None and result.success and not result.skipped
+              and "new notes" in read(output("notes.txt")), "new file replaces an output without a record")
+
+        os.remove(os.path.join(folder, "notes.txt"))
+        check(wait_for(lambda: not os.path.exists(output("notes.txt"))), "output of a deleted source is removed")
+
+        check(len(journals) == 1, "event batches keep no job journal")
+        check(len(ResultsStore().list_runs()) == 1, "event batches add no results store run")
+    finally:
+        watcher.stop()
+        JobJournal.create = create
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the journals and the results database of this script in the temp folder
+        journal.DEFAULT_JOURNAL_DIR = Path(tmp) / "jobs"
+        results_store.DEFAULT_DB_PATH = Path(tmp) / "results.db"
+        verify_watch(tmp)
+
+
+if __name__ == "__main__":
+    main()
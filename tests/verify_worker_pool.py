@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.getcwd(), 'app'))
+
+from worker_pool import WorkerPool, WorkerTimeout, WorkerCrashed, TaskCancelled, report_progress
+from helpers import check
+
+
+def echo(value):
+    return value
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def sleep_then_pid(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def crash():
+    os._exit(3)
+
+
+def count_up(steps):
+    for step in range(1, steps + 1):
+        report_progress("task", step, steps)
+    return steps
+
+
+def expect_error(future, error_type, timeout=10):
+    try:
+        future.result(timeout=timeout)
+    except error_type:
+        return True
+    except Exception as e:
+        print(f"  unexpected {type(e).__name__}: {e}")
+    return False
+
+
+def wait_until(condition, timeout=10):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def verify_results(pool):
+    check(pool.submit(echo, 42).result(timeout=30) == 42, "result is returned from the worker")
+    check(expect_error(pool.submit(fail, "boom"), ValueError), "exception raised by the task reaches the future")
+
+
+def verify_timeout(pool):
+    started = time.monotonic()
+    hung = pool.submit(sleep_then_pid, 30, timeout=0.5, tag="hung")
+    wait_until(lambda: pool.pids_for("hung"))
+    hung_pids = pool.pids_for("hung")
+    timed_out = expect_error(hung, WorkerTimeout)
+    check(timed_out and time.monotonic() - started < 10, "hung task fails with WorkerTimeout")
+    check(hung_pids and wait_until(lambda: not process_alive(hung_pids[0])), "timed out worker is terminated")
+    # The killed worker is replaced and the pool keeps running
+    check(pool.submit(echo, "after timeout").result(timeout=30) == "after timeout",
+          "pool keeps serving tasks after a timeout")
+
+
+def verify_crash(pool):
+    check(expect_error(pool.submit(crash), WorkerCrashed), "dead worker fails its task with WorkerCrashed")
+    check(pool.submit(echo, "after crash").result(timeout=30) == "after crash", "crashed worker is replaced")
+
+
+def verify_cancel():
+    with WorkerPool(1) as pool:
+        running = pool.submit(sleep_then_pid, 30, tag="a.pdf")
+        queued = pool.submit(echo, "never")
+        check(wait_until(lambda: pool.pids_for("a.pdf")), "pids_for finds the worker running a tagged task")
+        check(pool.pids_for("b.pdf") == [], "pids_for ignores other tags")
+
+        started = time.monotonic()
+        check(pool.cancel(queued) and expect_error(queued, TaskCancelled), "queued task is dropped on cancel")
+        check(pool.cancel(running) and expect_error(running, TaskCancelled), "running task is cancelled")
+        check(time.monotonic() - started < 10, "cancelling does not wait for the task")
+        check(pool.submit(echo, 1).result(timeout=30) == 1, "pool keeps serving tasks after a cancel")
+
+
+def verify_recycle():
+    with WorkerPool(1, max_tasks_per_worker=2) as pool:
+        pids = [pool.submit(sleep_then_pid, 0).result(timeout=30) for _ in range(4)]
+        check(pids[0] == pids[1] and pids[2] == pids[3] and pids[1] != pids[2],
+              f"worker retires after max_tasks_per_worker tasks (pids {pids})")
+
+
+def verify_progress(pool):
+    seen = []
+    result = pool.submit(count_up, 3, on_progress=lambda *args: seen.append(args)).result(timeout=30)
+    # Progress replies are read before the result, the callback runs right after
+    wait_until(lambda: len(seen) == 3, timeout=2)
+    check(result == 3 and seen == [("task", 1, 3), ("task", 2, 3), ("task", 3, 3)],
+          "report_progress reaches the on_progress callback in order")
+
+
+def verify_gather(pool):
+    futures = [pool.submit(echo, value) for value in range(5)]
+    check(pool.gather(futures) == list(range(5)), "gather returns results in submission order")
+
+    futures = [pool.submit(sleep_then_pid, 30) for _ in range(3)]
+    started = time.monotonic()
+    try:
+        pool.gather(futures, deadline=time.monotonic() + 0.5)
+        check(False, "gather raises WorkerTimeout once the deadline passes")
+    except WorkerTimeout:
+        check(time.monotonic() - started < 10, "gather raises WorkerTimeout once the deadline passes")
+    check(all(expect_error(future, TaskCancelled, timeout=1) for future in futures),
+          "tasks left when the deadline passes are cancelled")
+
+    futures = [pool.submit(sleep_then_pid, 30) for _ in range(2)]
+    stop_at = time.monotonic() + 0.5
+    try:
+        pool.gather(futures, should_stop=lambda: time.monotonic() > stop_at)
+        check(False, "gather stops when should_stop turns true")
+    except TaskCancelled:
+        check(True, "gather stops when should_stop turns true")
+
+
+def main():
+    pool = WorkerPool(2)
+    try:
+        verify_results(pool)
+        verify_timeout(pool)
+        verify_crash(pool)
+        verify_progress(pool)
+        verify_gather(pool)
+    finally:
+        pool.shutdown(kill=True)
+    verify_cancel()
+    verify_recycle()
+
+
+if __name__ == "__main__":
+    main()